@@ -0,0 +1,63 @@
+"""
+Benchmark patch_python_sources against the previous replace()-per-step
+implementation on the bundled PD template.
+
+    python benchmarks/bench_patch_sources.py [--repeat N]
+"""
+import argparse
+import contextlib
+import io
+import re
+import sys
+import timeit
+from pathlib import Path
+
+SCRIPTS = Path(__file__).resolve().parents[1] / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+from build_brick_mix_py import patch_python_sources, word_to_modified_bricks  # noqa: E402
+
+
+def legacy_patch_python_sources(src: str, modified_bricks: set[int]) -> str:
+    """The original implementation: one full-source str.replace per step."""
+    pattern = r'source=\[well_plate_1\["([A-H][0-9]{1,2})"\]\]'
+    matches = list(re.finditer(pattern, src))
+    new_src = src
+    for i, m in enumerate(matches[:38], start=1):
+        well = m.group(1)
+        old = f'source=[well_plate_1["{well}"]]'
+        if i in modified_bricks and i not in (1, 38):
+            new = f'source=[well_plate_2["{well}"]]'
+        else:
+            new = old
+        new_src = new_src.replace(old, new, 1)
+    return new_src
+
+
+def main(argv: list[str] | None = None):
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("--template", default=str(SCRIPTS / "BRICK_MIX_38_TIMES.py"))
+    p.add_argument("--word", default="Epic")
+    p.add_argument("--repeat", type=int, default=200)
+    args = p.parse_args(argv)
+
+    src = Path(args.template).read_text()
+    modified = set(word_to_modified_bricks(args.word))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        new = patch_python_sources(src, modified)
+    assert new == legacy_patch_python_sources(src, modified), "outputs differ"
+
+    def single_pass():
+        with contextlib.redirect_stdout(io.StringIO()):
+            patch_python_sources(src, modified)
+
+    for name, fn in (
+        ("legacy (replace per step)", lambda: legacy_patch_python_sources(src, modified)),
+        ("single pass (match spans)", single_pass),
+    ):
+        best = min(timeit.repeat(fn, number=args.repeat, repeat=5)) / args.repeat
+        print(f"{name:28s} {best * 1e3:8.3f} ms/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark the fleet watcher against local stand-in robots (no OT-2 needed).
+
+    python benchmarks/bench_watchdog.py [--robots 1 10 50] [--seconds 60] [--speed 120]
+
+Every fake robot replays the same generated BM+SA protocol, sped up so that
+planned pauses come every few seconds, and resumes each pause after
+--resume-after robot seconds. Reported per fleet size: requests and bytes
+per robot-minute, request latency, pause-alert latency (from the moment a
+robot pauses to the watcher's status event) and CPU time. Fakes and watcher
+share one process, so CPU is an upper bound for the watcher alone.
+The "full /runs" column is what one poll of the old watchdog downloaded.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPTS = Path(__file__).resolve().parents[1] / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+from brick_core.cli import bm_sa_parser, run_bm_sa  # noqa: E402
+from brick_core.watch import Fleet, HttpPool, PollSchedule, Robot, load_plans  # noqa: E402
+from brick_core.watch.fake_robot import FakeRobot, load_script  # noqa: E402
+
+
+async def run_fleet(size: int, script, plans: dict, args) -> dict:
+    fakes, robots = [], []
+    for i in range(size):
+        fake = FakeRobot(f"fake{i}", args.speed, args.resume_after)
+        fake.history(args.history)
+        fake.queue(*script)
+        robots.append(Robot(fake.name, "127.0.0.1", await fake.serve()))
+        fakes.append(fake)
+
+    pool = HttpPool()
+    latencies = []
+    get_json = pool.get_json
+
+    async def timed_get_json(*a):
+        start = time.perf_counter()
+        try:
+            return await get_json(*a)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    pool.get_json = timed_get_json
+    alerts = []
+    by_name = {f.name: f for f in fakes}
+
+    def on_event(event):
+        if event.kind == "status" and event.status == "paused":
+            replay = by_name[event.robot].replays[event.run_id]
+            paused_at = replay.t0 + replay.pauses[-1][0] / replay.speed
+            alerts.append(time.monotonic() - paused_at)
+
+    stop = asyncio.Event()
+    fleet = Fleet(robots, PollSchedule(), pool=pool, plans=plans)
+    cpu, wall = time.process_time(), time.perf_counter()
+    asyncio.get_running_loop().call_later(args.seconds, stop.set)
+    await fleet.run(on_event, stop)
+    cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+    for fake in fakes:
+        await fake.close()
+
+    robot_min = size * wall / 60
+    bytes_per_request = pool.stats["bytes"] / max(1, pool.stats["requests"])
+    full_listing = len(json.dumps(fakes[0].respond("/runs")[1]).encode())
+    return {
+        "robots": size,
+        "req/robot-min": pool.stats["requests"] / robot_min,
+        "B/request": bytes_per_request,
+        "full /runs B": full_listing,
+        "p50 ms": 1000 * statistics.median(latencies),
+        "p95 ms": 1000 * statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else 0.0,
+        "alert s": statistics.mean(alerts) if alerts else float("nan"),
+        "alerts": len(alerts),
+        "CPU %": 100 * cpu / wall,
+    }
+
+
+def main(argv: list[str] | None = None):
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("--robots", type=int, nargs="+", default=[1, 10, 50])
+    p.add_argument("--seconds", type=float, default=60.0)
+    p.add_argument("--speed", type=float, default=120.0, help="Robot seconds per real second")
+    p.add_argument("--resume-after", type=float, default=240.0, help="Operator response (robot seconds)")
+    p.add_argument("--history", type=int, default=500, help="Old runs on each robot")
+    p.add_argument("--word", default="Epic brick mixes, planned. " * 3)
+    args = p.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        build = bm_sa_parser().parse_args(["--word", args.word, "--temp-vol", "5", "--transfer-vol", "2",
+                                           "--brick-stock", "12", "--outdir", tmp, "--output", "bench.py",
+                                           "--plan"])
+        (protocol,) = run_bm_sa(build)
+        script, plans = load_script(protocol), load_plans([Path(tmp)])
+
+    rows = [asyncio.run(run_fleet(size, script, plans, args)) for size in args.robots]
+    print()
+    print("  ".join(f"{k:>13}" for k in rows[0]))
+    for row in rows:
+        print("  ".join(f"{v:>13.1f}" if isinstance(v, float) else f"{v:>13}" for v in row.values()))
+
+
+if __name__ == "__main__":
+    main()
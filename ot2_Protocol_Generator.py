@@ -4,27 +4,41 @@ OT2-BRICK-MIX-PROTOCOLS: interactive menu runner
 
 - Lets user choose which generator script/protocol to run
 - Prompts for key args
-- Executes the selected script via subprocess (so we don't have to refactor existing scripts)
+- Runs the selected script in-process when it exposes build_parser() and
+  main(argv) (flags are read from its argparse parser); other scripts are
+  executed via subprocess and their flags scraped from --help
 """
 
 from __future__ import annotations
 
+import argparse
+import ast
+import importlib.util
+import json
 import os
 import platform
+import time
+import traceback
 import shlex
 import subprocess
 import sys
 import re
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stderr, redirect_stdout
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional, Tuple, Set
-from typing import Set
+from types import ModuleType
+from typing import IO, Any, Dict, List, Optional, Tuple, Set
 
 
 REPO_ROOT = Path(__file__).resolve().parent
 SCRIPTS_DIR = REPO_ROOT / "scripts"
 WINUSER_DIR = SCRIPTS_DIR / "winUser"
 
+sys.path.insert(0, str(SCRIPTS_DIR))  # brick_core
+from brick_core.cache import cached_parse  # noqa: E402
+
 
 @dataclass(frozen=True)
 class MenuItem:
@@ -94,18 +108,129 @@ def yes_no(prompt: str, default: bool = False) -> bool:
         return default
     return raw in ("y", "yes", "true", "1")
 
+# ---------- IN-PROCESS ENTRY POINTS ----------
+
+# script path -> imported module, or None if it must run as a subprocess
+_ENTRYPOINTS: Dict[Path, Optional[ModuleType]] = {}
+# Serializes imports between the menu and the pre-warm thread.
+_LOCK = threading.RLock()
+# One lock per script: a selection only waits for its own script's discovery.
+_FLAG_LOCKS: Dict[Path, threading.Lock] = {}
+
+
+def _parse_script(script_path: Path) -> Optional[ast.Module]:
+    try:
+        return ast.parse(script_path.read_text(encoding="utf-8"))
+    except (OSError, SyntaxError, UnicodeDecodeError):
+        return None
+
+
+def _defines_entrypoint(script_path: Path) -> bool:
+    """True if the script defines top-level build_parser() and main(argv)."""
+    tree = _parse_script(script_path)
+    if tree is None:
+        return False
+    funcs = {n.name: n for n in tree.body if isinstance(n, ast.FunctionDef)}
+    main = funcs.get("main")
+    return "build_parser" in funcs and main is not None and bool(main.args.args)
+
+
+def _uses_argparse(script_path: Path) -> bool:
+    """Scripts without argparse have no --flags (and may not stop at --help)."""
+    tree = _parse_script(script_path)
+    return tree is not None and any(
+        isinstance(n, ast.Import) and any(a.name == "argparse" for a in n.names)
+        or isinstance(n, ast.ImportFrom) and n.module == "argparse"
+        for n in ast.walk(tree)
+    )
+
+
+def load_entrypoint(script_path: Path) -> Optional[ModuleType]:
+    """
+    Import a builder script so it can run in-process.
+
+    Only scripts with build_parser() + main(argv) are imported (checked
+    without executing them, so OT-2 protocol files are never imported);
+    None means "use a subprocess", also when the import fails.
+    """
+    script_path = Path(script_path).resolve()
+    with _LOCK:
+        if script_path in _ENTRYPOINTS:
+            return _ENTRYPOINTS[script_path]
+        module = None
+        if _defines_entrypoint(script_path):
+            name = "ot2_menu_" + re.sub(r"\W", "_", script_path.stem)
+            spec = importlib.util.spec_from_file_location(name, script_path)
+            try:
+                module = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(module)
+            except Exception as e:  # missing dependency, broken script, ...
+                print(f"  (cannot import {script_path.name}: {e}; using a subprocess)")
+                module = None
+        _ENTRYPOINTS[script_path] = module
+        return module
+
+
+def parser_flags(parser) -> Set[str]:
+    """'--flag' option strings of an argparse parser."""
+    return {opt for action in parser._actions for opt in action.option_strings if opt.startswith("--")}
+
+
+# ---------- FLAG DISCOVERY (CACHED) ----------
+
+FLAGS_CACHE_KIND = "menu-flags.1"  # bump when discover_flags changes
+
+
+def discover_flags(script_path: Path) -> List[str]:
+    """Uncached: from the script's parser, else scraped from `--help` output."""
+    module = load_entrypoint(script_path)
+    if module is not None:
+        return sorted(parser_flags(module.build_parser()))
+    if not _uses_argparse(script_path):
+        return []
+    return sorted(scrape_help_flags(str(script_path)))
+
+
 def get_supported_flags(script_path: str) -> Set[str]:
+    """
+    '--flag' tokens the script accepts, cached under the user cache dir
+    (brick_core.cache) by script path + mtime + content hash. The shared
+    builder code in brick_core/ is part of the key, since most parsers
+    live there.
+    """
+    depends = sorted((SCRIPTS_DIR / "brick_core").glob("*.py"))
+    with _LOCK:
+        lock = _FLAG_LOCKS.setdefault(Path(script_path).resolve(), threading.Lock())
+    with lock:
+        return set(cached_parse(
+            FLAGS_CACHE_KIND, Path(script_path), discover_flags, content_hash=True, depends=depends
+        ))
+
+
+def scrape_help_flags(script_path: str) -> Set[str]:
     """Return set of '--flag' tokens present in `python script.py --help` output."""
     cmd = [sys.executable, script_path, "--help"]
-    p = subprocess.run(cmd, capture_output=True, text=True)
+    try:
+        p = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+    except subprocess.TimeoutExpired:
+        return set()
     help_text = (p.stdout or "") + "\n" + (p.stderr or "")
-    # flags = set()
-    # for token in help_text.replace(",", " ").split():
-    #     if token.startswith("--"):
-    #         # normalize tokens like "--output" and "--output=OUTPUT"
-    #         flags.add(token.split("=")[0])
     return set(re.findall(r"--[A-Za-z0-9][A-Za-z0-9\-]*", help_text))
 
+
+def prewarm_flags(items: List["MenuItem"]) -> threading.Thread:
+    """Fill the flag cache for every menu item in a background (daemon) thread."""
+    def warm() -> None:
+        for it in items:
+            try:
+                get_supported_flags(str(it.script_path))
+            except Exception:
+                pass  # discovered again (and reported) when the item is selected
+
+    thread = threading.Thread(target=warm, name="menu-flags-prewarm", daemon=True)
+    thread.start()
+    return thread
+
 def filter_args_by_supported_flags(all_args: List[str], supported: Set[str]) -> List[str]:
     """
     all_args is like ["--file","x","--outdir","output","--ascii7"]
@@ -138,13 +263,12 @@ def filter_args_by_supported_flags(all_args: List[str], supported: Set[str]) ->
 
 
 
-def discover_menu_items() -> List[MenuItem]:
+def discover_menu_items(prewarm: bool = True) -> List[MenuItem]:
     """
     Curated menu + fallback discovery.
     If files move, you only need to update these paths.
     """
     items: List[MenuItem] = []
-    print("Welcome to the OT-2 Protocol Generator Menu!")
     # Windows-friendly brickmix+SA entrypoint (per repo README note)
     win_bm_sa = WINUSER_DIR / "brickMixAndSAOT2.py"
     if win_bm_sa.exists():
@@ -198,6 +322,9 @@ def discover_menu_items() -> List[MenuItem]:
             notes="Auto-discovered"
         ))
 
+    # By the time the user has picked an item, its flags are usually cached.
+    if prewarm:
+        prewarm_flags(items)
     return items
 
 
@@ -296,14 +423,41 @@ def run_selected(selected: MenuItem, args: List[str]) -> int:
     return run_script(selected.script_path, args)
 
 
-def run_script(script_path: Path, args: List[str]) -> int:
+def run_script(script_path: Path, args: List[str], cwd: Path = REPO_ROOT) -> int:
+    module = load_entrypoint(script_path)
+    if module is not None:
+        return run_in_process(module, script_path, args, cwd)
+    return run_subprocess(script_path, args, cwd)
+
+
+def run_in_process(module: ModuleType, script_path: Path, args: List[str], cwd: Path = REPO_ROOT) -> int:
+    """main(args) in this interpreter, from `cwd` (the repo root) like the subprocess would."""
+    print(f"\nRunning (in-process):\n  {script_path.name} " + " ".join(shlex.quote(a) for a in args) + "\n")
+    previous = os.getcwd()
+    os.chdir(cwd)
+    try:
+        module.main(args)
+        return 0
+    except SystemExit as e:  # argparse errors, --help, explicit exits
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code)
+        return 1
+    except Exception:
+        traceback.print_exc()
+        return 1
+    finally:
+        os.chdir(previous)
+
+
+def run_subprocess(script_path: Path, args: List[str], cwd: Path = REPO_ROOT, log: Optional[IO[str]] = None) -> int:
     cmd = [python_executable(), str(script_path)] + args
-    print("\nRunning:\n  " + " ".join(shlex.quote(c) for c in cmd) + "\n")
+    print("\nRunning:\n  " + " ".join(shlex.quote(c) for c in cmd) + "\n", file=log or sys.stdout, flush=True)
     try:
-        completed = subprocess.run(cmd, cwd=str(REPO_ROOT))
+        completed = subprocess.run(cmd, cwd=str(cwd), stdout=log, stderr=subprocess.STDOUT if log else None)
         return completed.returncode
     except FileNotFoundError as e:
-        print(f"Error: {e}")
+        print(f"Error: {e}", file=log or sys.stdout)
         return 1
 
 def apply_outdir_fallback(args: List[str], supported: Set[str]) -> List[str]:
@@ -354,11 +508,200 @@ def apply_outdir_fallback(args: List[str], supported: Set[str]) -> List[str]:
     return args
 
 
-def main() -> int:
+# ---------- BATCH JOBS (--job) ----------
+
+
+@dataclass(frozen=True)
+class Job:
+    name: str
+    script_path: Path
+    args: Tuple[str, ...]
+
+
+def load_job_file(path: Path) -> Dict[str, Any]:
+    """
+    Read a .json or .yaml/.yml job file (YAML needs PyYAML):
+
+        workers: 4                      # optional, --workers overrides
+        defaults: {outdir: output, temp-vol: 10}
+        jobs:
+          - {name: epic, script: "2", word: Epic, params: {transfer-vol: 2}}
+          - {script: new_builder_07.py, file: data/x.bin, params: {ascii7: true}}
+
+    A bare list is taken as the jobs.
+    """
+    text = path.read_text(encoding="utf-8")
+    if path.suffix.lower() in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise SystemExit("YAML job files need PyYAML (pip install pyyaml); or use JSON.")
+        spec = yaml.safe_load(text)
+    else:
+        spec = json.loads(text)
+    if isinstance(spec, list):
+        spec = {"jobs": spec}
+    if not isinstance(spec, dict) or not isinstance(spec.get("jobs"), list):
+        raise SystemExit(f"{path}: expected a list of jobs or a mapping with a 'jobs' list.")
+    return spec
+
+
+def params_to_args(params: Dict[str, Any]) -> List[str]:
+    """{"transfer-vol": 2, "ascii7": True, "mix-vol": None} -> ["--transfer-vol", "2", "--ascii7"]"""
+    args: List[str] = []
+    for key, value in params.items():
+        flag = "--" + str(key).lstrip("-").replace("_", "-")
+        if value is None or value is False:
+            continue
+        if value is True:
+            args.append(flag)
+        else:
+            args += [flag, str(value)]
+    return args
+
+
+def resolve_script(ref: str, items: List[MenuItem], base: Path) -> Path:
+    """Menu key ("2"), path relative to the job file, or a script name under scripts/."""
+    ref = str(ref)
+    by_key = next((it.script_path for it in items if it.key == ref), None)
+    if by_key is not None:
+        return by_key
+    for candidate in (base / ref, SCRIPTS_DIR / ref):
+        if candidate.is_file():
+            return candidate.resolve()
+    matches = [it.script_path for it in items if it.script_path.name.lower() == Path(ref).name.lower()]
+    if matches:
+        return matches[0]
+    raise SystemExit(f"Unknown script {ref!r} (use a menu key or a file under scripts/).")
+
+
+def build_jobs(spec: Dict[str, Any], base: Path) -> List[Job]:
+    """
+    Turn the job file into argv lists. The job's own params are passed as
+    given; `defaults` are only passed to scripts that accept them (like the
+    interactive prompts).
+    """
+    items = discover_menu_items(prewarm=False)
+    defaults = spec.get("defaults") or {}
+    jobs: List[Job] = []
+    for n, entry in enumerate(spec["jobs"], start=1):
+        if "script" not in entry:
+            raise SystemExit(f"Job {n} has no 'script'.")
+        script = resolve_script(entry["script"], items, base)
+        supported = get_supported_flags(str(script))
+        inputs = {k: entry[k] for k in ("word", "file") if k in entry}
+        args = filter_args_by_supported_flags(params_to_args(defaults), supported)
+        args = params_to_args(inputs) + args + params_to_args(entry.get("params") or {})
+        args = apply_outdir_fallback(args, supported)
+        name = str(entry.get("name") or f"job{n:03d}_{script.stem}")
+        jobs.append(Job(name=name, script_path=script, args=tuple(args)))
+    if len({j.name for j in jobs}) != len(jobs):
+        raise SystemExit("Job names must be unique (they name the log files).")
+    return jobs
+
+
+def _run_job(job: Job, cwd: str, log_path: str) -> Dict[str, Any]:
+    """Worker-process side of run_jobs: one job, output captured in its log."""
+    start = time.perf_counter()
+    with open(log_path, "w", encoding="utf-8") as log:
+        module = None
+        with redirect_stdout(log), redirect_stderr(log):
+            module = load_entrypoint(job.script_path)
+            if module is not None:
+                code = run_in_process(module, job.script_path, list(job.args), Path(cwd))
+        if module is None:
+            code = run_subprocess(job.script_path, list(job.args), Path(cwd), log)
+    return {
+        "name": job.name,
+        "script": job.script_path.name,
+        "args": list(job.args),
+        "exit_code": code,
+        "seconds": round(time.perf_counter() - start, 3),
+        "log": log_path,
+    }
+
+
+def run_jobs(jobs: List[Job], workers: int, cwd: Path, log_dir: Path) -> List[Dict[str, Any]]:
+    """
+    Run jobs on a pool of `workers` processes; results in job order.
+
+    Builders run in-process inside the workers (one import per worker, no
+    interpreter start per job); other scripts get a subprocess. Paths in
+    the job file are relative to `cwd`.
+    """
+    log_dir.mkdir(parents=True, exist_ok=True)
+    results: Dict[str, Dict[str, Any]] = {}
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {
+            pool.submit(_run_job, job, str(cwd), str(log_dir / f"{job.name}.log")): job
+            for job in jobs
+        }
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:  # worker crashed
+                result = {"name": job.name, "script": job.script_path.name, "args": list(job.args),
+                          "exit_code": 1, "seconds": None, "log": None, "error": repr(e)}
+            status = "ok" if result["exit_code"] == 0 else f"FAILED ({result['exit_code']})"
+            print(f"  [{len(results) + 1}/{len(jobs)}] {job.name}: {status}")
+            results[job.name] = result
+    return [results[job.name] for job in jobs]
+
+
+def print_job_summary(results: List[Dict[str, Any]], wall_seconds: float) -> None:
+    width = max([len(r["name"]) for r in results] + [4])
+    print("\n=== Job summary ===")
+    print(f"{'job':<{width}}  {'script':<24} {'exit':>4} {'seconds':>8}")
+    for r in results:
+        secs = "-" if r["seconds"] is None else f"{r['seconds']:.2f}"
+        print(f"{r['name']:<{width}}  {r['script']:<24} {r['exit_code']:>4} {secs:>8}")
+    failed = sum(r["exit_code"] != 0 for r in results)
+    print(f"{len(results) - failed} ok, {failed} failed, {wall_seconds:.2f} s wall time")
+
+
+def run_job_file(path: Path, workers: Optional[int] = None, summary: Optional[Path] = None) -> int:
+    """--job mode: 0 if every job succeeded, else 1."""
+    path = path.resolve()
+    spec = load_job_file(path)
+    jobs = build_jobs(spec, path.parent)
+    workers = workers or int(spec.get("workers") or os.cpu_count() or 1)
+    workers = min(workers, len(jobs)) or 1
+    print(f"Running {len(jobs)} job(s) from {path.name} on {workers} worker(s)")
+
+    start = time.perf_counter()
+    results = run_jobs(jobs, workers, path.parent, path.parent / f"{path.stem}.logs")
+    wall = time.perf_counter() - start
+    print_job_summary(results, wall)
+
+    report = {"job_file": str(path), "workers": workers, "wall_seconds": round(wall, 3), "jobs": results}
+    summary = summary or path.parent / f"{path.stem}.summary.json"
+    summary.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Summary: {summary}")
+    return 0 if all(r["exit_code"] == 0 for r in results) else 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Interactive menu for the OT-2 protocol generators, or batch mode with --job."
+    )
+    parser.add_argument("--job", type=Path, help="Run the jobs in a .json/.yaml job file instead of the menu.")
+    parser.add_argument("--workers", type=int, default=None, help="Parallel jobs (default: job file, else CPU count).")
+    parser.add_argument("--summary", type=Path, default=None,
+                        help="Summary report path (default: <jobfile>.summary.json).")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
     if not SCRIPTS_DIR.exists():
         print(f"Error: scripts/ folder not found at {SCRIPTS_DIR}")
         return 2
 
+    opts = build_parser().parse_args(argv)
+    if opts.job is not None:
+        return run_job_file(opts.job, opts.workers, opts.summary)
+
+    print("Welcome to the OT-2 Protocol Generator Menu!")
     items = discover_menu_items()
     if not items:
         print("No runnable scripts found under scripts/.")
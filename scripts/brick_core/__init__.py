@@ -0,0 +1,43 @@
+"""
+Shared core of the OT-2 brick-mix builders: encoding, layout, protocol
+rendering and readout decoding. The scripts in scripts/ are thin CLIs
+over this package.
+"""
+
+from .encoding import (
+    BLOCK_SIZE,
+    bitstring_to_blocks,
+    file_num_bits,
+    file_to_bitstring,
+    iter_file_blocks,
+    word_to_bitstring,
+)
+from .layout import (
+    BLOCKS_PER_PLATE,
+    BM_LAYOUT,
+    BM_SA_LAYOUT,
+    DeckLayout,
+    brick_source_well,
+    dest_well_name,
+    modified_bricks,
+)
+from .render import build_bm_protocol, build_bm_sa_protocol, build_sa_protocol
+
+__all__ = [
+    "BLOCK_SIZE",
+    "BLOCKS_PER_PLATE",
+    "BM_LAYOUT",
+    "BM_SA_LAYOUT",
+    "DeckLayout",
+    "bitstring_to_blocks",
+    "brick_source_well",
+    "build_bm_protocol",
+    "build_bm_sa_protocol",
+    "build_sa_protocol",
+    "dest_well_name",
+    "file_num_bits",
+    "file_to_bitstring",
+    "iter_file_blocks",
+    "modified_bricks",
+    "word_to_bitstring",
+]
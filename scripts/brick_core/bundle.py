@@ -0,0 +1,169 @@
+"""
+ARCHIVE OUTPUT FOR SHARD SETS
+
+Writes every file of a sharded run (protocols, manifest + index, loading
+sheets, plan) into one .zip / .tar.gz / .tar.xz instead of hundreds of
+loose files. Members are streamed through a spooled buffer (RAM up to
+SPOOL_BYTES, then a temp file), so memory stays flat however many shards
+there are; the archive itself goes through atomic_write.
+
+Deduplication (tar only): a member with the same bytes as an earlier one
+is stored as a hard link to it. zip has no links, so every member is
+stored in full and repeats are only marked (same_as) in the index; a plain
+unzip then still restores every file. The generated protocols share most
+of their text, which the solid tar compressors (gzip/xz over the whole
+stream) remove as well; zip compresses each member on its own.
+
+The last member, bundle-index.json, lists every member with its size and
+sha256 (and the member it duplicates); verify_bundle checks an archive
+against it.
+"""
+
+import hashlib
+import io
+import json
+import shutil
+import tarfile
+import tempfile
+import time
+import zipfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator
+
+from .output import atomic_write
+
+BUNDLE_FORMATS = {"zip": ".zip", "tar.gz": ".tar.gz", "tar.xz": ".tar.xz"}
+INDEX_MEMBER = "bundle-index.json"
+SPOOL_BYTES = 1 << 20
+
+
+def bundle_path(output_py: Path, fmt: str) -> Path:
+    """<output stem><ext>, next to where the protocol would have gone."""
+    return output_py.with_name(output_py.stem + BUNDLE_FORMATS[fmt])
+
+
+class _MemberText(io.TextIOWrapper):
+    """Text stream of one archive member; .name is the member name."""
+
+    def __init__(self, buffer, member: str):
+        super().__init__(buffer, encoding="utf-8", newline="")
+        self._member = member
+
+    @property
+    def name(self) -> str:
+        return self._member
+
+
+class BundleWriter:
+    """
+    with BundleWriter(path, "zip") as bundle:
+        with bundle.member("BRICK_MIX_x_part001.py") as fh:
+            fh.write(...)
+    """
+
+    def __init__(self, path: Path, fmt: str):
+        if fmt not in BUNDLE_FORMATS:
+            raise ValueError(f"Unknown bundle format: {fmt}")
+        self.path = Path(path)
+        self.fmt = fmt
+        self.members: list[dict] = []
+        self._first: dict[str, str] = {}  # sha256 -> first member with that content
+        self._output = None
+
+    def __enter__(self) -> "BundleWriter":
+        self._output = atomic_write(self.path, "wb")
+        fh = self._output.__enter__()
+        if self.fmt == "zip":
+            self._archive = zipfile.ZipFile(fh, "w", compression=zipfile.ZIP_DEFLATED)
+        else:
+            self._archive = tarfile.open(fileobj=fh, mode="w:" + self.fmt.split(".")[1])
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        try:
+            if exc_type is None:
+                index = {"format": "brick-mix-bundle", "version": 1, "members": self.members}
+                self._store(INDEX_MEMBER, json.dumps(index, indent=1).encode("utf-8"))
+            self._archive.close()
+        finally:
+            result = self._output.__exit__(exc_type, exc, tb)
+        return bool(result)
+
+    @contextmanager
+    def member(self, name: str) -> Iterator[IO[str]]:
+        """Text stream for one member; it is added to the archive on exit."""
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES) as buf:
+            text = _MemberText(buf, name)
+            yield text
+            text.flush()
+            text.detach()
+            self._add(name, buf)
+
+    def add_text(self, name: str, text: str) -> None:
+        with self.member(name) as fh:
+            fh.write(text)
+
+    def _add(self, name: str, buf: IO[bytes]) -> None:
+        size = buf.tell()
+        buf.seek(0)
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: buf.read(1 << 16), b""):
+            digest.update(chunk)
+        sha = digest.hexdigest()
+        entry = {"name": name, "size": size, "sha256": sha}
+        first = self._first.setdefault(sha, name)
+        if first != name:
+            entry["same_as"] = first
+        self.members.append(entry)
+
+        buf.seek(0)
+        if self.fmt == "zip":
+            with self._archive.open(name, "w", force_zip64=size > 0x7FFFFFFF) as out:
+                shutil.copyfileobj(buf, out)
+        elif first != name:
+            info = tarfile.TarInfo(name)
+            info.type, info.linkname, info.mtime = tarfile.LNKTYPE, first, time.time()
+            self._archive.addfile(info)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size, info.mtime, info.mode = size, time.time(), 0o644
+            self._archive.addfile(info, buf)
+
+    def _store(self, name: str, data: bytes) -> None:
+        if self.fmt == "zip":
+            self._archive.writestr(name, data)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size, info.mtime, info.mode = len(data), time.time(), 0o644
+            self._archive.addfile(info, io.BytesIO(data))
+
+
+def _open_members(path: Path) -> Iterator[tuple[str, IO[bytes]]]:
+    """(name, binary stream) for every regular member (and tar hard link)."""
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as zf:
+            for name in zf.namelist():
+                with zf.open(name) as fh:
+                    yield name, fh
+        return
+    with tarfile.open(path) as tf:
+        for info in tf:
+            if info.isfile() or info.islnk():
+                yield info.name, tf.extractfile(info)
+
+
+def verify_bundle(path: Path) -> list[str]:
+    """Members that are missing or whose sha256 differs from bundle-index.json."""
+    digests, index = {}, None
+    for name, fh in _open_members(Path(path)):
+        if name == INDEX_MEMBER:
+            index = json.load(fh)
+            continue
+        h = hashlib.sha256()
+        for chunk in iter(lambda: fh.read(1 << 16), b""):
+            h.update(chunk)
+        digests[name] = h.hexdigest()
+    if index is None:
+        return [INDEX_MEMBER]
+    return [e["name"] for e in index["members"] if digests.get(e["name"]) != e["sha256"]]
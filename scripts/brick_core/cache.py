@@ -0,0 +1,111 @@
+"""
+PERSISTENT PARSE CACHE
+
+Results of parsing an input file (e.g. the 263 KB Protocol Designer
+template) are pickled under the user cache directory and reused while the
+file's path, mtime and size are unchanged. Cached values must be plain
+builtins (str, bytes, dict, list, tuple, ...) so a pickle stays loadable
+whichever way brick_core was imported.
+
+The cache is best-effort: unreadable, stale or unwritable entries just
+mean the file is parsed again.
+"""
+
+import hashlib
+import os
+import pickle
+import sys
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+from .output import atomic_write
+
+CACHE_ENV = "BRICK_MIX_CACHE_DIR"  # overrides the cache location
+CACHE_VERSION = 1  # bump when a cached layout changes
+
+# In-process layer: repeated builds in one run skip even the pickle load.
+_memory: dict[tuple, Any] = {}
+
+
+def cache_dir() -> Path:
+    """$BRICK_MIX_CACHE_DIR, else the platform's per-user cache directory."""
+    override = os.environ.get(CACHE_ENV)
+    if override:
+        return Path(override)
+    if sys.platform == "win32":
+        base = Path(os.environ.get("LOCALAPPDATA", Path.home() / "AppData" / "Local"))
+    elif sys.platform == "darwin":
+        base = Path.home() / "Library" / "Caches"
+    else:
+        base = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+    return base / "ot2-brick-mix"
+
+
+def file_key(path: Path) -> tuple[str, int, int]:
+    """(resolved path, mtime in ns, size): changes whenever the file is edited."""
+    path = Path(path).resolve()
+    st = path.stat()
+    return str(path), st.st_mtime_ns, st.st_size
+
+
+def _entry_path(kind: str, path_str: str) -> Path:
+    digest = hashlib.sha1(path_str.encode("utf-8")).hexdigest()[:16]
+    return cache_dir() / f"{kind}-{digest}.pickle"
+
+
+def _read_entry(entry: Path, key: tuple) -> tuple[bool, Any]:
+    try:
+        with entry.open("rb") as fh:
+            stored_key, value = pickle.load(fh)
+    except (OSError, EOFError, ValueError, TypeError, pickle.UnpicklingError):
+        return False, None
+    return stored_key == key, value
+
+
+def _write_entry(entry: Path, key: tuple, value: Any) -> None:
+    try:
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        with atomic_write(entry, "wb") as fh:
+            pickle.dump((key, value), fh, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        pass  # read-only home, ...: just don't cache
+
+
+def file_digest(path: Path) -> str:
+    """sha1 of the file's bytes (for files whose mtime may not change on edit)."""
+    return hashlib.sha1(Path(path).read_bytes()).hexdigest()
+
+
+def cached_parse(
+    kind: str,
+    path: Path,
+    parse: Callable[[Path], Any],
+    content_hash: bool = False,
+    depends: Iterable[Path] = (),
+) -> Any:
+    """
+    parse(path), cached per (kind, path, mtime, size) in memory and on disk.
+
+    kind names the parser (one cache entry per kind and file).
+    content_hash also keys on the file's sha1; depends lists further files
+    (e.g. imported modules) whose edits invalidate the entry.
+    """
+    key = (kind, CACHE_VERSION, *file_key(path))
+    if content_hash:
+        key += (file_digest(path),)
+    key += tuple(file_key(p) for p in depends)
+    if key in _memory:
+        return _memory[key]
+
+    entry = _entry_path(kind, key[2])
+    hit, value = _read_entry(entry, key)
+    if not hit:
+        value = parse(Path(path))
+        _write_entry(entry, key, value)
+    _memory[key] = value
+    return value
+
+
+def clear_memory() -> None:
+    """Drop the in-process layer (tests, long-running processes)."""
+    _memory.clear()
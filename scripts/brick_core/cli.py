@@ -0,0 +1,578 @@
+"""
+ARGUMENT PARSING + RUNNERS SHARED BY THE BUILDER SCRIPTS
+
+Each script in scripts/ is a thin wrapper: it builds its parser here and
+hands the parsed args to the matching run_* function. Parsers are exposed
+separately so callers (e.g. the menu runner) can introspect the flags.
+"""
+
+import argparse
+import json
+import time
+from itertools import islice
+from pathlib import Path
+from typing import Iterator
+
+from .bundle import BUNDLE_FORMATS, BundleWriter, bundle_path
+from .decode import build_manifest, dump_index, dump_manifest, index_name, write_manifest
+from .encoding import BLOCK_SIZE, bitstring_to_blocks, file_num_bits, iter_file_blocks, word_to_bitstring
+from .layout import BLOCKS_PER_PLATE, BM_LAYOUT, BM_SA_LAYOUT
+from .metrics import Registry
+from .output import atomic_write
+from .plan import format_duration, plan_run, write_loading_sheet
+from .render import (
+    BLOCKS_FORMATS,
+    build_bm_protocol,
+    build_bm_sa_protocol,
+    build_pcr_protocol,
+    build_sa_protocol,
+    pcr_profile_seconds,
+)
+
+# Where the original lab machine keeps generated protocols (WSL path).
+LAB_OUTDIR = Path(r"/mnt/c/Users/franc/Desktop/OT-2_protocols/BRICK MIX PROTOCOLS")
+
+
+# ---------- PARSER PIECES ----------
+
+
+def add_brick_handling_args(parser: argparse.ArgumentParser) -> None:
+    """Transfer / stock / mixing / aspiration options of the brick-mix stage."""
+    parser.add_argument(
+        "--transfer-vol",
+        type=float,
+        default=2.0,
+        help="Transfer volume per brick in µL (default: 2.0).",
+    )
+    parser.add_argument(
+        "--brick-stock",
+        type=float,
+        default=None,
+        help=(
+            "Initial stock volume per brick well in µL. "
+            "If omitted, defaults to transfer_vol * 15 + 5."
+        ),
+    )
+    parser.add_argument(
+        "--mix-times",
+        type=int,
+        default=0,
+        help="Number of pre-aspiration mixing cycles for bricks (default: 0).",
+    )
+    parser.add_argument(
+        "--mix-vol",
+        type=float,
+        default=None,
+        help="Brick pre-mix volume in µL (default: None → use transfer volume).",
+    )
+    parser.add_argument(
+        "--asp-flow",
+        type=float,
+        default=None,
+        help="Aspirate flow rate in µL/s (default: None → instrument default).",
+    )
+    parser.add_argument(
+        "--asp-depth",
+        type=float,
+        default=None,
+        help="Aspirate depth from bottom in mm (default: None → 1.0 mm).",
+    )
+
+
+def add_blocks_format_args(parser: argparse.ArgumentParser) -> None:
+    """How the block table is embedded in the generated protocol."""
+    parser.add_argument(
+        "--blocks-format",
+        choices=BLOCKS_FORMATS,
+        default="strings",
+        help=(
+            "Embed blocks as readable 36-character strings (default), one hex int "
+            "per block, or a single base64 blob; compact forms are unpacked once "
+            "at the start of run()."
+        ),
+    )
+    parser.add_argument(
+        "--blocks-comment",
+        action="store_true",
+        help="With a compact --blocks-format, also list every block as a '0'/'1' comment.",
+    )
+
+
+def add_temp_vol_arg(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--temp-vol",
+        type=float,
+        required=True,
+        help="Template DNA volume per reaction in µL (1 µL BM + temp + buffer = 20 µL total).",
+    )
+
+
+def add_outdir_arg(parser: argparse.ArgumentParser, default: str | None) -> None:
+    if default is None:
+        help_text = "Output directory for generated protocol files (overrides built-in default path)."
+    else:
+        help_text = f"Output directory for generated protocol files (default: ./{default})."
+    parser.add_argument("--outdir", type=str, default=default, help=help_text)
+
+
+def add_metrics_arg(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--metrics",
+        metavar="FILE",
+        default=None,
+        help=(
+            "Also write build metrics (blocks, tips planned, estimated run time, "
+            "generation time) to FILE in Prometheus text format, e.g. for "
+            "node_exporter's textfile collector (*.prom)."
+        ),
+    )
+
+
+def write_build_metrics(
+    path: Path,
+    builder: str,
+    output: Path,
+    num_blocks: int,
+    protocols: int,
+    plans: list[dict],
+    seconds: float,
+    tips: int | None = None,
+    estimate_s: float | None = None,
+) -> None:
+    """
+    One build's metrics, labelled with the builder (bm_sa/bm/sa/pd/pcr) and its output file.
+    Tips and estimated run time come from the plans; builders without a plan model
+    pass them directly (None leaves the series out).
+    """
+    if plans:
+        tips = sum(p["tips"] for p in plans)
+        estimate_s = sum(p["estimate_s"]["total"] for p in plans)
+    registry, labels = Registry(), {"builder": builder, "output": output.name}
+    registry.gauge("brick_build_blocks", "Blocks encoded by the build.").set(num_blocks, **labels)
+    registry.gauge("brick_build_protocols", "Protocol files written by the build.").set(protocols, **labels)
+    if tips is not None:
+        registry.gauge("brick_build_tips_planned", "Tips the generated protocols will use.").set(tips, **labels)
+    if estimate_s is not None:
+        registry.gauge("brick_build_estimated_runtime_seconds",
+                       "Planned robot time of the generated protocols.").set(estimate_s, **labels)
+    registry.gauge("brick_build_generation_seconds", "Wall time spent generating the protocols.").set(
+        round(seconds, 6), **labels)
+    registry.gauge("brick_build_timestamp_seconds", "When the build finished (Unix time).").set(
+        round(time.time(), 3), **labels)
+    registry.write_textfile(path)
+    print(f"  Metrics: {path}")
+
+
+def output_path(args: argparse.Namespace, default_name: str, fallback_dir: Path) -> Path:
+    """Resolve --output/--outdir into the protocol path, creating the directory."""
+    filename = args.output or default_name
+    # if user didn't add .py this ensures the .py extension
+    if not filename.lower().endswith(".py"):
+        filename += ".py"
+    output_dir = Path(args.outdir).resolve() if getattr(args, "outdir", None) else fallback_dir
+    output_dir.mkdir(parents=True, exist_ok=True)
+    return (output_dir / filename).resolve()
+
+
+def read_input_file(path_arg: str, ascii7: bool) -> tuple[Path, Iterator[str], int]:
+    """The input's blocks, streamed from the file a chunk at a time, and its bit count."""
+    data_path = Path(path_arg).resolve()
+    if not data_path.is_file():
+        raise SystemExit(f"Input file not found: {data_path}")
+    num_bits = file_num_bits(data_path, ascii7=ascii7)
+    return data_path, iter_file_blocks(data_path, ascii7=ascii7), num_bits
+
+
+# ---------- BRICK MIX + SA ----------
+
+
+def bm_sa_parser(outdir_default: str | None = None) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Build a multi-block OT-2 protocol that encodes a word OR file "
+            "into DNA brick mixes (36 bits per block) and sets up self-assembly reactions."
+        )
+    )
+    parser.add_argument(
+        "--word",
+        "-w",
+        help="Literal word/string to encode (mutually exclusive with --file).",
+    )
+    parser.add_argument(
+        "--file",
+        "-f",
+        help="Path to the input data file to encode (mutually exclusive with --word).",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        help="Output protocol filename (default: BRICK_MIX_<WORD>.py or BRICK_MIX_<FILENAME>.py).",
+    )
+    add_outdir_arg(parser, outdir_default)
+    add_brick_handling_args(parser)
+    parser.add_argument(
+        "--ascii7",
+        action="store_true",
+        help=(
+            "For FILE: interpret as text and encode each character as 7-bit ASCII. "
+            "Default is binary-safe 8 bits per byte.\n"
+            "For WORD: if set, use 7-bit ASCII per character (default); "
+            "if not set, encode the word as UTF-8 bytes (8 bits per byte)."
+        ),
+    )
+    add_temp_vol_arg(parser)
+    add_blocks_format_args(parser)
+    add_metrics_arg(parser)
+    parser.add_argument(
+        "--shard-blocks",
+        type=int,
+        default=None,
+        help=(
+            f"Split the input into several protocols of at most this many blocks "
+            f"(max {BLOCKS_PER_PLATE}, one brick-mix rack each). Implies --manifest."
+        ),
+    )
+    parser.add_argument(
+        "--manifest",
+        action="store_true",
+        help=(
+            "Also write <output>.manifest.json (encoding, unpadded bit count, shards) "
+            "and <output>.index.json mapping (shard, plate, well) to byte ranges, "
+            "so decode_blocks.py can reconstruct the input exactly."
+        ),
+    )
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help=(
+            "Also write <output>.plan.json: the pauses and time estimates of each "
+            "protocol (watchdog.py --plans uses it to poll faster before a pause)."
+        ),
+    )
+    parser.add_argument(
+        "--bundle",
+        choices=tuple(BUNDLE_FORMATS),
+        default=None,
+        help=(
+            "Write all shards, the manifest + index, a loading sheet per shard and "
+            "the run plan (pauses, time estimates) into one <output>.zip/.tar.gz/.tar.xz "
+            "with a sha256 index, instead of loose files."
+        ),
+    )
+    return parser
+
+
+def run_bm_sa(args: argparse.Namespace, fallback_dir: Path = LAB_OUTDIR) -> list[Path]:
+    """Build the BM + SA protocol(s) for parsed args; returns the protocol paths."""
+    started = time.perf_counter()
+    # Enforce: exactly one of --word or --file
+    if args.word and args.file:
+        raise SystemExit("Please use EITHER --word OR --file, not both.")
+    if not args.word and not args.file:
+        raise SystemExit("You must provide either --word or --file.")
+
+    # Words are always packed as 7-bit ASCII.
+    ascii7 = True if args.word else args.ascii7
+    if args.word:
+        bits = word_to_bitstring(args.word, ascii7=True)
+        blocks, num_bits = iter(bitstring_to_blocks(bits, block_size=BLOCK_SIZE)), len(bits)
+        source_label = args.word
+    else:
+        data_path, blocks, num_bits = read_input_file(args.file, ascii7)
+        source_label = data_path.name
+
+    num_blocks = -(-num_bits // BLOCK_SIZE)
+    if args.shard_blocks is not None and not 1 <= args.shard_blocks <= BLOCKS_PER_PLATE:
+        raise SystemExit(f"--shard-blocks must be between 1 and {BLOCKS_PER_PLATE}.")
+
+    stem = source_label.replace(" ", "_")
+    output_py = output_path(args, f"BRICK_MIX_{stem}.py", fallback_dir)
+
+    # Split into shards of at most --shard-blocks blocks (one protocol each);
+    # each shard is read from the input, streamed to disk and released before
+    # the next, so only one shard's blocks are ever in memory.
+    shard_size = args.shard_blocks or num_blocks
+    num_shards = -(-num_blocks // shard_size)
+    bundle = getattr(args, "bundle", None)
+    if bundle:
+        with BundleWriter(bundle_path(output_py, bundle), bundle) as archive:
+            _, plans = _write_shards(args, blocks, shard_size, num_shards, source_label, ascii7, num_bits,
+                                     output_py, archive)
+        print(f"  Bundle: {archive.path} ({len(archive.members)} files)")
+        written = [archive.path]
+    else:
+        written, plans = _write_shards(args, blocks, shard_size, num_shards, source_label, ascii7, num_bits,
+                                       output_py, None)
+    if getattr(args, "metrics", None):
+        write_build_metrics(Path(args.metrics), "bm_sa", output_py, num_blocks, num_shards, plans,
+                            time.perf_counter() - started)
+    return written
+
+
+def _write_shards(
+    args: argparse.Namespace,
+    blocks: Iterator[str],
+    shard_size: int,
+    num_shards: int,
+    source_label: str,
+    ascii7: bool,
+    num_bits: int,
+    output_py: Path,
+    archive: BundleWriter | None,
+) -> tuple[list[Path], list[dict]]:
+    """
+    Protocols (+ manifest, plan) as files, or (+ plan, loading sheets) into
+    an archive. Returns the protocol paths and the shards' plans (planned
+    when they are written, or for --metrics).
+    """
+    written, shard_sizes, plans = [], [], []
+    write_plan = archive is not None or getattr(args, "plan", False)
+    for n in range(1, num_shards + 1):
+        shard_blocks = list(islice(blocks, shard_size))
+        if num_shards == 1:
+            shard_py, shard_label = output_py, source_label
+        else:
+            shard_py = output_py.with_name(f"{output_py.stem}_part{n:03d}{output_py.suffix}")
+            shard_label = f"{source_label} part {n}/{num_shards}"
+        build = dict(
+            source_label=shard_label,
+            blocks=shard_blocks,
+            transfer_vol=args.transfer_vol,
+            brick_stock=args.brick_stock,
+            mix_times=args.mix_times,
+            mix_vol=args.mix_vol,
+            asp_flow=args.asp_flow,
+            asp_depth=args.asp_depth,
+            temp_vol=args.temp_vol,
+            blocks_format=args.blocks_format,
+            blocks_comment=args.blocks_comment,
+        )
+        if archive is None:
+            build_bm_sa_protocol(output_py=shard_py, **build)
+        else:
+            with archive.member(shard_py.name) as fh:
+                build_bm_sa_protocol(output_py=fh, **build)
+        if write_plan or getattr(args, "metrics", None):
+            plan = plan_run(shard_blocks, BM_SA_LAYOUT, args.transfer_vol, args.brick_stock,
+                            args.mix_times, args.temp_vol)
+            plans.append({"protocol": shard_py.name, **plan})
+        if archive is not None:
+            with archive.member(shard_py.stem + ".loading.csv") as fh:
+                write_loading_sheet(fh, plan)
+        written.append(shard_py)
+        shard_sizes.append(len(shard_blocks))
+
+    if args.manifest or num_shards > 1 or archive is not None:
+        manifest = build_manifest(
+            source_label,
+            ascii7,
+            num_bits,
+            [(p.name, size) for p, size in zip(written, shard_sizes)],
+        )
+        manifest_path = output_py.with_suffix(".manifest.json")
+        if archive is None:
+            index_path = write_manifest(manifest, manifest_path)
+        else:
+            index_path = manifest_path.with_name(index_name(manifest_path.name))
+            with archive.member(manifest_path.name) as fh:
+                dump_manifest(manifest, fh)
+            with archive.member(index_path.name) as fh:
+                dump_index(manifest, fh)
+        print(f"  Manifest: {manifest_path.name if archive else manifest_path}")
+        print(f"  Index: {index_path.name if archive else index_path}")
+
+    if write_plan:
+        total = sum(p["estimate_s"]["total"] for p in plans)
+        plan_path = output_py.with_name(output_py.stem + ".plan.json")
+        with archive.member(plan_path.name) if archive else atomic_write(plan_path) as fh:
+            json.dump({"shards": plans, "estimate_s": total}, fh, indent=1)
+        if archive is None:
+            print(f"  Plan: {plan_path}")
+        print(f"  Estimated robot time: {format_duration(total)} over {len(plans)} run(s)")
+    return written, plans
+
+
+# ---------- BRICK MIX ONLY ----------
+
+
+def bm_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Build a multi-block OT-2 protocol that encodes an arbitrary file "
+            "into DNA brick mixes (36 bits per block)."
+        )
+    )
+    parser.add_argument(
+        "--file",
+        "-f",
+        required=True,
+        help="Path to the input data file to encode.",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        help="Output .py protocol filename (default: BRICK_MIX_<FILENAME>.py).",
+    )
+    add_outdir_arg(parser, None)
+    add_brick_handling_args(parser)
+    parser.add_argument(
+        "--ascii7",
+        action="store_true",
+        help=(
+            "Interpret the file as text and encode each character as 7-bit ASCII. "
+            "Default is binary-safe 8 bits per byte."
+        ),
+    )
+    add_blocks_format_args(parser)
+    add_metrics_arg(parser)
+    return parser
+
+
+def run_bm(args: argparse.Namespace, fallback_dir: Path = LAB_OUTDIR) -> list[Path]:
+    started = time.perf_counter()
+    data_path, blocks, _ = read_input_file(args.file, args.ascii7)
+    blocks = list(blocks)  # one protocol: all blocks, but never the whole bitstring
+    stem = data_path.name.replace(" ", "_")
+    output_py = output_path(args, f"BRICK_MIX_{stem}.py", fallback_dir)
+    build_bm_protocol(
+        source_label=data_path.name,
+        blocks=blocks,
+        output_py=output_py,
+        transfer_vol=args.transfer_vol,
+        brick_stock=args.brick_stock,
+        mix_times=args.mix_times,
+        mix_vol=args.mix_vol,
+        asp_flow=args.asp_flow,
+        asp_depth=args.asp_depth,
+        blocks_format=args.blocks_format,
+        blocks_comment=args.blocks_comment,
+    )
+    if getattr(args, "metrics", None):
+        plan = plan_run(blocks, BM_LAYOUT, args.transfer_vol, args.brick_stock, args.mix_times)
+        write_build_metrics(Path(args.metrics), "bm", output_py, len(blocks), 1, [plan],
+                            time.perf_counter() - started)
+    return [output_py]
+
+
+# ---------- SELF-ASSEMBLY ONLY ----------
+
+
+def sa_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Build a self-assembly-only OT-2 protocol that uses pre-made brick mixes."
+        )
+    )
+    parser.add_argument(
+        "--file",
+        "-f",
+        required=True,
+        help="Path to the SAME data file used for brick-mix generation.",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        help="Output .py protocol filename (default: SA_<FILENAME>.py).",
+    )
+    parser.add_argument(
+        "--ascii7",
+        action="store_true",
+        help=(
+            "Interpret the file as text and encode each character as 7-bit ASCII. "
+            "Must match the choice you used for brick-mix generation."
+        ),
+    )
+    add_temp_vol_arg(parser)
+    add_outdir_arg(parser, None)
+    add_metrics_arg(parser)
+    return parser
+
+
+def run_sa(args: argparse.Namespace, fallback_dir: Path = LAB_OUTDIR) -> list[Path]:
+    started = time.perf_counter()
+    data_path, blocks, _ = read_input_file(args.file, args.ascii7)
+    blocks = list(blocks)  # one protocol: all blocks, but never the whole bitstring
+    stem = data_path.name.replace(" ", "_")
+    output_py = output_path(args, f"SA_{stem}.py", fallback_dir)
+    build_sa_protocol(
+        source_label=data_path.name,
+        blocks=blocks,
+        output_py=output_py,
+        temp_vol=args.temp_vol,
+    )
+    if getattr(args, "metrics", None):  # no plan model for SA-only runs: blocks and timing only
+        write_build_metrics(Path(args.metrics), "sa", output_py, len(blocks), 1, [],
+                            time.perf_counter() - started)
+    return [output_py]
+
+
+# ---------- ASYMMETRIC PCR ----------
+
+
+def _add_step_args(parser: argparse.ArgumentParser, name: str, what: str, temp: float, seconds: float,
+                   optional: bool = False) -> None:
+    parser.add_argument(f"--{name}-temp", type=float, default=temp,
+                        help=f"{what} temperature in °C (default: {temp:g}).")
+    skip = " 0 skips the step." if optional else ""
+    parser.add_argument(f"--{name}-time", type=float, default=seconds,
+                        help=f"{what} hold time in seconds (default: {seconds:g}).{skip}")
+
+
+def pcr_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Build an asymmetric PCR thermocycler protocol. The cycle loop runs as one "
+            "profile with repetitions=CYCLES (defaults: the lab's 30-cycle program)."
+        )
+    )
+    parser.add_argument("--cycles", type=int, default=30, help="Number of PCR cycles (default: 30).")
+    _add_step_args(parser, "initial", "Initial denaturation", 94, 300, optional=True)
+    _add_step_args(parser, "denature", "Denaturation (each cycle)", 94, 30)
+    _add_step_args(parser, "anneal", "Annealing (each cycle)", 60, 30)
+    _add_step_args(parser, "extend", "Extension (each cycle)", 72, 60)
+    _add_step_args(parser, "final", "Final extension", 75, 600, optional=True)
+    hold = parser.add_mutually_exclusive_group()
+    hold.add_argument("--hold-temp", type=float, default=25.0,
+                      help="Block temperature held after the program in °C (default: 25).")
+    hold.add_argument("--no-hold", action="store_true",
+                      help="Turn the block off after the program instead of holding it.")
+    parser.add_argument("--volume", type=float, default=50.0,
+                        help="Reaction volume per well in µL (block_max_volume, default: 50).")
+    parser.add_argument("--lid-temp", type=float, default=103.0,
+                        help="Heated lid temperature in °C (default: 103).")
+    parser.add_argument(
+        "--output",
+        "-o",
+        help="Output .py protocol filename (default: ASYM_PCR_<CYCLES>cycles.py).",
+    )
+    add_outdir_arg(parser, None)
+    add_metrics_arg(parser)
+    return parser
+
+
+def run_pcr(args: argparse.Namespace, fallback_dir: Path = LAB_OUTDIR) -> list[Path]:
+    started = time.perf_counter()
+    cycle = [(args.denature_temp, args.denature_time), (args.anneal_temp, args.anneal_time),
+             (args.extend_temp, args.extend_time)]
+    initial = (args.initial_temp, args.initial_time) if args.initial_time else None
+    final = (args.final_temp, args.final_time) if args.final_time else None
+    output_py = output_path(args, f"ASYM_PCR_{args.cycles}cycles.py", fallback_dir)
+    try:
+        build_pcr_protocol(
+            output_py,
+            cycle=cycle,
+            cycles=args.cycles,
+            initial=initial,
+            final=final,
+            hold_temp=None if args.no_hold else args.hold_temp,
+            volume=args.volume,
+            lid_temp=args.lid_temp,
+        )
+    except ValueError as exc:
+        raise SystemExit(str(exc)) from None
+    holds = pcr_profile_seconds(cycle, args.cycles, initial, final)
+    print(f"  Hold time: {format_duration(holds)} (plus block ramps)")
+    if getattr(args, "metrics", None):  # thermocycler only: no blocks or tips, hold time as the estimate
+        write_build_metrics(Path(args.metrics), "pcr", output_py, 0, 1, [],
+                            time.perf_counter() - started, tips=0, estimate_s=holds)
+    return [output_py]
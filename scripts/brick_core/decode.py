@@ -0,0 +1,450 @@
+"""
+BLOCK READOUTS → ORIGINAL BYTES
+
+A readout lists, for every brick mix, which of bricks 2..37 were MOD:
+bit i (0-based) -> brick (i + 2), exactly as the builders lay them out.
+Readouts can be given as CSV, JSON or plain bitstrings, and a manifest
+written by the builders (--manifest) records how the bits were packed
+so padding, 7-bit ASCII packing and compression can be undone.
+
+Decoding is streamed a chunk of blocks at a time, so memory use does not
+grow with the size of the archive being verified.
+"""
+
+import bz2
+import csv
+import json
+import lzma
+import re
+import zlib
+from itertools import islice
+from pathlib import Path
+from typing import IO, Iterable, Iterator
+
+from .encoding import BLOCK_SIZE
+from .layout import BLOCKS_PER_PLATE, dest_well_name, dest_well_slot
+from .output import atomic_write
+
+# Blocks converted per chunk; kept a multiple of 14 so a chunk always ends on
+# both a byte (36 * 2 = 72 bits) and a 7-bit character (36 * 7 = 252 bits).
+CHUNK_BLOCKS = 14 * 1024
+
+MANIFEST_FORMAT = "brick-mix-manifest"
+MANIFEST_VERSION = 1
+
+_BIT_CHARS = re.compile(r"[01]+")
+_SEPTET_VALUES = {f"{c:07b}": c for c in range(128)}
+
+
+# ---------- READOUT PARSING ----------
+
+
+def _check_block(bits: str, index: int) -> str:
+    if len(bits) != BLOCK_SIZE or bits.strip("01"):
+        raise ValueError(
+            f"Block {index} is not a {BLOCK_SIZE}-bit '0'/'1' string: {bits!r}"
+        )
+    return bits
+
+
+def _row_bits(row: dict, brick_cols: list[str]) -> str:
+    """Build a block from per-brick CSV columns (truthy cell -> MOD brick)."""
+    out = []
+    for col in brick_cols:
+        cell = (row.get(col) or "").strip().lower()
+        out.append("1" if cell in ("1", "mod", "true", "yes", "y", "x") else "0")
+    return "".join(out)
+
+
+def iter_csv_blocks(path: Path) -> Iterator[str]:
+    """
+    Yield blocks from a CSV readout.
+
+    Accepted layouts (header row required):
+      - a 'bits' column holding the 36-character bitstring, or
+      - one column per brick, named 'brick_2'..'brick_37' (or '2'..'37').
+    An optional 'block' column gives the block index; rows are re-ordered
+    by it if they were recorded out of order.
+    """
+    with path.open(newline="", encoding="utf-8") as fh:
+        reader = csv.DictReader(fh)
+        fields = [f.strip() for f in (reader.fieldnames or [])]
+        reader.fieldnames = fields
+
+        brick_cols = None
+        if "bits" not in fields:
+            for prefix in ("brick_", ""):
+                cols = [f"{prefix}{n}" for n in range(2, BLOCK_SIZE + 2)]
+                if all(c in fields for c in cols):
+                    brick_cols = cols
+                    break
+            if brick_cols is None:
+                raise ValueError(
+                    f"{path}: CSV needs a 'bits' column or brick_2..brick_37 columns."
+                )
+
+        def bits_of(row: dict) -> str:
+            if brick_cols is None:
+                return (row.get("bits") or "").strip()
+            return _row_bits(row, brick_cols)
+
+        if "block" not in fields:
+            for i, row in enumerate(reader):
+                yield _check_block(bits_of(row), i)
+            return
+
+        pending: dict[int, str] = {}
+        expected = 0
+        for row in reader:
+            pending[int(row["block"])] = bits_of(row)
+            while expected in pending:
+                yield _check_block(pending.pop(expected), expected)
+                expected += 1
+        if pending:
+            raise ValueError(
+                f"{path}: missing block {expected} (have {sorted(pending)[:5]}...)."
+            )
+
+
+def iter_json_blocks(path: Path) -> Iterator[str]:
+    """
+    Yield blocks from a JSON readout: a list of bitstrings, a list of
+    {"bits": ...} objects, or an object with a "blocks" list.
+    """
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if isinstance(data, dict):
+        data = data.get("blocks")
+    if not isinstance(data, list):
+        raise ValueError(f"{path}: expected a list of blocks.")
+    for i, item in enumerate(data):
+        bits = item.get("bits", "") if isinstance(item, dict) else str(item)
+        yield _check_block(bits.strip(), i)
+
+
+def iter_text_blocks(path: Path) -> Iterator[str]:
+    """
+    Yield blocks from plain text. Everything except '0'/'1' is ignored
+    (whitespace, quotes, commas, '#' comments), so one block per line,
+    one long bitstring, or a pasted BLOCKS literal all work.
+    """
+    buf = ""
+    with path.open(encoding="utf-8") as fh:
+        for line in fh:
+            line = line.split("#", 1)[0]
+            buf += "".join(_BIT_CHARS.findall(line))
+            # slice by offset and trim once per line: O(n) for one long line too
+            end = len(buf) - len(buf) % BLOCK_SIZE
+            for pos in range(0, end, BLOCK_SIZE):
+                yield buf[pos:pos + BLOCK_SIZE]
+            buf = buf[end:]
+    if buf:
+        raise ValueError(
+            f"{path}: trailing {len(buf)} bits do not form a full {BLOCK_SIZE}-bit block."
+        )
+
+
+def read_blocks(path: Path, fmt: str | None = None) -> Iterator[str]:
+    """Dispatch on --format, or on the file suffix when no format is given."""
+    fmt = fmt or {".csv": "csv", ".json": "json"}.get(path.suffix.lower(), "text")
+    if fmt == "csv":
+        return iter_csv_blocks(path)
+    if fmt == "json":
+        return iter_json_blocks(path)
+    if fmt == "text":
+        return iter_text_blocks(path)
+    raise ValueError(f"Unknown readout format: {fmt}")
+
+
+# ---------- BITS → BYTES ----------
+
+
+def _bits_to_bytes(bits: str, ascii7: bool) -> bytes:
+    """Convert a bitstring whose length is a multiple of 7/8 into bytes."""
+    if not bits:
+        return b""
+    if ascii7:
+        return bytes([_SEPTET_VALUES[bits[i:i + 7]] for i in range(0, len(bits), 7)])
+    return int(bits, 2).to_bytes(len(bits) // 8, "big")
+
+
+def _chunks(blocks: Iterable[str], size: int) -> Iterator[str]:
+    batch: list[str] = []
+    for bits in blocks:
+        batch.append(bits)
+        if len(batch) == size:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+
+
+def blocks_to_bytes(
+    blocks: Iterable[str],
+    ascii7: bool = False,
+    num_bits: int | None = None,
+) -> Iterator[bytes]:
+    """
+    Stream the payload carried by `blocks`.
+
+    num_bits is the unpadded bit count recorded in the manifest. Without it,
+    incomplete trailing characters are dropped and whole NUL characters that
+    sit inside the last block are treated as padding, which is exact unless
+    the original input itself ended with NUL bytes.
+    """
+    unit = 7 if ascii7 else 8
+    consumed = 0
+    held = None
+
+    for chunk in _chunks(blocks, CHUNK_BLOCKS):
+        if held is not None:
+            yield _bits_to_bytes(held, ascii7)
+        consumed += len(chunk)
+        held = chunk
+        if num_bits is not None and consumed >= num_bits:
+            held = chunk[: num_bits - (consumed - len(chunk))]
+            break
+
+    if held is None:
+        raise ValueError("No blocks to decode.")
+
+    if num_bits is not None:
+        if consumed < num_bits:
+            raise ValueError(
+                f"Readout has {consumed} bits but the manifest records {num_bits}."
+            )
+        if num_bits % unit:
+            raise ValueError(f"num_bits {num_bits} is not a multiple of {unit}.")
+        yield _bits_to_bytes(held, ascii7)
+        return
+
+    # Chunks start on a character boundary, so positions inside `held` are
+    # aligned; only characters wholly inside the last block can be padding.
+    total = len(held)
+    trimmed = total - total % unit
+    data = _bits_to_bytes(held[:trimmed], ascii7)
+    pad_chars = trimmed // unit - -(-(total - BLOCK_SIZE) // unit)
+    stripped = data.rstrip(b"\x00")
+    yield data[: max(len(stripped), len(data) - pad_chars)]
+
+
+# ---------- MANIFEST ----------
+
+
+def build_manifest(
+    source_label: str,
+    ascii7: bool,
+    num_bits: int,
+    shards: list[tuple[str, int]],
+    compression: str | None = None,
+) -> dict:
+    """
+    Describe how a payload was packed into blocks (written by the builders).
+
+    shards: (protocol filename, number of blocks) in block order.
+    """
+    entries = []
+    first = 0
+    for protocol, count in shards:
+        entries.append(
+            {"protocol": protocol, "readout": None, "first_block": first, "num_blocks": count}
+        )
+        first += count
+    return {
+        "format": MANIFEST_FORMAT,
+        "version": MANIFEST_VERSION,
+        "source": source_label,
+        "encoding": "ascii7" if ascii7 else "bytes",
+        "block_size": BLOCK_SIZE,
+        "num_bits": num_bits,
+        "num_blocks": first,
+        "blocks_per_plate": BLOCKS_PER_PLATE,
+        "compression": compression,
+        "shards": entries,
+    }
+
+
+def load_manifest(path: Path) -> dict:
+    manifest = json.loads(path.read_text(encoding="utf-8"))
+    if manifest.get("format") != MANIFEST_FORMAT:
+        raise ValueError(f"{path} is not a brick-mix manifest.")
+    if manifest.get("block_size", BLOCK_SIZE) != BLOCK_SIZE:
+        raise ValueError(f"{path}: unsupported block size {manifest['block_size']}.")
+    return manifest
+
+
+# ---------- BLOCK ADDRESSING ----------
+#
+# A block's address is (shard, plate, well): the protocol file it was built
+# in, the brick-mix rack within that run (racks are swapped every
+# BLOCKS_PER_PLATE mixes) and the destination well on that rack. The address
+# follows from the block index alone, so no bits are taken from the payload.
+
+
+def _unit(manifest: dict) -> int:
+    return 7 if manifest["encoding"] == "ascii7" else 8
+
+
+def block_address(manifest: dict, block: int) -> tuple[int, int, str]:
+    """Global block index → (shard, plate, well)."""
+    per_plate = manifest.get("blocks_per_plate", BLOCKS_PER_PLATE)
+    for shard, entry in enumerate(manifest["shards"]):
+        local = block - entry["first_block"]
+        if 0 <= local < entry["num_blocks"]:
+            return shard, local // per_plate, dest_well_name(local % per_plate)
+    raise ValueError(f"Block {block} is outside the manifest ({manifest['num_blocks']} blocks).")
+
+
+def block_at(manifest: dict, shard: int, plate: int, well: str) -> int:
+    """(shard, plate, well) → global block index."""
+    per_plate = manifest.get("blocks_per_plate", BLOCKS_PER_PLATE)
+    entry = manifest["shards"][shard]
+    local = plate * per_plate + dest_well_slot(well)
+    if local >= entry["num_blocks"]:
+        raise ValueError(f"Shard {shard} has no block at plate {plate}, well {well}.")
+    return entry["first_block"] + local
+
+
+def block_byte_range(manifest: dict, block: int) -> tuple[int, int]:
+    """Half-open range of payload bytes (characters for ascii7) a block touches."""
+    unit = _unit(manifest)
+    total = manifest["num_bits"] // unit
+    start = block * BLOCK_SIZE // unit
+    end = -(-(block + 1) * BLOCK_SIZE // unit)
+    return min(start, total), min(end, total)
+
+
+def build_index(manifest: dict) -> dict:
+    """
+    Compact (shard, plate, well) → byte range table, one row per block:
+    [shard, plate, well, first_byte, end_byte]. Ranges of neighbouring blocks
+    overlap by one byte when a character straddles the block boundary.
+    """
+    return {**_index_header(manifest), "rows": list(_index_rows(manifest))}
+
+
+def _index_header(manifest: dict) -> dict:
+    return {
+        "format": "brick-mix-index",
+        "version": MANIFEST_VERSION,
+        "encoding": manifest["encoding"],
+        "num_bits": manifest["num_bits"],
+        "shards": [entry["protocol"] for entry in manifest["shards"]],
+        "columns": ["shard", "plate", "well", "first_byte", "end_byte"],
+    }
+
+
+def _index_rows(manifest: dict) -> Iterator[list]:
+    for block in range(manifest["num_blocks"]):
+        shard, plate, well = block_address(manifest, block)
+        yield [shard, plate, well, *block_byte_range(manifest, block)]
+
+
+def index_name(manifest_name: str) -> str:
+    """<output>.manifest.json -> <output>.index.json"""
+    return manifest_name.replace(".manifest.json", ".index.json")
+
+
+def dump_manifest(manifest: dict, fh: IO[str]) -> None:
+    json.dump(manifest, fh, indent=2)
+
+
+def dump_index(manifest: dict, fh: IO[str]) -> None:
+    """Same JSON as build_index, written row by row (one row per block)."""
+    compact = json.JSONEncoder(separators=(",", ":"), ensure_ascii=True).encode
+    fh.write(compact(_index_header(manifest))[:-1] + ',"rows":[')
+    for i, row in enumerate(_index_rows(manifest)):
+        fh.write(("," if i else "") + compact(row))
+    fh.write("]}")
+
+
+def write_manifest(manifest: dict, manifest_path: Path) -> Path:
+    """Write the manifest plus its index; returns the index path."""
+    index_path = manifest_path.with_name(index_name(manifest_path.name))
+    with atomic_write(index_path) as fh:
+        dump_index(manifest, fh)
+    with atomic_write(manifest_path) as fh:
+        dump_manifest(manifest, fh)
+    return index_path
+
+
+def decode_range(
+    manifest: dict,
+    readouts: list[Path],
+    start: int,
+    end: int,
+    fmt: str | None = None,
+) -> bytes:
+    """
+    Decode payload bytes [start, end) reading only the blocks that carry them.
+    readouts[i] is the readout file of manifest shard i; other shards' files
+    are never opened. Uncompressed payloads only.
+    """
+    if manifest.get("compression"):
+        raise ValueError("Random access needs an uncompressed payload.")
+    unit = _unit(manifest)
+    total = manifest["num_bits"] // unit
+    if not 0 <= start < end <= total:
+        raise ValueError(f"Byte range {start}:{end} outside payload of {total} bytes.")
+
+    first = start * unit // BLOCK_SIZE
+    last = (end * unit - 1) // BLOCK_SIZE
+    bits = []
+    for shard, entry in enumerate(manifest["shards"]):
+        lo = max(first, entry["first_block"])
+        hi = min(last + 1, entry["first_block"] + entry["num_blocks"])
+        if lo >= hi:
+            continue
+        blocks = read_blocks(readouts[shard], fmt)
+        skip = lo - entry["first_block"]
+        bits.extend(islice(blocks, skip, skip + hi - lo))
+        blocks.close()
+    offset = start * unit - first * BLOCK_SIZE
+    payload = "".join(bits)[offset: offset + (end - start) * unit]
+    return _bits_to_bytes(payload, manifest["encoding"] == "ascii7")
+
+
+# ---------- DECOMPRESSION ----------
+
+
+def _decompressor(kind: str | None):
+    if kind in (None, "", "none"):
+        return None
+    if kind in ("zlib", "gzip"):
+        return zlib.decompressobj(wbits=zlib.MAX_WBITS | 32)  # auto-detect header
+    if kind == "bz2":
+        return bz2.BZ2Decompressor()
+    if kind in ("lzma", "xz"):
+        return lzma.LZMADecompressor()
+    raise ValueError(f"Unsupported compression: {kind}")
+
+
+def decode_to_file(
+    readouts: list[Path],
+    output: Path,
+    ascii7: bool = False,
+    num_bits: int | None = None,
+    compression: str | None = None,
+    fmt: str | None = None,
+) -> int:
+    """
+    Decode one or more readout files (in shard order) into `output`.
+    Returns the number of bytes written.
+    """
+
+    def all_blocks() -> Iterator[str]:
+        for path in readouts:
+            yield from read_blocks(path, fmt)
+
+    dec = _decompressor(compression)
+    written = 0
+    with atomic_write(output, "wb") as out:
+        for data in blocks_to_bytes(all_blocks(), ascii7=ascii7, num_bits=num_bits):
+            if dec is not None:
+                data = dec.decompress(data)
+            out.write(data)
+            written += len(data)
+        if dec is not None and hasattr(dec, "flush"):
+            tail = dec.flush()
+            out.write(tail)
+            written += len(tail)
+    return written
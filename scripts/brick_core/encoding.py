@@ -0,0 +1,139 @@
+"""
+FILE / WORD → BITS → 36-BIT BLOCKS
+
+Single encoding engine shared by every builder. Bytes are expanded with one
+big-int conversion and 7-bit ASCII through a lookup table, instead of a
+per-character format() call.
+"""
+
+from pathlib import Path
+from typing import Iterator
+
+BLOCK_SIZE = 36  # bits per block (bricks 2..37)
+FILE_CHUNK_BLOCKS = 14 * 4096  # blocks per read when streaming a file (~258 KB of bytes)
+
+_BITS7 = tuple(f"{c:07b}" for c in range(128))
+
+
+def bytes_to_bitstring(data: bytes) -> str:
+    """Each byte -> 8 bits, most significant bit first."""
+    if not data:
+        return ""
+    return bin(int.from_bytes(data, "big"))[2:].zfill(len(data) * 8)
+
+
+def ascii7_to_bitstring(text: str) -> str:
+    """Each character -> 7 bits. Raises ValueError for non-ASCII characters."""
+    try:
+        data = text.encode("ascii")
+    except UnicodeEncodeError as e:
+        raise ValueError(
+            f"Character {text[e.start]!r} at position {e.start} is not 7-bit ASCII; "
+            "drop --ascii7 to encode UTF-8 bytes instead."
+        ) from None
+    return "".join(map(_BITS7.__getitem__, data))
+
+
+def file_to_bitstring(path: Path, ascii7: bool = False) -> str:
+    """
+    Convert a file to one long bitstring.
+
+    If ascii7 is False (default):
+        - Treat file as raw bytes (binary-safe, works for any file type)
+        - Each byte -> 8 bits
+
+    If ascii7 is True:
+        - Treat file as text (UTF-8)
+        - Each character -> 7-bit ASCII
+    """
+    if ascii7:
+        text = path.read_text(encoding="utf-8")
+        if not text:
+            raise ValueError(f"Input file {path} is empty.")
+        return ascii7_to_bitstring(text)
+    data = path.read_bytes()
+    if not data:
+        raise ValueError(f"Input file {path} is empty.")
+    return bytes_to_bitstring(data)
+
+
+def word_to_bitstring(word: str, ascii7: bool = True) -> str:
+    """
+    Convert a literal word/string to a bitstring.
+
+    By default we use 7-bit ASCII for words (ascii7=True).
+    If ascii7=False, we encode the word as UTF-8 bytes and use 8 bits per byte.
+    """
+    if not word:
+        raise ValueError("Word/string is empty.")
+    if ascii7:
+        return ascii7_to_bitstring(word)
+    return bytes_to_bitstring(word.encode("utf-8"))
+
+
+def file_num_bits(path: Path, ascii7: bool = False, chunk_chars: int = 1 << 20) -> int:
+    """
+    Number of bits file_to_bitstring would return, without building them.
+
+    7-bit input is read in chunks and checked for non-ASCII characters, so a
+    bad file fails here rather than halfway through a streamed build.
+    """
+    if not ascii7:
+        num_bits = path.stat().st_size * 8
+    else:
+        num_bits = 0
+        with path.open(encoding="utf-8") as fh:
+            while chunk := fh.read(chunk_chars):
+                if not chunk.isascii():
+                    pos = next(i for i, c in enumerate(chunk) if ord(c) > 127)
+                    raise ValueError(
+                        f"Character {chunk[pos]!r} at position {num_bits // 7 + pos} is not 7-bit "
+                        "ASCII; drop --ascii7 to encode UTF-8 bytes instead."
+                    )
+                num_bits += len(chunk) * 7
+    if not num_bits:
+        raise ValueError(f"Input file {path} is empty.")
+    return num_bits
+
+
+def bitstring_to_blocks(bits: str, block_size: int = BLOCK_SIZE) -> list[str]:
+    """
+    Split a long bitstring into fixed-size blocks (36 bits).
+    Last block is right-padded with '0' if needed.
+    """
+    if not bits:
+        raise ValueError("No bits to encode (empty file/word).")
+    blocks = [bits[i:i + block_size] for i in range(0, len(bits), block_size)]
+    if len(blocks[-1]) < block_size:
+        blocks[-1] = blocks[-1].ljust(block_size, "0")
+    return blocks
+
+
+def iter_file_blocks(
+    path: Path,
+    ascii7: bool = False,
+    chunk_blocks: int | None = None,
+) -> Iterator[str]:
+    """
+    Stream a file as 36-bit blocks without building the whole bitstring.
+
+    Chunks are a multiple of 2 blocks (9 bytes) for byte input and of 7
+    blocks (36 characters) for 7-bit input, so only the very last block is
+    ever padded. Raises ValueError for an empty file.
+    """
+    chunk_blocks = chunk_blocks or FILE_CHUNK_BLOCKS
+    if chunk_blocks % 14:
+        raise ValueError("chunk_blocks must be a multiple of 14.")
+    unit = 7 if ascii7 else 8
+    chunk_units = chunk_blocks * BLOCK_SIZE // unit
+    empty = True
+    with (path.open(encoding="utf-8") if ascii7 else path.open("rb")) as fh:
+        while True:
+            data = fh.read(chunk_units)
+            if not data:
+                break
+            empty = False
+            bits = ascii7_to_bitstring(data) if ascii7 else bytes_to_bitstring(data)
+            yield from bitstring_to_blocks(bits)
+    if empty:
+        raise ValueError(f"Input file {path} is empty.")
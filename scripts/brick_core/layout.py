@@ -0,0 +1,80 @@
+"""
+Deck and plate layout shared by the builders, the generated protocols and
+the decoder.
+
+Brick plates (UNMOD and MOD) hold bricks 1..38 in PCR tubes:
+   1–12  -> row A, cols 1–12
+   13–24 -> row C, cols 1–12
+   25–36 -> row E, cols 1–12
+   37–38 -> row G, cols 1–2
+Block bit i (0-based) selects brick (i + 2): '1' -> MOD, '0' -> UNMOD.
+Bricks 1 and 38 are always UNMOD.
+
+Brick-mix racks use sparse rows A, C, E, G, H: 60 mixes per rack.
+"""
+
+from dataclasses import dataclass
+
+BRICK_COUNT = 38
+FIRST_BIT_BRICK = 2  # bit 0 -> brick 2, bit 35 -> brick 37
+
+BRICK_ROWS = "ACEG"  # 12 bricks per row, bricks 37–38 in row G
+DEST_ROWS = "ACEGH"
+DEST_ROW_INDICES = [0, 2, 4, 6, 7]  # DEST_ROWS as indices into plate.rows()
+WELLS_PER_ROW = 12
+BLOCKS_PER_PLATE = WELLS_PER_ROW * len(DEST_ROWS)  # 60
+
+
+@dataclass(frozen=True)
+class DeckLayout:
+    """Slots and labware for a brick-mix run (baked into generated protocols)."""
+
+    tip_slots: tuple[str, ...]
+    blocks_per_tip_cycle: int
+    unmod_slot: str = "5"
+    mod_slot: str = "4"
+    mix_slot: str = "2"
+    tip_rack_name: str = "geb_96_tiprack_10ul"
+    brick_plate_name: str = "opentronspcrrack_96_wellplate_100ul"
+    sa_plate_name: str = "nest_96_wellplate_100ul_pcr_full_skirt"
+
+    @property
+    def tips_per_cycle(self) -> int:
+        return len(self.tip_slots) * 96
+
+
+# BM + SA: thermocycler occupies 7, 8, 10, 11 → 4 tip racks, ~10 blocks per refill
+BM_SA_LAYOUT = DeckLayout(tip_slots=("1", "3", "6", "9"), blocks_per_tip_cycle=10)
+
+# Brick mix only: 6 tip racks → 15 blocks per refill (38 × 15 = 570 ≤ 576 tips)
+BM_LAYOUT = DeckLayout(
+    tip_slots=("1", "3", "6", "8", "9", "11"), blocks_per_tip_cycle=15
+)
+
+
+def brick_source_well(brick_num: int) -> str:
+    """Brick 1..38 → well name on the UNMOD/MOD brick plates."""
+    if brick_num < 1 or brick_num > BRICK_COUNT:
+        raise ValueError(f"Brick index out of range: {brick_num}")
+    row, col = divmod(brick_num - 1, WELLS_PER_ROW)
+    return f"{BRICK_ROWS[row]}{col + 1}"
+
+
+def modified_bricks(bits: str) -> list[int]:
+    """Bricks (2..37) that come from the MOD plate for one block."""
+    return [i + FIRST_BIT_BRICK for i, b in enumerate(bits) if b == "1"]
+
+
+def dest_well_name(slot: int) -> str:
+    """Rack slot 0..59 → A1..A12, C1..C12, E1..E12, G1..G12, H1..H12."""
+    if slot < 0 or slot >= BLOCKS_PER_PLATE:
+        raise ValueError(f"Rack slot out of range: {slot}")
+    return f"{DEST_ROWS[slot // WELLS_PER_ROW]}{slot % WELLS_PER_ROW + 1}"
+
+
+def dest_well_slot(well: str) -> int:
+    """Inverse of dest_well_name."""
+    row, col = well[0].upper(), int(well[1:])
+    if row not in DEST_ROWS or not 1 <= col <= WELLS_PER_ROW:
+        raise ValueError(f"{well} is not a brick-mix destination well.")
+    return DEST_ROWS.index(row) * WELLS_PER_ROW + col - 1
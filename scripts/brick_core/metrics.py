@@ -0,0 +1,140 @@
+"""
+METRICS (PROMETHEUS TEXT FORMAT)
+
+A small in-process registry of counters, gauges and histograms rendered in
+the Prometheus text exposition format (version 0.0.4), so dashboards can
+track the builders and the robots without a client library:
+
+- write_textfile(): for node_exporter's textfile collector (the builders'
+  --metrics FILE, the watchdog's --metrics-file); written atomically.
+- serve(): a local /metrics endpoint on the asyncio loop (the watchdog's
+  --metrics-port).
+
+    registry = Registry()
+    polls = registry.histogram("ot2_poll_duration_seconds", "Duration of one poll.")
+    polls.observe(0.012, robot="left")
+    registry.write_textfile(Path("ot2.prom"))
+"""
+
+import asyncio
+import math
+from pathlib import Path
+
+from .output import atomic_write
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: tuple[tuple[str, str], ...], extra: tuple[tuple[str, str], ...] = ()) -> str:
+    pairs = labels + extra
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Metric:
+    """One metric family; samples are keyed by their (sorted) labels."""
+
+    def __init__(self, name: str, kind: str, help_text: str, buckets: tuple[float, ...] = ()):
+        self.name = name
+        self.kind = kind  # "counter" | "gauge" | "histogram"
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self.samples: dict[tuple, float | list] = {}
+
+    @staticmethod
+    def _key(labels: dict) -> tuple[tuple[str, str], ...]:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        self.samples[key] = self.samples.get(key, 0.0) + amount
+
+    def set(self, value: float, **labels) -> None:
+        self.samples[self._key(labels)] = value
+
+    def remove(self, **labels) -> None:
+        self.samples.pop(self._key(labels), None)
+
+    def observe(self, value: float, **labels) -> None:
+        """Histogram: count `value` in its buckets (state: [bucket counts..., sum, count])."""
+        state = self.samples.setdefault(self._key(labels), [0] * len(self.buckets) + [0.0, 0])
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                state[i] += 1
+        state[-2] += value
+        state[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, value in sorted(self.samples.items()):
+            if self.kind != "histogram":
+                lines.append(f"{self.name}{_labels(key)} {_number(value)}")
+                continue
+            for bound, count in zip(self.buckets, value):
+                lines.append(f"{self.name}_bucket{_labels(key, (('le', _number(bound)),))} {count}")
+            lines.append(f"{self.name}_bucket{_labels(key, (('le', '+Inf'),))} {value[-1]}")
+            lines.append(f"{self.name}_sum{_labels(key)} {_number(value[-2])}")
+            lines.append(f"{self.name}_count{_labels(key)} {value[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: dict[str, Metric] = {}
+
+    def _metric(self, name: str, kind: str, help_text: str, buckets: tuple[float, ...] = ()) -> Metric:
+        metric = self.metrics.setdefault(name, Metric(name, kind, help_text, buckets))
+        if metric.kind != kind:
+            raise ValueError(f"Metric {name} is a {metric.kind}, not a {kind}")
+        return metric
+
+    def counter(self, name: str, help_text: str) -> Metric:
+        return self._metric(name, "counter", help_text)
+
+    def gauge(self, name: str, help_text: str) -> Metric:
+        return self._metric(name, "gauge", help_text)
+
+    def histogram(self, name: str, help_text: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Metric:
+        return self._metric(name, "histogram", help_text, buckets)
+
+    def render(self) -> str:
+        return "".join(line + "\n" for metric in self.metrics.values() for line in metric.render())
+
+    def write_textfile(self, path: Path) -> None:
+        """Write (atomically, as the textfile collector requires) to `path` (*.prom)."""
+        with atomic_write(Path(path)) as fh:
+            fh.write(self.render())
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 0) -> asyncio.AbstractServer:
+        """Serve GET /metrics on the running loop; the caller closes the returned server."""
+
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+            try:
+                request = await reader.readuntil(b"\r\n\r\n")
+                method, path = request.decode("latin-1").split(" ", 2)[:2]
+                if method == "GET" and path.split("?")[0] in ("/metrics", "/"):
+                    status, body = "200 OK", self.render().encode()
+                else:
+                    status, body = "404 Not Found", b"not found\n"
+                head = (f"HTTP/1.1 {status}\r\nContent-Type: {CONTENT_TYPE}\r\n"
+                        f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n")
+                writer.write(head.encode("latin-1") + body)
+                await writer.drain()
+            except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+                pass
+            finally:
+                writer.close()
+
+        return await asyncio.start_server(handle, host, port)
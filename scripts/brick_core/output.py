@@ -0,0 +1,48 @@
+"""
+ATOMIC OUTPUT FILES
+
+Generated protocols, manifests and cache entries are written to a hidden
+temporary file next to the target and renamed over it only once complete.
+A crash or error mid-write leaves the previous file (or no file) in place,
+never a truncated protocol that the OT-2 app would happily import.
+"""
+
+import os
+import secrets
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator
+
+# Unlike mkstemp (0600), the kernel applies the process umask to 0666, so
+# outputs get the usual mode without reading or changing the umask.
+_FLAGS = os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, "O_BINARY", 0)
+
+
+def _create_temp(path: Path) -> tuple[int, str]:
+    """Exclusively create a hidden temporary file next to `path`."""
+    while True:
+        tmp = str(path.with_name(f".{path.name}.{secrets.token_hex(4)}.tmp"))
+        try:
+            return os.open(tmp, _FLAGS, 0o666), tmp
+        except FileExistsError:
+            continue
+
+
+@contextmanager
+def atomic_write(path: Path, mode: str = "w", encoding: str | None = "utf-8") -> Iterator[IO]:
+    """
+    Open a temporary file for writing; on success it replaces `path`.
+
+    mode is "w" (text, `encoding`) or "wb". The temporary file lives in the
+    same directory (so the rename is atomic) and is removed on any error.
+    """
+    path = Path(path)
+    fd, tmp = _create_temp(path)
+    try:
+        fh = os.fdopen(fd, mode) if "b" in mode else os.fdopen(fd, mode, encoding=encoding)
+        with fh:
+            yield fh
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
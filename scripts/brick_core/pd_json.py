@@ -0,0 +1,378 @@
+"""
+PROTOCOL DESIGNER JSON
+
+Builds the DESIGNER_APPLICATION blob of a brick-mix protocol (the JSON
+that Protocol Designer re-imports) from a compact model, instead of
+patching the step forms of a hand-exported protocol. The step forms are
+encoded one at a time and streamed, so build time and memory scale with
+the number of transfers, not with the size of a template.
+
+The deck matches BRICK_MIX_38_TIMES.py: 10 µL tip rack(s) starting in
+slot 6, UNMOD bricks in 5, MOD bricks in 4, brick mix in 2, P10 single
+on the left. Bricks sit in A1–A12, D1–D12, G1–G12, H1, H2.
+"""
+
+import json
+import re
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import IO, Iterator
+
+PD_NAME = "opentrons/protocol-designer"
+PD_VERSION = "8.6.0"
+
+BRICKS_PER_MIX = 38
+# Source well of bricks 1..38 on both brick plates.
+PD_BRICK_WELLS = tuple(f"{r}{c}" for r in "ADG" for c in range(1, 13)) + ("H1", "H2")
+PD_SINGLE_DEST_WELL = "E7"  # brick-mix well of single-block protocols
+
+TIP_RACK_URI = "opentrons/geb_96_tiprack_10ul/1"
+BRICK_PLATE_URI = "custom_beta/opentronspcrrack_96_wellplate_100ul/1"
+FILTER_TIP_RACK_URI = "opentrons/opentrons_96_filtertiprack_200ul/1"
+
+# Extra 10 µL tip racks (bricks in 4/5, mix in 2, first rack in 6, trash
+# in 12); 8 racks = 768 tips = 20 blocks of 38 transfers.
+FIRST_TIP_SLOT = "6"
+EXTRA_TIP_SLOTS = ("1", "3", "8", "9", "11", "7", "10")
+TIPS_PER_RACK = 96
+MAX_BLOCKS = (1 + len(EXTRA_TIP_SLOTS)) * TIPS_PER_RACK // BRICKS_PER_MIX
+
+# Ids of the original export, so generated JSON diffs cleanly against it.
+P10_ID = "f0772315-3ea6-4b29-b1cd-134760b1b953"
+P300_ID = "8341c909-7002-483c-8477-97c9e9875989"
+TIP_RACK_ID = f"d43dcdfb-f0ec-4bdd-8da5-879c0c5e9440:{TIP_RACK_URI}"
+UNMOD_ID = f"a7a8ae71-4cb0-445e-948a-53a2c7258b88:{BRICK_PLATE_URI}"
+MOD_ID = f"a76aeb33-f1d9-4e29-8dad-c21ec98786d9:{BRICK_PLATE_URI}"
+MIX_ID = f"f290b79a-3515-4305-a2ef-ae30f22795c4:{BRICK_PLATE_URI}"
+TRASH_ID = "fb805744-0791-4aba-ad5b-509c5510af97:trashBin"
+
+MOD_LIQUID, UNMOD_LIQUID, MIX_LIQUID = "0", "1", "2"
+
+# Every moveLiquid form field as exported by PD 8.6; per-step and
+# per-protocol fields are set by base_step_form() and step_forms().
+MOVE_LIQUID_FORM = {
+    "id": None,
+    "stepType": "moveLiquid",
+    "stepName": "transfer",
+    "stepDetails": "",
+    "stepNumber": 0,
+    "aspirate_airGap_checkbox": False,
+    "aspirate_airGap_volume": "",
+    "aspirate_delay_checkbox": False,
+    "aspirate_delay_seconds": "1",
+    "aspirate_flowRate": "5",
+    "aspirate_labware": None,
+    "aspirate_mix_checkbox": False,
+    "aspirate_mix_times": "",
+    "aspirate_mix_volume": None,
+    "aspirate_mmFromBottom": None,
+    "aspirate_position_reference": "well-bottom",
+    "aspirate_retract_delay_seconds": "0",
+    "aspirate_retract_mmFromBottom": 2,
+    "aspirate_retract_speed": "125",
+    "aspirate_retract_x_position": 0,
+    "aspirate_retract_y_position": 0,
+    "aspirate_retract_position_reference": "well-top",
+    "aspirate_submerge_delay_seconds": "0",
+    "aspirate_submerge_speed": "125",
+    "aspirate_submerge_mmFromBottom": 2,
+    "aspirate_submerge_x_position": 0,
+    "aspirate_submerge_y_position": 0,
+    "aspirate_submerge_position_reference": "well-top",
+    "aspirate_touchTip_checkbox": False,
+    "aspirate_touchTip_mmFromTop": None,
+    "aspirate_touchTip_speed": 60,
+    "aspirate_touchTip_mmFromEdge": 0,
+    "aspirate_wellOrder_first": "t2b",
+    "aspirate_wellOrder_second": "l2r",
+    "aspirate_wells_grouped": False,
+    "aspirate_wells": None,
+    "aspirate_x_position": 0,
+    "aspirate_y_position": 0,
+    "blowout_checkbox": False,
+    "blowout_flowRate": "1000",
+    "blowout_location": None,
+    "changeTip": "always",
+    "conditioning_checkbox": False,
+    "conditioning_volume": None,
+    "dispense_airGap_checkbox": False,
+    "dispense_airGap_volume": "",
+    "dispense_delay_checkbox": False,
+    "dispense_delay_seconds": "1",
+    "dispense_flowRate": "10",
+    "dispense_labware": MIX_ID,
+    "dispense_mix_checkbox": False,
+    "dispense_mix_times": "",
+    "dispense_mix_volume": None,
+    "dispense_mmFromBottom": None,
+    "dispense_position_reference": "well-bottom",
+    "dispense_retract_delay_seconds": "0",
+    "dispense_retract_mmFromBottom": 2,
+    "dispense_retract_speed": "125",
+    "dispense_retract_x_position": 0,
+    "dispense_retract_y_position": 0,
+    "dispense_retract_position_reference": "well-top",
+    "dispense_submerge_delay_seconds": "0",
+    "dispense_submerge_speed": "125",
+    "dispense_submerge_mmFromBottom": 2,
+    "dispense_submerge_x_position": 0,
+    "dispense_submerge_y_position": 0,
+    "dispense_submerge_position_reference": "well-top",
+    "dispense_touchTip_checkbox": False,
+    "dispense_touchTip_mmFromTop": None,
+    "dispense_touchTip_speed": 60,
+    "dispense_touchTip_mmFromEdge": 0,
+    "dispense_wellOrder_first": "t2b",
+    "dispense_wellOrder_second": "l2r",
+    "dispense_wells": None,
+    "dispense_x_position": 0,
+    "dispense_y_position": 0,
+    "disposalVolume_checkbox": True,
+    "disposalVolume_volume": None,
+    "dropTip_location": TRASH_ID,
+    "liquidClassesSupported": True,
+    "liquidClass": "none",
+    "nozzles": None,
+    "path": "single",
+    "pipette": P10_ID,
+    "preWetTip": False,
+    "pushOut_checkbox": False,
+    "pushOut_volume": "0",
+    "tipRack": TIP_RACK_URI,
+    "volume": "2",
+}
+
+_ENCODER = json.JSONEncoder(separators=(",", ":"))
+
+
+def tip_racks_needed(num_blocks: int) -> int:
+    return -(-num_blocks * BRICKS_PER_MIX // TIPS_PER_RACK)
+
+
+@dataclass(frozen=True)
+class BrickMixModel:
+    """
+    Everything that varies between brick-mix PD protocols.
+
+    blocks: MOD bricks (2..37) per block; dest_wells: brick-mix well per
+    block. Liquid handling fields default to the PD export's values
+    (None = keep PD's default).
+    """
+
+    protocol_name: str
+    blocks: tuple[frozenset[int], ...]
+    dest_wells: tuple[str, ...]
+    transfer_vol: float | None = None
+    mix_times: int | None = None
+    mix_vol: float | None = None
+    asp_flow: float | None = None
+    asp_depth: float | None = None
+    brick_stock: float = 20
+    created: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+    def __post_init__(self):
+        if not 1 <= len(self.blocks) <= MAX_BLOCKS:
+            raise ValueError(
+                f"PD protocols support 1..{MAX_BLOCKS} blocks with one set of tip racks, "
+                f"got {len(self.blocks)}."
+            )
+        if len(self.dest_wells) != len(self.blocks):
+            raise ValueError("Need exactly one destination well per block.")
+
+    @property
+    def num_tip_racks(self) -> int:
+        return tip_racks_needed(len(self.blocks))
+
+    def tip_rack_ids(self) -> list[tuple[str, str]]:
+        """(labware id, slot) for every 10 µL tip rack."""
+        racks = [(TIP_RACK_ID, FIRST_TIP_SLOT)]
+        for k, slot in zip(range(2, self.num_tip_racks + 1), EXTRA_TIP_SLOTS):
+            rack_id = uuid.uuid5(uuid.NAMESPACE_URL, f"{TIP_RACK_ID}/{k}")
+            racks.append((f"{rack_id}:{TIP_RACK_URI}", slot))
+        return racks
+
+
+def step_id(n: int) -> str:
+    """Deterministic id of transfer n (0-based)."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"brick-mix/step/{n}"))
+
+
+def base_step_form(model: BrickMixModel) -> dict:
+    """moveLiquid form with the model's liquid handling, before per-step fields."""
+    base = dict(MOVE_LIQUID_FORM)
+    if model.transfer_vol is not None:
+        base["volume"] = str(model.transfer_vol)
+    if model.mix_times is not None:
+        if model.mix_times > 0:
+            base["aspirate_mix_checkbox"] = True
+            base["aspirate_mix_times"] = str(model.mix_times)
+            # without --mix-vol/--transfer-vol: mix the form's own transfer volume
+            base["aspirate_mix_volume"] = str(model.mix_vol or model.transfer_vol or base["volume"])
+        else:
+            base["aspirate_mix_checkbox"] = False
+            base["aspirate_mix_times"] = ""
+    if model.asp_flow is not None:
+        base["aspirate_flowRate"] = str(model.asp_flow)
+    if model.asp_depth is not None:
+        base["aspirate_mmFromBottom"] = str(model.asp_depth)
+    return base
+
+
+def transfers(model: BrickMixModel) -> Iterator[tuple[str, str, str, str]]:
+    """(step id, source labware id, source well, dest well) per (block, brick), in run order."""
+    n = 0
+    for mod, dest in zip(model.blocks, model.dest_wells):
+        for brick, well in enumerate(PD_BRICK_WELLS, start=1):
+            is_mod = brick in mod and brick not in (1, BRICKS_PER_MIX)
+            yield step_id(n), MOD_ID if is_mod else UNMOD_ID, well, dest
+            n += 1
+
+
+def step_forms(model: BrickMixModel) -> Iterator[dict]:
+    """One moveLiquid form per transfer."""
+    base = base_step_form(model)
+    for sid, labware, well, dest in transfers(model):
+        form = dict(base)
+        form["id"] = sid
+        form["aspirate_labware"] = labware
+        form["aspirate_wells"] = [well]
+        form["dispense_wells"] = [dest]
+        yield form
+
+
+# Per-step fields in form order; everything else is shared by all steps.
+_STEP_FIELDS = ("id", "aspirate_labware", "aspirate_wells", "dispense_wells")
+
+
+def _split_step_form(model: BrickMixModel) -> list[str]:
+    """
+    The encoded base form split around the per-step fields, so each step
+    is one join instead of a dict copy plus a full encode.
+    """
+    base = base_step_form(model)
+    for i, key in enumerate(_STEP_FIELDS):
+        base[key] = f"\0{i}"
+    parts = re.split(r'"\\u0000(\d)"', _enc(base))
+    if parts[1::2] != [str(i) for i in range(len(_STEP_FIELDS))]:
+        raise AssertionError("moveLiquid form fields out of order")
+    return parts[0::2]
+
+
+def _labware(model: BrickMixModel) -> dict:
+    tip_rack = {"displayName": "(Retired) GEB 96 Tip Rack 10 µL", "labwareDefURI": TIP_RACK_URI}
+    racks = model.tip_rack_ids()
+    labware = {racks[0][0]: tip_rack}
+    for name, key in (("unmod bricks", UNMOD_ID), ("mod bricks", MOD_ID), ("brick mix", MIX_ID)):
+        labware[key] = {"displayName": name, "labwareDefURI": BRICK_PLATE_URI}
+    for key, _ in racks[1:]:
+        labware[key] = dict(tip_rack)
+    return labware
+
+
+def _deck_setup(model: BrickMixModel) -> dict:
+    racks = model.tip_rack_ids()
+    locations = {racks[0][0]: racks[0][1], UNMOD_ID: "5", MOD_ID: "4", MIX_ID: "2"}
+    locations.update(racks[1:])
+    return {
+        "stepType": "manualIntervention",
+        "id": "__INITIAL_DECK_SETUP_STEP__",
+        "labwareLocationUpdate": locations,
+        "pipetteLocationUpdate": {P10_ID: "left", P300_ID: "right"},
+        "moduleLocationUpdate": {},
+        "trashBinLocationUpdate": {TRASH_ID: "cutout12"},
+        "wasteChuteLocationUpdate": {},
+        "stagingAreaLocationUpdate": {},
+        "gripperLocationUpdate": {},
+    }
+
+
+def _ingredients() -> dict:
+    return {
+        liquid: {
+            "displayName": name,
+            "displayColor": color,
+            "description": None,
+            "liquidGroupId": liquid,
+        }
+        for liquid, name, color in (
+            (MOD_LIQUID, "MOD BRICKS", "#b925ff"),
+            (UNMOD_LIQUID, "UNMOD BRICKS", "#ffd600"),
+            (MIX_LIQUID, "BRICK MIX", "#9dffd8"),
+        )
+    }
+
+
+def _ingred_locations(model: BrickMixModel) -> dict:
+    def wells(liquid, names):
+        return {w: {liquid: {"volume": model.brick_stock}} for w in names}
+
+    # As in the export (and its Python body): MOD stock in A1–G12.
+    return {
+        MOD_ID: wells(MOD_LIQUID, PD_BRICK_WELLS[:36]),
+        UNMOD_ID: wells(UNMOD_LIQUID, PD_BRICK_WELLS),
+        MIX_ID: {},
+    }
+
+
+def _enc(obj) -> str:
+    return _ENCODER.encode(obj)
+
+
+def iter_designer_json(model: BrickMixModel) -> Iterator[str]:
+    """
+    The DESIGNER_APPLICATION JSON as text chunks (compact separators, same
+    key order as a PD export). Step forms are built and encoded one by one.
+    """
+    name = model.protocol_name
+    stamp = model.created.strftime("%Y-%m-%dT%H:%M:%SZ")
+    stamp_ms = int(model.created.timestamp() * 1000)
+    yield '{"robot":{"model":"OT-2 Standard"},"designerApplication":'
+    yield f'{{"name":{_enc(PD_NAME)},"version":{_enc(PD_VERSION)},"data":{{'
+    yield '"pipetteTiprackAssignments":' + _enc(
+        {P10_ID: [TIP_RACK_URI], P300_ID: [FILTER_TIP_RACK_URI]}
+    )
+    yield ',"dismissedWarnings":{"form":[],"timeline":[]}'
+    yield ',"ingredients":' + _enc(_ingredients())
+    yield ',"ingredLocations":' + _enc(_ingred_locations(model))
+
+    yield ',"savedStepForms":{"__INITIAL_DECK_SETUP_STEP__":' + _enc(_deck_setup(model))
+    p0, p1, p2, p3, p4 = _split_step_form(model)
+    labware = {MOD_ID: _enc(MOD_ID), UNMOD_ID: _enc(UNMOD_ID)}
+    ids = []
+    for sid, source, well, dest in transfers(model):
+        sid = f'"{sid}"'
+        ids.append(sid)
+        yield f',{sid}:{p0}{sid}{p1}{labware[source]}{p2}["{well}"]{p3}["{dest}"]{p4}'
+    yield '},"orderedStepIds":['
+    yield ",".join(ids)
+    yield "]"
+
+    yield ',"pipettes":' + _enc(
+        {P10_ID: {"pipetteName": "p10_single"}, P300_ID: {"pipetteName": "p300_single"}}
+    )
+    yield ',"modules":{},"labware":' + _enc(_labware(model))
+    yield ',"metadata":' + _enc(
+        {"protocolName": name, "created": stamp, "lastUpdated": stamp, "lastModified": stamp}
+    )
+    yield "}}"
+    yield ',"metadata":' + _enc(
+        {
+            "protocolName": name,
+            "author": "",
+            "description": "",
+            "source": "Protocol Designer",
+            "created": stamp_ms,
+            "lastModified": stamp_ms,
+        }
+    )
+    yield "}"
+
+
+def write_designer_json(fh: IO[str], model: BrickMixModel) -> None:
+    for chunk in iter_designer_json(model):
+        fh.write(chunk)
+
+
+def designer_json(model: BrickMixModel) -> str:
+    return "".join(iter_designer_json(model))
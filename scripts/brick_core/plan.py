@@ -0,0 +1,177 @@
+"""
+RUN PLAN: LOADING SHEET + RUN-TIME ESTIMATE
+
+Replays the brick-mix loop of the generated protocols (templates/bm*.py.tmpl)
+without a robot: which pauses happen after which block, which bricks need
+a refill at each pause, how much stock each brick well needs, and a rough
+duration for every stage.
+
+Timings are coarse OT-2 averages for a P10 single-channel; they are meant
+for scheduling (when to come back to the robot), not for billing.
+"""
+
+import csv
+from typing import IO, Iterator
+
+from .layout import BLOCKS_PER_PLATE, BRICK_COUNT, DeckLayout, brick_source_well, dest_well_name
+from .render import SA_BM_VOL, SA_TOTAL_VOL, default_brick_stock, sa_buffer_vol
+
+PLAN_VERSION = 1
+
+# Seconds per robot action (rough averages, tune to your robot).
+TRANSFER_S = 20.0  # pick up tip, aspirate, dispense, drop tip
+MIX_CYCLE_S = 2.5  # one aspirate/dispense mixing cycle
+CHUNK_S = 6.0  # one extra aspirate/dispense of up to 10 µL
+SA_MIX_CYCLES = (10, 3)  # brick-mix pre-mix, reaction mix (templates/bm_sa)
+TC_PROFILE_MIN = (5, 30, 30, 30, 30)  # thermocycler hold times (min)
+TC_OVERHEAD_S = 600.0  # lid, ramps and the final hold set-up
+
+
+def _chunks(volume: float, max_vol: float = 10.0) -> int:
+    return int(-(-volume // max_vol)) if volume > 0 else 0
+
+
+def plan_run(
+    blocks: list[str],
+    layout: DeckLayout,
+    transfer_vol: float,
+    brick_stock: float | None,
+    mix_times: int = 0,
+    temp_vol: float | None = None,
+) -> dict:
+    """
+    Plan of one generated protocol (one shard).
+
+    temp_vol=None plans a brick-mix-only run (bm); otherwise the
+    self-assembly and thermocycler stages of bm_sa are added.
+    Returns plain JSON-serializable data.
+    """
+    if brick_stock is None:
+        brick_stock = default_brick_stock(transfer_vol)
+    threshold = transfer_vol + 5.0
+    per_transfer = TRANSFER_S + mix_times * MIX_CYCLE_S
+
+    unmod = {b: brick_stock for b in range(1, BRICK_COUNT + 1)}
+    mod = {b: brick_stock for b in range(2, BRICK_COUNT)}
+    uses = {"unmod": dict.fromkeys(unmod, 0), "mod": dict.fromkeys(mod, 0)}
+    refills = {"unmod": dict.fromkeys(unmod, 0), "mod": dict.fromkeys(mod, 0)}
+    low_unmod, low_mod = set(), set()
+
+    events = []
+    elapsed = 0.0
+    in_plate = in_tip_cycle = 0
+    total = len(blocks)
+    for block_idx, bits in enumerate(blocks):
+        if in_plate >= BLOCKS_PER_PLATE:
+            events.append({"kind": "pause", "reasons": ["rack"], "after_block": block_idx, "at_s": elapsed})
+            in_plate = 0
+        in_plate += 1
+        in_tip_cycle += 1
+
+        for brick in range(1, BRICK_COUNT + 1):
+            is_mod = 2 <= brick < BRICK_COUNT and bits[brick - 2] == "1"
+            stock, low, kind = (mod, low_mod, "mod") if is_mod else (unmod, low_unmod, "unmod")
+            stock[brick] -= transfer_vol
+            uses[kind][brick] += 1
+            if stock[brick] < threshold:
+                low.add(brick)
+        elapsed += BRICK_COUNT * per_transfer
+
+        last = block_idx + 1 == total
+        reasons = []
+        if (low_unmod or low_mod) and not last:
+            reasons.append("stock")
+        if in_tip_cycle >= layout.blocks_per_tip_cycle and not last:
+            reasons.append("tips")
+            in_tip_cycle = 0
+        if reasons:
+            events.append({
+                "kind": "pause",
+                "reasons": reasons,
+                "after_block": block_idx + 1,
+                "at_s": elapsed,
+                "refill_unmod": sorted(low_unmod),
+                "refill_mod": sorted(low_mod),
+            })
+            for b in low_unmod:
+                unmod[b] = brick_stock
+                refills["unmod"][b] += 1
+            for b in low_mod:
+                mod[b] = brick_stock
+                refills["mod"][b] += 1
+            low_unmod.clear()
+            low_mod.clear()
+
+    stages = {"brick_mix": elapsed}
+    if temp_vol is not None:
+        buffer_vol = sa_buffer_vol(temp_vol)
+        per_reaction = (
+            TRANSFER_S
+            + sum(SA_MIX_CYCLES) * MIX_CYCLE_S
+            + (_chunks(temp_vol) + _chunks(buffer_vol)) * CHUNK_S
+        )
+        events.append({"kind": "pause", "reasons": ["sa_setup"], "after_block": total, "at_s": elapsed})
+        stages["self_assembly"] = total * per_reaction
+        stages["thermocycler"] = sum(TC_PROFILE_MIN) * 60.0 + TC_OVERHEAD_S
+
+    return {
+        "version": PLAN_VERSION,
+        "kind": "bm" if temp_vol is None else "bm_sa",
+        "num_blocks": total,
+        "transfers": total * BRICK_COUNT,
+        "tips": total * BRICK_COUNT + (total if temp_vol is not None else 0),
+        "transfer_vol": transfer_vol,
+        "brick_stock": brick_stock,
+        "temp_vol": temp_vol,
+        "buffer_vol": None if temp_vol is None else sa_buffer_vol(temp_vol),
+        "layout": {
+            "tip_slots": list(layout.tip_slots),
+            "unmod_slot": layout.unmod_slot,
+            "mod_slot": layout.mod_slot,
+            "mix_slot": layout.mix_slot,
+            "tip_rack_name": layout.tip_rack_name,
+            "brick_plate_name": layout.brick_plate_name,
+        },
+        "uses": {kind: {str(b): n for b, n in u.items() if n} for kind, u in uses.items()},
+        "refills": {kind: {str(b): n for b, n in r.items() if n} for kind, r in refills.items()},
+        "events": events,
+        "estimate_s": {**stages, "total": sum(stages.values())},
+    }
+
+
+LOADING_COLUMNS = ["slot", "labware", "well", "contents", "load_ul", "transfers", "refills"]
+
+
+def loading_rows(plan: dict) -> Iterator[list]:
+    """Loading sheet rows (see LOADING_COLUMNS): what goes where before RUN."""
+    lay = plan["layout"]
+    for slot in lay["tip_slots"]:
+        yield [slot, lay["tip_rack_name"], "", "tips (full rack)", "", "", ""]
+    for kind, slot in (("unmod", lay["unmod_slot"]), ("mod", lay["mod_slot"])):
+        for brick, n in sorted(plan["uses"][kind].items(), key=lambda kv: int(kv[0])):
+            well = brick_source_well(int(brick))
+            refills = plan["refills"][kind].get(brick, 0)
+            yield [slot, lay["brick_plate_name"], well, f"{kind.upper()} brick {brick}",
+                   plan["brick_stock"], n, refills]
+    wells = plan["num_blocks"]
+    last = dest_well_name(min(wells, BLOCKS_PER_PLATE) - 1) if wells else ""
+    yield [lay["mix_slot"], lay["brick_plate_name"], f"A1..{last}", "empty (brick-mix destination)",
+           "", "", ""]
+    if plan["kind"] == "bm_sa":
+        yield [lay["unmod_slot"], lay["brick_plate_name"], "A1", "template DNA (after brick mixes)",
+               round(plan["temp_vol"] * wells + 5.0, 2), wells, ""]
+        yield [lay["mod_slot"], lay["brick_plate_name"], "A1", "TAE/Mg2+ buffer (after brick mixes)",
+               round(plan["buffer_vol"] * wells + 5.0, 2), wells, ""]
+        yield ["7", "thermocycler", "", f"empty PCR plate ({SA_TOTAL_VOL:g} µL reactions, "
+               f"{SA_BM_VOL:g} µL brick mix each)", "", "", ""]
+
+
+def write_loading_sheet(fh: IO[str], plan: dict) -> None:
+    writer = csv.writer(fh, lineterminator="\n")
+    writer.writerow(LOADING_COLUMNS)
+    writer.writerows(loading_rows(plan))
+
+
+def format_duration(seconds: float) -> str:
+    minutes = round(seconds / 60)
+    return f"{minutes // 60}h{minutes % 60:02d}m"
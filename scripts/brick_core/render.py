@@ -0,0 +1,414 @@
+"""
+PROTOCOL RENDERING
+
+Turns encoded blocks into OT-2 Python protocols by filling the cached
+templates in templates/ (see template.py):
+  build_bm_sa_protocol  brick mixes + self-assembly + thermocycler
+  build_bm_protocol     brick mixes only
+  build_sa_protocol     self-assembly only (brick mixes already made)
+  build_pcr_protocol    asymmetric PCR thermocycler program
+"""
+
+import base64
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import IO, Iterator
+
+from .layout import BLOCKS_PER_PLATE, BM_LAYOUT, BM_SA_LAYOUT, DEST_ROW_INDICES, DeckLayout
+from .template import render_to, render_to_path
+
+SA_TOTAL_VOL = 20.0  # self-assembly reaction volume (µL)
+SA_BM_VOL = 1.0  # brick mix per self-assembly reaction (µL)
+
+
+def default_brick_stock(transfer_vol: float) -> float:
+    """Enough stock for ~15 blocks per brick + 5 µL margin."""
+    return transfer_vol * 15 + 5.0
+
+
+def sa_buffer_vol(temp_vol: float) -> float:
+    """Buffer volume that tops 1 µL BM + template up to 20 µL."""
+    if temp_vol <= 0 or temp_vol >= SA_TOTAL_VOL - SA_BM_VOL:
+        raise ValueError(
+            f"temp-vol must be > 0 and < {SA_TOTAL_VOL - SA_BM_VOL}, got {temp_vol}"
+        )
+    return SA_TOTAL_VOL - SA_BM_VOL - temp_vol
+
+
+def _opt(value) -> str:
+    return "None" if value is None else str(value)
+
+
+BLOCKS_FORMATS = ("strings", "hex", "base64")
+
+
+def blocks_literal(
+    blocks: list[str], fmt: str = "strings", comment: bool = False
+) -> Iterator[str]:
+    """
+    Module-level definition of the blocks, streamed line by line.
+
+    strings: BLOCKS = ["0101...", ...]  (one 36-character literal per line)
+    hex:     BLOCKS_HEX = [0x..., ...]  (one int per block, 6 per line)
+    base64:  BLOCKS_B64 = "..."         (all blocks packed 2 per 9 bytes)
+
+    The compact forms define _unpack_blocks(); run() calls it once
+    (see blocks_unpack) to rebuild the same list of '0'/'1' strings.
+    Each form starts with a comment describing its encoding.
+    comment=True adds the human-readable bitstrings as comments.
+    """
+    if fmt == "strings":
+        yield "# Each element is a 36-character string of '0'/'1'.\n"
+        yield "BLOCKS = [\n"
+        for b in blocks:
+            yield f'    "{b}",\n'
+        yield "]"
+        return
+    if fmt not in BLOCKS_FORMATS:
+        raise ValueError(f"Unknown blocks format: {fmt}")
+
+    if fmt == "hex":
+        yield "# One int per block: its 36 bits, first bit most significant.\n"
+    else:
+        yield "# All blocks' bits concatenated, zero-padded to whole bytes, base64-encoded.\n"
+    if comment:
+        yield "#\n"
+        for i, b in enumerate(blocks):
+            yield f"#   {i:4d}: {b}\n"
+        yield "#\n"
+
+    if fmt == "hex":
+        yield "BLOCKS_HEX = [\n"
+        for i in range(0, len(blocks), 6):
+            yield "    " + " ".join(f"0x{int(b, 2):09x}," for b in blocks[i:i + 6]) + "\n"
+        yield "]\n\n\n"
+        yield "def _unpack_blocks():\n"
+        yield '    return [format(v, "036b") for v in BLOCKS_HEX]'
+        return
+
+    bits = "".join(blocks)
+    bits += "0" * (-len(bits) % 8)
+    packed = base64.b64encode(int(bits, 2).to_bytes(len(bits) // 8, "big")).decode("ascii")
+    yield f"NUM_PACKED_BLOCKS = {len(blocks)}\n"
+    yield "BLOCKS_B64 = (\n"
+    for i in range(0, len(packed), 76):
+        yield f'    "{packed[i:i + 76]}"\n'
+    yield ")\n\n\n"
+    yield "def _unpack_blocks():\n"
+    yield "    import base64\n\n"
+    yield "    raw = base64.b64decode(BLOCKS_B64)\n"
+    yield '    bits = format(int.from_bytes(raw, "big"), "0%db" % (len(raw) * 8))\n'
+    yield "    return [bits[i:i + 36] for i in range(0, NUM_PACKED_BLOCKS * 36, 36)]"
+
+
+def blocks_unpack(fmt: str) -> str:
+    """First statement of run(): rebuild BLOCKS from a compact definition."""
+    if fmt == "strings":
+        return ""
+    return "    BLOCKS = _unpack_blocks()  # list of 36-character '0'/'1' strings\n"
+
+
+def _write(name: str, params: dict, output_py: Path | IO[str]) -> str:
+    """Render to a path (atomically) or an open text stream; returns its name."""
+    if isinstance(output_py, (str, Path)):
+        render_to_path(name, params, Path(output_py))
+        return str(output_py)
+    render_to(output_py, name, params)
+    return output_py.name
+
+
+def brick_params(transfer_vol, brick_stock, mix_times, mix_vol, asp_flow, asp_depth) -> dict:
+    """Template parameters of the brick-mix stage."""
+    return {
+        "TRANSFER_VOL": transfer_vol,
+        "BRICK_STOCK": brick_stock,
+        "MIX_TIMES": mix_times,
+        "MIX_VOL": _opt(mix_vol),
+        "ASP_FLOW": _opt(asp_flow),
+        "ASP_DEPTH": _opt(asp_depth),
+    }
+
+
+@lru_cache(maxsize=None)
+def _layout_params(layout: DeckLayout) -> tuple:
+    return tuple(layout_params(layout).items())
+
+
+def layout_params(layout: DeckLayout) -> dict:
+    """Template parameters describing the deck."""
+    return {
+        "TIP_SLOTS": json.dumps(list(layout.tip_slots)),
+        "NUM_TIP_RACKS": len(layout.tip_slots),
+        "TIPS_PER_CYCLE": layout.tips_per_cycle,
+        "BLOCKS_PER_TIP_CYCLE": layout.blocks_per_tip_cycle,
+        "TIPS_PER_TIP_CYCLE": 38 * layout.blocks_per_tip_cycle,
+        "UNMOD_SLOT": layout.unmod_slot,
+        "MOD_SLOT": layout.mod_slot,
+        "MIX_SLOT": layout.mix_slot,
+        "TIP_RACK_NAME": layout.tip_rack_name,
+        "BRICK_PLATE_NAME": layout.brick_plate_name,
+        "SA_PLATE_NAME": layout.sa_plate_name,
+        "DEST_ROW_INDICES": str(DEST_ROW_INDICES),
+    }
+
+
+# ---------- BRICK MIX + SELF-ASSEMBLY ----------
+
+
+def build_bm_sa_protocol(
+    source_label: str,
+    blocks: list[str],
+    output_py: Path | IO[str],
+    transfer_vol: float,
+    brick_stock: float | None,
+    mix_times: int,
+    mix_vol: float | None,
+    asp_flow: float | None,
+    asp_depth: float | None,
+    temp_vol: float,
+    layout: DeckLayout = BM_SA_LAYOUT,
+    blocks_format: str = "strings",
+    blocks_comment: bool = False,
+) -> None:
+    """
+    Build a single OT-2 Python protocol that:
+      1) Creates brick mixes for each 36-bit block.
+      2) Sets up self-assembly reactions (1 µL BM + template + buffer to 20 µL).
+      3) Runs the thermocycler program.
+
+    source_label: human-readable label (either file name or the literal word).
+    blocks_format: "strings" (readable), "hex" or "base64" (compact, see blocks_literal).
+    """
+    num_blocks = len(blocks)
+    if num_blocks == 0:
+        raise ValueError("No blocks to encode.")
+
+    # One destination rack = 60 tubes (rows A, C, E, G, H)
+    if num_blocks > BLOCKS_PER_PLATE:
+        raise ValueError(
+            f"This builder currently supports at most {BLOCKS_PER_PLATE} blocks per run, "
+            f"but you have {num_blocks}. Use --shard-blocks to split into several protocols."
+        )
+
+    if brick_stock is None:
+        brick_stock = default_brick_stock(transfer_vol)
+    buffer_vol = sa_buffer_vol(temp_vol)
+
+    params = {
+        "SOURCE": source_label,
+        "NUM_BLOCKS": num_blocks,
+        "BLOCKS": blocks_literal(blocks, blocks_format, blocks_comment),
+        "BLOCKS_UNPACK": blocks_unpack(blocks_format),
+        "TEMP_VOL": temp_vol,
+        "BUFFER_VOL": buffer_vol,
+        "RXN_TOTAL_VOL": SA_TOTAL_VOL,
+        "BM_VOL": SA_BM_VOL,
+        **brick_params(transfer_vol, brick_stock, mix_times, mix_vol, asp_flow, asp_depth),
+        **dict(_layout_params(layout)),
+    }
+    output_name = _write("bm_sa", params, output_py)
+
+    print(f"Built multi-block protocol: {output_name}")
+    print(f"  Source: {source_label}")
+    print(f"  Blocks: {num_blocks}")
+    print(f"  Transfer volume: {transfer_vol} µL")
+    print(f"  Brick stock: {brick_stock} µL per brick well (initial)")
+    print(
+        f"  Self-assembly: 1 µL BM + {temp_vol} µL template + {buffer_vol} µL buffer = {SA_TOTAL_VOL} µL"
+    )
+
+
+# ---------- BRICK MIX ONLY ----------
+
+
+def build_bm_protocol(
+    source_label: str,
+    blocks: list[str],
+    output_py: Path | IO[str],
+    transfer_vol: float,
+    brick_stock: float | None,
+    mix_times: int,
+    mix_vol: float | None,
+    asp_flow: float | None,
+    asp_depth: float | None,
+    layout: DeckLayout = BM_LAYOUT,
+    blocks_format: str = "strings",
+    blocks_comment: bool = False,
+) -> None:
+    """
+    Build a single OT-2 Python protocol that encodes all blocks into brick mixes.
+    blocks_format: "strings" (readable), "hex" or "base64" (compact, see blocks_literal).
+    """
+    num_blocks = len(blocks)
+    if num_blocks == 0:
+        raise ValueError("No blocks to encode.")
+
+    if brick_stock is None:
+        brick_stock = default_brick_stock(transfer_vol)
+
+    params = {
+        "SOURCE": source_label,
+        "NUM_BLOCKS": num_blocks,
+        "BLOCKS": blocks_literal(blocks, blocks_format, blocks_comment),
+        "BLOCKS_UNPACK": blocks_unpack(blocks_format),
+        **brick_params(transfer_vol, brick_stock, mix_times, mix_vol, asp_flow, asp_depth),
+        **dict(_layout_params(layout)),
+    }
+    output_name = _write("bm", params, output_py)
+
+    print(f"Built multi-block protocol: {output_name}")
+    print(f"  File: {source_label}")
+    print(f"  Blocks: {num_blocks}")
+    print(f"  Transfer volume: {transfer_vol} µL")
+    print(f"  Brick stock: {brick_stock} µL per brick well (initial)")
+
+
+# ---------- SELF-ASSEMBLY ONLY ----------
+
+
+def build_sa_protocol(
+    source_label: str,
+    blocks: list[str],
+    output_py: Path | IO[str],
+    temp_vol: float,
+    layout: DeckLayout = BM_SA_LAYOUT,
+) -> None:
+    """
+    Build a self-assembly-only OT-2 protocol.
+
+    Assumptions:
+      - Brick mixes are already prepared in slot 2 in a PCR rack
+        (opentronspcrrack_96_wellplate_100ul) in sparse rows A,C,E,G,H:
+          A1–A12, C1–C12, E1–E12, G1–G12, H1–H12 (max 60 blocks).
+      - We only set up SA reactions:
+          1 µL BM + TEMP_VOL template + BUFFER_VOL buffer = 20 µL total.
+      - Template DNA in slot 5, A1 (same PCR-rack model).
+      - Buffer (TAE/Mg2+) in slot 4, A1 (same rack).
+      - ThermocyclerModuleV1 in slot 7, with a Nest 96-well PCR plate.
+    """
+    num_blocks = len(blocks)
+    if num_blocks == 0:
+        raise ValueError("No blocks to encode.")
+
+    if num_blocks > BLOCKS_PER_PLATE:
+        raise ValueError(
+            f"SA builder currently assumes at most {BLOCKS_PER_PLATE} blocks (one brick-mix rack), "
+            f"but you have {num_blocks}. Split your file or use multiple runs."
+        )
+
+    buffer_vol = sa_buffer_vol(temp_vol)
+
+    params = {
+        "SOURCE": source_label,
+        "NUM_BLOCKS": num_blocks,
+        "TEMP_VOL": temp_vol,
+        "BUFFER_VOL": buffer_vol,
+        "RXN_TOTAL_VOL": SA_TOTAL_VOL,
+        **dict(_layout_params(layout)),
+    }
+    output_name = _write("sa", params, output_py)
+
+    print(f"Built SA-only protocol: {output_name}")
+    print(f"  File: {source_label}")
+    print(f"  Blocks: {num_blocks}")
+    print(
+        f"  SA: 1 µL BM + {temp_vol} µL template + {buffer_vol} µL buffer = {SA_TOTAL_VOL} µL"
+    )
+
+
+# ---------- ASYMMETRIC PCR ----------
+
+TC_BLOCK_RANGE = (4.0, 99.0)  # ThermocyclerModuleV1 block (°C)
+TC_LID_RANGE = (37.0, 110.0)  # lid (°C)
+TC_MAX_VOLUME = 100.0  # µL per well
+
+Step = tuple[float, float]  # (temperature °C, hold seconds)
+
+
+def _check_temp(what: str, temp: float, bounds: tuple[float, float]) -> None:
+    if not bounds[0] <= temp <= bounds[1]:
+        raise ValueError(f"{what} must be {bounds[0]:g}–{bounds[1]:g} °C, got {temp:g}")
+
+
+def profile_literal(steps: list[Step]) -> str:
+    """execute_profile() steps as a Python list literal ("[]" for no steps)."""
+    if not steps:
+        return "[]"
+    items = "".join(
+        f'    {{"temperature": {temp:g}, "hold_time_seconds": {seconds:g}}},\n' for temp, seconds in steps
+    )
+    return "[\n" + items + "]"
+
+
+def pcr_profile_seconds(cycle: list[Step], cycles: int, initial: Step | None, final: Step | None) -> float:
+    """Total hold time of the program (block ramps not included)."""
+    holds = sum(seconds for _, seconds in cycle) * cycles
+    return holds + sum(step[1] for step in (initial, final) if step)
+
+
+def _describe(steps: list[Step]) -> str:
+    return ", ".join(f"{temp:g}°C {seconds:g} s" for temp, seconds in steps)
+
+
+def build_pcr_protocol(
+    output_py: Path | IO[str],
+    cycle: list[Step],
+    cycles: int,
+    initial: Step | None = None,
+    final: Step | None = None,
+    hold_temp: float | None = 25.0,
+    volume: float = 50.0,
+    lid_temp: float = 103.0,
+) -> None:
+    """
+    Build an asymmetric PCR thermocycler protocol.
+
+    The program is the optional initial denaturation, `cycles` repetitions of
+    `cycle` (denature/anneal/extend) and the optional final extension, each
+    one execute_profile() call; the cycle loop is passed as repetitions=cycles
+    instead of being unrolled step by step. Afterwards the block holds at
+    `hold_temp` (None: block off) and the lid heater is turned off.
+
+    Assumptions:
+      - ThermocyclerModuleV1 in slot 7 with the PCR plate already loaded.
+      - P10 single on the left with a 10 µL tip rack in slot 2 (no transfers).
+    """
+    if cycles < 1:
+        raise ValueError(f"cycles must be >= 1, got {cycles}")
+    if not cycle:
+        raise ValueError("The cycle needs at least one step.")
+    steps = [*cycle, *(step for step in (initial, final) if step)]
+    for temp, seconds in steps:
+        _check_temp("Step temperature", temp, TC_BLOCK_RANGE)
+        if seconds <= 0:
+            raise ValueError(f"Step hold time must be > 0 s, got {seconds:g}")
+    if hold_temp is not None:
+        _check_temp("Hold temperature", hold_temp, TC_BLOCK_RANGE)
+    _check_temp("Lid temperature", lid_temp, TC_LID_RANGE)
+    if not 0 < volume <= TC_MAX_VOLUME:
+        raise ValueError(f"volume must be > 0 and <= {TC_MAX_VOLUME:g} µL, got {volume:g}")
+
+    description = "; ".join(
+        part for part in (
+            initial and _describe([initial]),
+            f"{cycles} x ({_describe(cycle)})",
+            final and _describe([final]),
+            "hold " + (f"{hold_temp:g}°C" if hold_temp is not None else "off"),
+        ) if part
+    )
+    params = {
+        "CYCLES": cycles,
+        "DESCRIPTION": description,
+        "LID_TEMP": f"{lid_temp:g}",
+        "VOLUME": f"{volume:g}",
+        "INITIAL_STEPS": profile_literal([initial] if initial else []),
+        "CYCLE_STEPS": profile_literal(cycle),
+        "FINAL_STEPS": profile_literal([final] if final else []),
+        "HOLD_TEMP": "None" if hold_temp is None else f"{hold_temp:g}",
+    }
+    output_name = _write("pcr", params, output_py)
+
+    print(f"Built ASYM PCR protocol: {output_name}")
+    print(f"  Program: {description}")
+    print(f"  Volume: {volume:g} µL, lid {lid_temp:g}°C")
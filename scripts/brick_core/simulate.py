@@ -0,0 +1,218 @@
+"""
+OFFLINE PROTOCOL SIMULATOR
+
+Runs a generated protocol's run() against a small recording stand-in for
+the Opentrons Protocol API, so builders can be checked without the
+opentrons package or a robot. Only the protocol's own `import opentrons`
+is redirected (through the __import__ of its exec namespace); nothing is
+patched globally.
+
+The result is the command log: one (target, method, args, kwargs) tuple
+per API call, with labware, wells and liquid classes replaced by stable
+names. Two protocols that log the same commands behave the same on the
+robot as far as this API surface is concerned.
+"""
+
+import builtins
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, NamedTuple
+
+ROWS = "ABCDEFGH"
+COLUMNS = 12
+
+Command = tuple[str, str, tuple, tuple]
+
+
+class Location(NamedTuple):
+    well: "Well"
+    reference: str  # "bottom" | "top" | "center"
+    z: float
+
+    def __repr__(self) -> str:
+        return f"{self.well!r}.{self.reference}({self.z})"
+
+
+class Simulator:
+    """Holds the command log shared by all stand-in objects of one run."""
+
+    def __init__(self):
+        self.log: list[Command] = []
+        self._slots: dict[str, int] = {}
+
+    def record(self, target: str, method: str, args=(), kwargs=None) -> None:
+        kwargs = tuple(sorted((k, _norm(v)) for k, v in (kwargs or {}).items()))
+        self.log.append((target, method, tuple(_norm(a) for a in args), kwargs))
+
+    def labware_name(self, location) -> str:
+        """'labware@<slot>' (with a counter when a slot is reused after a move)."""
+        slot = str(location)
+        n = self._slots[slot] = self._slots.get(slot, 0) + 1
+        return f"labware@{slot}" if n == 1 else f"labware@{slot}#{n}"
+
+
+def _norm(value) -> Any:
+    """Stable, comparable form of an API argument."""
+    if isinstance(value, (Recorded, Well, Location, LiquidClass)):
+        return repr(value)
+    if isinstance(value, (list, tuple)):
+        return tuple(_norm(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _norm(v)) for k, v in value.items()))
+    return value
+
+
+class Recorded:
+    """Any method call on a Recorded object is logged and returns None."""
+
+    def __init__(self, sim: Simulator, name: str):
+        object.__setattr__(self, "_sim", sim)
+        object.__setattr__(self, "_name", name)
+
+    def __getattr__(self, attr):
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+
+        def call(*args, **kwargs):
+            self._sim.record(self._name, attr, args, kwargs)
+
+        return call
+
+    def __setattr__(self, attr, value):
+        self._sim.record(self._name, f"set {attr}", (value,))
+
+    def __repr__(self) -> str:
+        return self._name
+
+
+class Well:
+    def __init__(self, labware: "Labware", name: str):
+        self.labware = labware
+        self.well_name = name
+
+    def bottom(self, z: float = 0.0) -> Location:
+        return Location(self, "bottom", z)
+
+    def top(self, z: float = 0.0) -> Location:
+        return Location(self, "top", z)
+
+    def center(self) -> Location:
+        return Location(self, "center", 0.0)
+
+    def __repr__(self) -> str:
+        return f"{self.labware!r}:{self.well_name}"
+
+
+class Labware(Recorded):
+    """96-well geometry (A1..H12); wells() is column-major like the real API."""
+
+    def __init__(self, sim: Simulator, name: str):
+        super().__init__(sim, name)
+        by_name = {f"{r}{c}": Well(self, f"{r}{c}") for c in range(1, COLUMNS + 1) for r in ROWS}
+        object.__setattr__(self, "_wells", by_name)
+
+    def __getitem__(self, well_name: str) -> Well:
+        return self._wells[well_name]
+
+    def wells(self) -> list[Well]:
+        return list(self._wells.values())
+
+    def wells_by_name(self) -> dict[str, Well]:
+        return dict(self._wells)
+
+    def rows(self) -> list[list[Well]]:
+        return [[self._wells[f"{r}{c}"] for c in range(1, COLUMNS + 1)] for r in ROWS]
+
+    def columns(self) -> list[list[Well]]:
+        return [[self._wells[f"{r}{c}"] for r in ROWS] for c in range(1, COLUMNS + 1)]
+
+
+class Module(Recorded):
+    def load_labware(self, name, label=None, **kwargs) -> Labware:
+        labware = Labware(self._sim, f"{self._name}/{name}")
+        self._sim.record(self._name, "load_labware", (name,), dict(kwargs, label=label))
+        return labware
+
+
+class Pipette(Recorded):
+    def __init__(self, sim: Simulator, name: str):
+        super().__init__(sim, name)
+        object.__setattr__(self, "flow_rate", Recorded(sim, f"{name}.flow_rate"))
+
+
+class LiquidClass:
+    def __init__(self, name: str, properties: dict):
+        self.name = name
+        self.properties = properties
+
+    def __repr__(self) -> str:
+        return f"LiquidClass({self.name!r}, {_norm(self.properties)!r})"
+
+
+class ProtocolContext(Recorded):
+    def __init__(self, sim: Simulator):
+        super().__init__(sim, "protocol")
+        object.__setattr__(self, "fixed_trash", Recorded(sim, "fixed_trash"))
+
+    def load_labware(self, load_name, location, label=None, **kwargs) -> Labware:
+        labware = Labware(self._sim, self._sim.labware_name(location))
+        self._sim.record("protocol", "load_labware", (load_name, location), dict(kwargs, label=label))
+        return labware
+
+    def load_labware_from_definition(self, definition, location, label=None) -> Labware:
+        labware = Labware(self._sim, self._sim.labware_name(location))
+        uri = "{namespace}/{loadName}/{version}".format(
+            namespace=definition.get("namespace"),
+            loadName=definition.get("parameters", {}).get("loadName"),
+            version=definition.get("version"),
+        )
+        self._sim.record("protocol", "load_labware_from_definition", (uri, location), {"label": label})
+        return labware
+
+    def load_instrument(self, instrument_name, mount, **kwargs) -> Pipette:
+        self._sim.record("protocol", "load_instrument", (instrument_name, mount), kwargs)
+        return Pipette(self._sim, f"{instrument_name}@{mount}")
+
+    def load_module(self, module_name, location=None, **kwargs) -> Module:
+        self._sim.record("protocol", "load_module", (module_name, location), kwargs)
+        return Module(self._sim, f"{module_name}@{location}")
+
+    def define_liquid(self, name, *args, **kwargs) -> str:
+        self._sim.record("protocol", "define_liquid", (name, *args), kwargs)
+        return f"liquid:{name}"
+
+    def define_liquid_class(self, name, properties) -> LiquidClass:
+        # Not logged: classes show up (by value) in the calls that use them.
+        return LiquidClass(name, properties)
+
+
+def _fake_opentrons() -> SimpleNamespace:
+    api = SimpleNamespace(ProtocolContext=ProtocolContext)
+    types = SimpleNamespace(Location=Location, Point=NamedTuple("Point", [("x", float), ("y", float), ("z", float)]))
+    return SimpleNamespace(protocol_api=api, types=types)
+
+
+def _protocol_builtins() -> dict:
+    opentrons = _fake_opentrons()
+    real_import = builtins.__import__
+
+    def _import(name, globals=None, locals=None, fromlist=(), level=0):
+        if name == "opentrons" or name.startswith("opentrons."):
+            return opentrons
+        return real_import(name, globals, locals, fromlist, level)
+
+    return dict(vars(builtins), __import__=_import)
+
+
+def simulate_source(source: str, filename: str = "<protocol>") -> list[Command]:
+    """Exec a protocol's source and run(); returns the command log."""
+    namespace = {"__name__": "protocol", "__builtins__": _protocol_builtins()}
+    exec(compile(source, filename, "exec"), namespace)
+    sim = Simulator()
+    namespace["run"](ProtocolContext(sim))
+    return sim.log
+
+
+def simulate(path: Path) -> list[Command]:
+    path = Path(path)
+    return simulate_source(path.read_text(encoding="utf-8"), str(path))
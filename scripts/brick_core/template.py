@@ -0,0 +1,70 @@
+"""
+PRECOMPILED PROTOCOL TEMPLATES
+
+The generated protocols are mostly static text. Each template under
+templates/ is read once, split on its ${NAME} placeholders and cached as
+(literal, name, literal, name, ..., literal) segments. Rendering only walks
+the segments and writes them to the output stream, so batch generation is
+bound by I/O rather than string formatting. Iterable parameters (e.g. the
+block table) are written chunk by chunk as they are produced, and files
+are written atomically (see output.py), so a shard's output never has to
+fit in memory and a failed render never leaves a partial protocol.
+"""
+
+import io
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import IO, Iterable, Mapping
+
+from .output import atomic_write
+
+TEMPLATE_DIR = Path(__file__).resolve().parent / "templates"
+
+_PLACEHOLDER = re.compile(r"\$\{([A-Z][A-Z0-9_]*)\}")
+
+# A parameter is text, a number, or an iterable of text chunks (e.g. one
+# line per block).
+ParamValue = str | int | float | Iterable[str]
+
+
+@lru_cache(maxsize=None)
+def load_template(name: str) -> tuple[str, ...]:
+    """Segments of templates/<name>.py.tmpl; odd positions are parameter names."""
+    text = (TEMPLATE_DIR / f"{name}.py.tmpl").read_text(encoding="utf-8")
+    return tuple(_PLACEHOLDER.split(text))
+
+
+@lru_cache(maxsize=None)
+def template_params(name: str) -> frozenset[str]:
+    return frozenset(load_template(name)[1::2])
+
+
+def render_to(fh: IO[str], name: str, params: Mapping[str, ParamValue]) -> None:
+    """Stream the rendered template into an open text file."""
+    missing = template_params(name) - params.keys()
+    if missing:
+        raise KeyError(f"Template {name!r} is missing parameters: {sorted(missing)}")
+    for i, part in enumerate(load_template(name)):
+        if not i % 2:
+            fh.write(part)
+            continue
+        value = params[part]
+        if isinstance(value, str):
+            fh.write(value)
+        elif isinstance(value, (int, float)):
+            fh.write(str(value))
+        else:
+            fh.writelines(value)
+
+
+def render_to_path(name: str, params: Mapping[str, ParamValue], output_py: Path) -> None:
+    with atomic_write(output_py) as fh:
+        render_to(fh, name, params)
+
+
+def render(name: str, params: Mapping[str, ParamValue]) -> str:
+    """Render to a string (tests, previews)."""
+    buf = io.StringIO()
+    render_to(buf, name, params)
+    return buf.getvalue()
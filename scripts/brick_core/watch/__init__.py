@@ -0,0 +1,26 @@
+"""
+Run watcher for a fleet of OT-2 robots (scripts/watchdog.py is the CLI).
+
+Not imported by brick_core itself: the builders never need it.
+"""
+
+from .eta import RunProgress
+from .fleet import Event, Fleet, PollSchedule, Robot, RobotWatcher, load_robots, parse_robot
+from .http import HttpError, HttpPool
+from .notify import Notifier
+from .plans import load_plans
+
+__all__ = [
+    "Event",
+    "Fleet",
+    "HttpError",
+    "HttpPool",
+    "Notifier",
+    "PollSchedule",
+    "Robot",
+    "RobotWatcher",
+    "RunProgress",
+    "load_plans",
+    "load_robots",
+    "parse_robot",
+]
@@ -0,0 +1,112 @@
+"""
+LIVE RUN PROGRESS + ETA
+
+RunProgress follows one run through its finished commands: transfers
+(tip pick-ups) and pauses (waitForResume) done, when the run started and
+how long it has waited for the operator. With the run's plan it predicts
+the time left and the time to the next pause.
+
+The plan's per-transfer times (plan.TRANSFER_S etc.) are averages; the
+robot at hand is faster or slower. The prediction scales the plan's
+remaining pipetting work by the observed speed (robot time between the
+first and the latest tip pick-up, less pauses / planned time of those
+transfers) once a few transfers are done,
+adds the thermocycler stage as planned and, for the pauses still to come,
+the operator's mean response time so far.
+"""
+
+from datetime import datetime
+
+from .plans import PAUSE_COMMANDS, TRANSFER_COMMANDS, command_type, pause_points
+
+MIN_TRANSFERS = 5  # before this, the plan's own timings are used
+PROFILE_COMMAND = "thermocycler/runProfile"
+
+
+def _time(stamp: str | None) -> datetime | None:
+    return datetime.fromisoformat(stamp) if stamp else None
+
+
+class RunProgress:
+    """Where a run is relative to its plan (plan=None: counts only)."""
+
+    def __init__(self, plan: dict | None = None):
+        self.plan = plan
+        self.pauses = pause_points(plan) if plan else []  # transfers done at each planned pause
+        self.transfers = 0
+        self.pauses_done = 0
+        self.paused_s = 0.0
+        self.responses: list[float] = []
+        self.first: datetime | None = None  # start of the first transfer
+        self.active_s = 0.0  # robot time from the first transfer to the start of the latest, less pauses
+        self.waiting = False  # the current command is a pause
+        self.profiled = False  # the thermocycler profile has run
+
+    def observe(self, finished: list[dict], current: dict | None) -> None:
+        for command in finished:
+            kind = command_type(command)
+            start, end = _time(command.get("startedAt")), _time(command.get("completedAt"))
+            if kind in TRANSFER_COMMANDS:
+                self.transfers += 1
+                if start:
+                    self.first = self.first or start
+                    self.active_s = (start - self.first).total_seconds() - self.paused_s
+            elif kind == PROFILE_COMMAND:
+                self.profiled = True
+            elif kind in PAUSE_COMMANDS:
+                self.pauses_done += 1
+                if start and end:
+                    self.responses.append((end - start).total_seconds())
+                    self.paused_s += self.responses[-1]
+        self.waiting = current is not None and command_type(current) in PAUSE_COMMANDS
+
+    def transfers_to_pause(self) -> int | None:
+        """Transfers left before the next planned pause (None: no plan or no pause left)."""
+        if self.pauses_done >= len(self.pauses):
+            return None
+        return max(0, self.pauses[self.pauses_done] - self.transfers)
+
+    def _planned_work(self, transfers: int) -> float:
+        """Planned pipetting seconds of the first `transfers` transfers."""
+        plan, stages = self.plan, self.plan["estimate_s"]
+        mix = plan["transfers"]
+        done_mix = min(transfers, mix)
+        work = stages["brick_mix"] * done_mix / mix if mix else 0.0
+        if transfers > mix and "self_assembly" in stages:
+            work += stages["self_assembly"] * min(transfers - mix, plan["num_blocks"]) / plan["num_blocks"]
+        return work
+
+    def speed(self) -> float:
+        """Observed / planned time of the transfers timed so far (1.0 until MIN_TRANSFERS)."""
+        if self.transfers < MIN_TRANSFERS:
+            return 1.0
+        planned = self._planned_work(self.transfers - 1)  # the latest transfer has only started
+        return self.active_s / planned if planned > 0 and self.active_s > 0 else 1.0
+
+    def estimate(self) -> dict | None:
+        """remaining_s (incl. expected operator waits), next_pause_s and the inputs used."""
+        if not self.plan:
+            return None
+        k = self.speed()
+        total = self.plan["tips"]
+        pipetting = k * (self._planned_work(total) - self._planned_work(self.transfers))
+        thermocycler = 0.0 if self.profiled else self.plan["estimate_s"].get("thermocycler", 0.0)
+        pauses_left = len(self.pauses) - self.pauses_done
+        mean_response = sum(self.responses) / len(self.responses) if self.responses else 0.0
+        waits = mean_response * pauses_left
+        left = self.transfers_to_pause()
+        if self.waiting:
+            next_pause = 0.0
+        elif left is None:
+            next_pause = None
+        else:
+            next_pause = k * (self._planned_work(self.transfers + left) - self._planned_work(self.transfers))
+        return {
+            "transfers": self.transfers,
+            "transfers_total": total,
+            "speed": round(k, 3),
+            "pauses_left": pauses_left,
+            "operator_wait_s": waits,
+            "next_pause_s": next_pause,
+            "remaining_s": pipetting + thermocycler + waits,
+        }
@@ -0,0 +1,380 @@
+"""
+STAND-IN OT-2 ROBOT SERVER
+
+A local fake of the parts of the robot HTTP API the watcher reads:
+
+    GET /runs[?pageLength=N]               newest runs, links.current
+    GET /runs/{id}                         one run
+    GET /runs/{id}/commands?cursor&pageLength
+    GET /protocols/{id}                    protocol files
+    GET /health
+
+Runs are replayed from a script of (commandType, seconds, params): either
+simulated from a generated protocol (brick_core.simulate, timed with the
+plan's per-action estimates) or recorded from a real robot (the JSON of
+/runs/{id}/commands). Like a Python protocol on the robot, commands show
+up as they start; waitForResume pauses the run until resume() is called
+or the simulated operator reacts after `resume_after` seconds.
+
+State advances lazily on each request, from the clock (`speed` robot
+seconds per real second), so an idle fake costs nothing and tests can
+drive it with their own clock. Timestamps are robot time.
+
+FakeWebhook receives the watcher's webhook notifications.
+"""
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable
+
+from ..plan import CHUNK_S, MIX_CYCLE_S, TRANSFER_S
+from ..simulate import simulate
+
+# Seconds per simulated command: a transfer (pickUpTip..dropTip) takes
+# TRANSFER_S, an aspirate + dispense CHUNK_S, as in the plan's estimate.
+COMMAND_S = {"pickUpTip": 6.0, "aspirate": CHUNK_S / 2, "dispense": CHUNK_S / 2,
+             "dropTip": TRANSFER_S - 6.0 - CHUNK_S}
+MODULE_S = 30.0  # lid moves, temperature set points (ramp)
+
+SIMULATED_TYPES = {
+    "load_labware": "loadLabware",
+    "load_labware_from_definition": "loadLabware",
+    "load_instrument": "loadPipette",
+    "load_module": "loadModule",
+    "comment": "comment",
+    "pause": "waitForResume",
+    "pick_up_tip": "pickUpTip",
+    "aspirate": "aspirate",
+    "dispense": "dispense",
+    "drop_tip": "dropTip",
+    "blow_out": "blowout",
+    "touch_tip": "touchTip",
+    "delay": "waitForDuration",
+    "open_lid": "thermocycler/openLid",
+    "close_lid": "thermocycler/closeLid",
+    "set_block_temperature": "thermocycler/setTargetBlockTemperature",
+    "set_lid_temperature": "thermocycler/setTargetLidTemperature",
+    "execute_profile": "thermocycler/runProfile",
+    "deactivate_lid": "thermocycler/deactivateLid",
+    "deactivate_block": "thermocycler/deactivateBlock",
+}
+INSTANT = {"loadLabware", "loadPipette", "loadModule", "comment"}
+
+
+@dataclass
+class Step:
+    command_type: str
+    seconds: float
+    params: dict = field(default_factory=dict)
+
+
+def _profile_seconds(kwargs: dict) -> float:
+    hold = sum(60 * dict(s).get("hold_time_minutes", 0) + dict(s).get("hold_time_seconds", 0)
+               for s in kwargs.get("steps", ()))
+    return hold * kwargs.get("repetitions", 1) + MODULE_S
+
+
+def simulated_script(protocol: Path) -> list[Step]:
+    """Steps of a generated protocol, from its offline simulation."""
+    steps = []
+    for _, method, args, kwargs in simulate(protocol):
+        kwargs = dict(kwargs)
+        kind = SIMULATED_TYPES.get(method)
+        if method == "mix":  # the engine runs a mix as aspirate/dispense pairs
+            steps += [Step(t, MIX_CYCLE_S / 2) for _ in range(args[0]) for t in ("aspirate", "dispense")]
+        elif kind == "thermocycler/runProfile":
+            steps.append(Step(kind, _profile_seconds(kwargs)))
+        elif kind == "waitForDuration":
+            steps.append(Step(kind, float(args[0] if args else kwargs.get("seconds", 0))))
+        elif kind == "comment" or kind == "waitForResume":
+            steps.append(Step(kind, 0.0, {"message": args[0] if args else kwargs.get("msg", "")}))
+        elif kind:
+            steps.append(Step(kind, 0.0 if kind in INSTANT else COMMAND_S.get(kind, MODULE_S)))
+    return steps
+
+
+def _seconds(start: str | None, end: str | None) -> float:
+    if not start or not end:
+        return 0.0
+    return (datetime.fromisoformat(end) - datetime.fromisoformat(start)).total_seconds()
+
+
+def recorded_script(path: Path) -> tuple[list[Step], dict]:
+    """
+    Steps of a recorded run plus its protocol resource: a JSON file with the
+    robot's /runs/{id}/commands output ("data", or "commands") and optionally
+    "protocol" (the /protocols/{id} data). Pauses keep no recorded duration:
+    the replay's operator decides when to resume.
+    """
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    steps = []
+    for c in data.get("commands", data.get("data", [])):
+        seconds = 0.0 if c["commandType"] == "waitForResume" else _seconds(c.get("startedAt"), c.get("completedAt"))
+        steps.append(Step(c["commandType"], seconds, c.get("params") or {}))
+    return steps, data.get("protocol") or {"files": [{"name": Path(path).stem + ".py", "role": "main"}]}
+
+
+def load_script(path: Path) -> tuple[list[Step], dict]:
+    """(steps, protocol resource) of a generated protocol (.py) or a recorded run (.json)."""
+    path = Path(path)
+    if path.suffix == ".py":
+        return simulated_script(path), {"files": [{"name": path.name, "role": "main"}]}
+    return recorded_script(path)
+
+
+def _iso(t: datetime) -> str:
+    return t.isoformat()
+
+
+class Replay:
+    """Advances one run through its script as the clock moves on."""
+
+    def __init__(self, run: dict, commands: list, steps: list[Step], speed: float,
+                 resume_after: float | None, now: float):
+        self.run = run
+        self.commands = commands
+        self.steps = steps
+        self.speed = speed
+        self.resume_after = resume_after
+        self.t0 = now
+        self.epoch = datetime.now(timezone.utc)
+        self.t = 0.0  # robot time when the current step started
+        self.index = 0
+        self.resume_t: float | None = None
+        self.pauses: list[tuple[float, float | None]] = []  # (start, end) robot time
+
+    def stamp(self, t: float) -> str:
+        return _iso(self.epoch + timedelta(seconds=t))
+
+    def resume(self, now: float) -> None:
+        self.update(now)
+        if self.run["status"] == "paused":
+            self.resume_t = (now - self.t0) * self.speed
+
+    def _start(self, step: Step) -> dict:
+        command = {
+            "id": f"{self.run['id']}-cmd-{self.index}",
+            "key": f"{self.index}",
+            "commandType": step.command_type,
+            "params": step.params,
+            "status": "running",
+            "createdAt": self.stamp(self.t),
+            "startedAt": self.stamp(self.t),
+        }
+        self.commands.append(command)
+        return command
+
+    def update(self, now: float) -> None:
+        robot_now = (now - self.t0) * self.speed
+        if self.run["status"] == "idle":
+            self.run["status"] = "running"
+            self.run["startedAt"] = self.stamp(0.0)
+        while self.index < len(self.steps) and self.run["status"] in ("running", "paused"):
+            step = self.steps[self.index]
+            command = self.commands[-1] if len(self.commands) > self.index else self._start(step)
+            if step.command_type == "waitForResume":
+                if self.run["status"] != "paused":
+                    self.run["status"] = "paused"
+                    self.pauses.append((self.t, None))
+                end = self.resume_t
+                if end is None and self.resume_after is not None:
+                    end = self.t + self.resume_after
+                if end is None or robot_now < end:
+                    return
+                self.resume_t = None
+                self.pauses[-1] = (self.pauses[-1][0], end)
+                self.run["status"] = "running"
+            else:
+                end = self.t + step.seconds
+                if robot_now < end:
+                    return
+            command["status"] = "succeeded"
+            command["completedAt"] = self.stamp(end)
+            self.t = end
+            self.index += 1
+        if self.index >= len(self.steps) and self.run["status"] == "running":
+            self.run["status"] = "succeeded"
+            self.run["completedAt"] = self.stamp(self.t)
+
+
+class _Server:
+    """
+    serve()/close() of the stand-ins. close() also ends open keep-alive
+    connections, whose handlers would otherwise still wait in readuntil
+    when the loop shuts down (and log their cancellation).
+    """
+
+    server: asyncio.AbstractServer | None = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        raise NotImplementedError
+
+    async def _connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._connections[task] = writer
+        try:
+            await self._handle(reader, writer)
+        except asyncio.CancelledError:
+            writer.close()  # close() or loop shutdown: end the connection quietly
+        finally:
+            self._connections.pop(task, None)
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Start listening (port 0: any free port); returns the port."""
+        self._connections: dict[asyncio.Task, asyncio.StreamWriter] = {}
+        self.server = await asyncio.start_server(self._connection, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        if self.server:
+            self.server.close()
+            tasks = list(self._connections)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self.server.wait_closed()
+
+
+class FakeRobot(_Server):
+    """
+    In-memory robot server state with an HTTP front end (serve()).
+
+    queue() adds runs to replay one after the other; history() adds old,
+    finished runs so /runs grows like a robot in long use.
+    """
+
+    def __init__(self, name: str = "fake", speed: float = 1.0, resume_after: float | None = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.speed = speed
+        self.resume_after = resume_after
+        self.clock = clock
+        self.runs: list[dict] = []
+        self.commands: dict[str, list[dict]] = {}
+        self.protocols: dict[str, dict] = {}
+        self.replays: dict[str, Replay] = {}
+        self.pending: list[tuple[list[Step], dict]] = []
+        self.paths: list[str] = []
+
+    def history(self, count: int) -> None:
+        for i in range(count):
+            self.runs.insert(0, {"id": f"history-{i}", "status": "succeeded", "current": False,
+                                 "createdAt": "2025-01-01T00:00:00+00:00", "protocolId": None})
+            self.commands[f"history-{i}"] = []
+
+    def queue(self, steps: list[Step], protocol: dict) -> None:
+        self.pending.append((steps, protocol))
+
+    def add_run(self, run_id: str, status: str = "idle", protocol_id: str | None = None) -> dict:
+        """A run whose state the caller sets itself (no replay)."""
+        for run in self.runs:
+            run["current"] = False
+        run = {"id": run_id, "status": status, "current": True, "protocolId": protocol_id,
+               "createdAt": _iso(datetime.now(timezone.utc) + timedelta(microseconds=len(self.runs)))}
+        self.runs.append(run)
+        self.commands[run_id] = []
+        return run
+
+    def resume(self, run_id: str | None = None) -> None:
+        replay = self.replays[run_id or self.runs[-1]["id"]]
+        replay.resume(self.clock())
+
+    def update(self) -> None:
+        now = self.clock()
+        current = self.replays.get(self.runs[-1]["id"]) if self.runs else None
+        if current:
+            current.update(now)
+        while self.pending and (not self.runs or self.runs[-1]["status"] in ("succeeded", "failed", "stopped")):
+            steps, protocol = self.pending.pop(0)
+            protocol_id = f"protocol-{len(self.protocols) + 1}"
+            self.protocols[protocol_id] = {"id": protocol_id, **protocol}
+            run = self.add_run(f"run-{len(self.replays) + 1}", protocol_id=protocol_id)
+            self.replays[run["id"]] = Replay(run, self.commands[run["id"]], steps, self.speed,
+                                             self.resume_after, now)
+            self.replays[run["id"]].update(now)
+
+    # ---------- HTTP ----------
+
+    def respond(self, path: str) -> tuple[int, dict]:
+        self.paths.append(path)
+        self.update()
+        path, _, query = path.partition("?")
+        params = dict(kv.split("=", 1) for kv in query.split("&") if "=" in kv)
+        parts = path.strip("/").split("/")
+        current = next((r for r in reversed(self.runs) if r.get("current")), None)
+        links = {"current": {"href": f"/runs/{current['id']}"}} if current else {}
+        if parts == ["health"]:
+            return 200, {"name": self.name, "api_version": "fake", "robot_model": "OT-2 Standard"}
+        if parts == ["runs"]:
+            length = int(params.get("pageLength", len(self.runs)))
+            runs = self.runs[max(0, len(self.runs) - length):] if length else []
+            return 200, {"data": runs, "links": links,
+                         "meta": {"cursor": len(self.runs) - len(runs), "totalLength": len(self.runs)}}
+        if len(parts) == 2 and parts[0] == "protocols" and parts[1] in self.protocols:
+            return 200, {"data": self.protocols[parts[1]]}
+        run = next((r for r in self.runs if len(parts) >= 2 and r["id"] == parts[1]), None)
+        if parts[0] != "runs" or run is None:
+            return 404, {"errors": [{"id": "NotFound", "detail": f"{path} not found"}]}
+        if len(parts) == 2:
+            return 200, {"data": run}
+        if parts[2:] == ["commands"]:
+            commands = self.commands[run["id"]]
+            length = int(params.get("pageLength", 20))
+            # Without a cursor the robot pages around the current command.
+            cursor = int(params["cursor"]) if "cursor" in params else max(0, len(commands) - length)
+            page = commands[cursor:cursor + length]
+            return 200, {"data": page, "meta": {"cursor": cursor, "totalLength": len(commands)}}
+        return 404, {"errors": [{"id": "NotFound", "detail": f"{path} not found"}]}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                method, path, _ = head.split(b"\r\n", 1)[0].decode("latin-1").split(" ", 2)
+                status, data = self.respond(path) if method == "GET" else (405, {"errors": []})
+                body = json.dumps(data).encode()
+                reason = {200: "OK", 404: "Not Found", 405: "Method Not Allowed"}[status]
+                writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                             f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+class FakeWebhook(_Server):
+    """
+    Local stand-in for a chat/paging webhook: accepts POSTed JSON and keeps
+    it in `received`. `delay` (seconds) makes it a slow receiver.
+    """
+
+    def __init__(self, delay: float = 0.0, on_receive: Callable[[dict], None] | None = None):
+        self.delay = delay
+        self.on_receive = on_receive
+        self.received: list[dict] = []
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+                length = next((int(line.split(":", 1)[1]) for line in head.split("\r\n")
+                               if line.lower().startswith("content-length:")), 0)
+                data = json.loads(await reader.readexactly(length)) if length else None
+                await asyncio.sleep(self.delay)
+                if head.startswith("POST ") and data is not None:
+                    self.received.append(data)
+                    if self.on_receive:
+                        self.on_receive(data)
+                    writer.write(b"HTTP/1.1 204 No Content\r\nContent-Length: 0\r\n\r\n")
+                else:
+                    writer.write(b"HTTP/1.1 405 Method Not Allowed\r\nContent-Length: 0\r\n\r\n")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,358 @@
+"""
+FLEET WATCHER
+
+One asyncio loop polls every robot of the fleet concurrently. Each robot
+has its own RobotWatcher (a small state machine: connecting -> online <->
+offline, plus the current run and its status) with exponential backoff
+while it is unreachable. All watchers push Events into one queue, and a
+single consumer hands them on in order: one consolidated status stream,
+no interleaved output, and nothing but sleeping sockets between polls.
+"""
+
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from .http import HttpError, HttpPool
+from .eta import RunProgress
+from .plans import protocol_file
+
+DEFAULT_PORT = 31950
+POLL_INTERVAL_SEC = 5.0  # while a run is active
+IDLE_INTERVAL_SEC = 30.0  # no run, or the run has not started / has finished
+NEAR_PAUSE_INTERVAL_SEC = 1.0  # a planned pause is at most NEAR_PAUSE_TRANSFERS away
+NEAR_PAUSE_TRANSFERS = 2
+MAX_BACKOFF_SEC = 60.0
+OFFLINE_AFTER = 2  # consecutive failed polls before a robot is reported offline
+RUNS_PAGE = 1  # /runs scan: the robot returns the most recently created runs
+COMMAND_PAGE = 50
+MAX_COMMAND_PAGES = 4  # per poll; a watcher that fell behind catches up over several polls
+
+FINISHED = {"succeeded", "failed", "stopped"}
+COMMAND_DONE = {"succeeded", "failed"}
+
+POLL_ERRORS = (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, HttpError, ValueError)
+
+
+@dataclass(frozen=True)
+class Robot:
+    name: str
+    host: str
+    port: int = DEFAULT_PORT
+
+    @property
+    def address(self) -> str:
+        return f"{self.host}:{self.port}"
+
+
+def parse_robot(spec: str) -> Robot:
+    """'name=host[:port]' or 'host[:port]' (the name is then the host)."""
+    name, sep, address = spec.partition("=")
+    if not sep:
+        name, address = "", spec
+    address = address.strip()
+    host, _, port = address.rpartition(":") if ":" in address else (address, "", "")
+    if not host:
+        raise ValueError(f"Bad robot spec: {spec!r} (expected NAME=HOST[:PORT])")
+    return Robot(name.strip() or host, host, int(port) if port else DEFAULT_PORT)
+
+
+def load_robots(path: Path) -> list[Robot]:
+    """
+    Robot list from a JSON or YAML file: either a list or {"robots": [...]},
+    each entry a "name=host:port" string or {"name", "host", "port"}.
+    """
+    path = Path(path)
+    text = path.read_text(encoding="utf-8")
+    if path.suffix.lower() in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError(f"{path}: YAML robot files need PyYAML (pip install pyyaml); or use JSON.") from None
+        try:
+            data = yaml.safe_load(text)
+        except yaml.YAMLError as e:
+            raise ValueError(f"{path}: {e}") from None
+    else:
+        data = json.loads(text)
+    entries = data.get("robots", []) if isinstance(data, dict) else data
+    robots = []
+    for entry in entries or []:
+        if isinstance(entry, str):
+            robots.append(parse_robot(entry))
+        else:
+            robots.append(Robot(entry.get("name") or entry["host"], entry["host"],
+                                int(entry.get("port", DEFAULT_PORT))))
+    return robots
+
+
+def check_unique(robots: list[Robot]) -> None:
+    seen = set()
+    for robot in robots:
+        if robot.name in seen:
+            raise ValueError(f"Duplicate robot name: {robot.name}")
+        seen.add(robot.name)
+
+
+@dataclass
+class Event:
+    """One entry of the status stream."""
+
+    robot: str
+    kind: str  # "online" | "offline" | "error" | "run" | "status" | "commands"
+    run_id: str | None = None
+    status: str | None = None
+    previous: str | None = None
+    detail: str = ""
+    time: float = field(default_factory=time.time)
+    data: dict = field(default_factory=dict)
+
+    def format(self) -> str:
+        if self.kind == "run":
+            text = f"New run detected: {self.run_id} (status={self.status})"
+        elif self.kind == "status":
+            text = f"Run {self.run_id} status changed: {self.previous} -> {self.status}"
+        elif self.kind == "commands":
+            text = f"Run {self.run_id}: {self.data['done']}/{self.data['total']} commands done"
+        else:
+            text = self.kind
+        return f"{self.robot}: {text}" + (f" ({self.detail})" if self.detail else "")
+
+
+@dataclass(frozen=True)
+class PollSchedule:
+    """Poll interval per watcher phase ("idle", "active", "near_pause")."""
+
+    idle: float = IDLE_INTERVAL_SEC
+    active: float = POLL_INTERVAL_SEC
+    near_pause: float = NEAR_PAUSE_INTERVAL_SEC
+    near_transfers: int = NEAR_PAUSE_TRANSFERS
+
+    @classmethod
+    def fixed(cls, interval: float) -> "PollSchedule":
+        return cls(interval, interval, interval)
+
+    def interval(self, phase: str) -> float:
+        return getattr(self, phase)
+
+
+def latest_run(runs: list[dict]) -> dict | None:
+    """Most recent run by createdAt."""
+    return max(runs, key=lambda r: r.get("createdAt", ""), default=None)
+
+
+class RobotWatcher:
+    """
+    Polls one robot; emits Events on connectivity, run, status and command progress.
+
+    The current run is found once with a short /runs scan; after that each
+    poll reads only /runs/{id} and the commands past `cursor` (the first
+    command not yet finished), so a poll costs the same however long the
+    robot's run history and the run's command list grow. The scan runs again
+    only when that run stops being the robot's current run (or is deleted).
+
+    The poll interval follows the run: slow while idle, faster while a run
+    is active, fastest shortly before a pause of the run's plan (if `plans`
+    has one for the run's protocol file), so pause alerts come quickly
+    without polling every robot fast all the time.
+    """
+
+    def __init__(
+        self,
+        robot: Robot,
+        pool: HttpPool,
+        emit: Callable[[Event], None],
+        schedule: PollSchedule = PollSchedule(),
+        max_backoff: float = MAX_BACKOFF_SEC,
+        plans: dict[str, dict] | None = None,
+        on_poll: Callable[[str, float, bool], None] | None = None,
+    ):
+        self.robot = robot
+        self.pool = pool
+        self.emit = emit
+        self.schedule = schedule
+        self.max_backoff = max_backoff
+        self.plans = plans or {}
+        self.on_poll = on_poll  # (robot name, seconds, ok) after every poll, e.g. for metrics
+        self.state = "connecting"
+        self.failures = 0
+        self.scans = 0
+        self.run_id: str | None = None
+        self.status: str | None = None
+        self.cursor = 0  # index of the first unfinished command of the run
+        self.total_commands = 0
+        self.current_command: dict | None = None
+        self.progress = RunProgress()
+        self._rng = random.Random()
+
+    def _event(self, kind: str, **kwargs) -> None:
+        self.emit(Event(self.robot.name, kind, **kwargs))
+
+    async def _get(self, path: str):
+        return await self.pool.get_json(self.robot.host, self.robot.port, path) or {}
+
+    async def poll(self) -> None:
+        started = time.perf_counter()
+        try:
+            run = await self._current_run()
+            plan = await self._find_plan(run) if run and run.get("id") != self.run_id else None
+            start, page = await self._new_commands(run) if run else (0, {})
+        except POLL_ERRORS as e:
+            if self.on_poll:
+                self.on_poll(self.robot.name, time.perf_counter() - started, False)
+            self.failures += 1
+            if self.failures == 1:
+                self._event("error", detail=str(e) or type(e).__name__)
+            if self.failures >= OFFLINE_AFTER and self.state != "offline":
+                self.state = "offline"
+                self._event("offline", detail=f"{self.failures} failed polls")
+            return
+        if self.on_poll:
+            self.on_poll(self.robot.name, time.perf_counter() - started, True)
+        self.failures = 0
+        if self.state != "online":
+            self.state = "online"
+            self._event("online", detail=self.robot.address)
+        self.observe(run, plan)
+        if page:
+            self.observe_commands(start, page)
+
+    async def _current_run(self) -> dict | None:
+        if self.run_id is not None:
+            try:
+                run = (await self._get(f"/runs/{self.run_id}")).get("data")
+            except HttpError as e:
+                if e.status != 404:
+                    raise
+                run = None
+            if run and run.get("current", True):
+                return run
+        self.scans += 1
+        return latest_run((await self._get(f"/runs?pageLength={RUNS_PAGE}")).get("data", []))
+
+    async def _find_plan(self, run: dict) -> dict | None:
+        if not self.plans or not run.get("protocolId"):
+            return None
+        protocol = (await self._get(f"/protocols/{run['protocolId']}")).get("data", {})
+        return self.plans.get(protocol_file(protocol))
+
+    def _settled(self, run: dict) -> bool:
+        """Nothing more to read: not started yet, or finished and fully read."""
+        status = run.get("status")
+        if run.get("id") != self.run_id:
+            return status == "idle"
+        return status == "idle" or status in FINISHED and self.cursor >= self.total_commands
+
+    async def _new_commands(self, run: dict) -> tuple[int, dict]:
+        """(cursor, merged pages) from the cursor up to the first unfinished command."""
+        if self._settled(run):
+            return 0, {}
+        start = self.cursor if run.get("id") == self.run_id else 0
+        data, total = [], 0
+        for _ in range(MAX_COMMAND_PAGES):
+            page = await self._get(
+                f"/runs/{run['id']}/commands?cursor={start + len(data)}&pageLength={COMMAND_PAGE}")
+            data += page.get("data", [])
+            total = page.get("meta", {}).get("totalLength", len(data))
+            if not page.get("data") or start + len(data) >= total:
+                break
+            if any(c.get("status") not in COMMAND_DONE for c in page["data"]):
+                break  # the cursor stops in this page
+        return start, {"data": data, "total": total}
+
+    def observe(self, run: dict | None, plan: dict | None = None) -> None:
+        if run is None:
+            return
+        run_id, status = run.get("id"), run.get("status")
+        if run_id != self.run_id:
+            self.run_id, self.status = run_id, status
+            self.cursor = self.total_commands = 0
+            self.current_command = None
+            self.progress = RunProgress(plan)
+            detail = f"plan {plan['protocol']}: {len(self.progress.pauses)} pauses" if plan else ""
+            self._event("run", run_id=run_id, status=status, detail=detail,
+                        data={"plan": plan["protocol"] if plan else None})
+        elif status != self.status:
+            previous, self.status = self.status, status
+            self._event("status", run_id=run_id, status=status, previous=previous)
+
+    def observe_commands(self, start: int, page: dict) -> None:
+        """Advance the cursor past the finished commands of `page` (read from `start`)."""
+        commands = page["data"]
+        done = next((i for i, c in enumerate(commands) if c.get("status") not in COMMAND_DONE),
+                    len(commands))
+        current = commands[done] if done < len(commands) else None
+        changed = done or page["total"] != self.total_commands or \
+            (current or {}).get("id") != (self.current_command or {}).get("id")
+        self.progress.observe(commands[:done], current)
+        self.cursor = start + done
+        self.total_commands = page["total"]
+        self.current_command = current
+        if changed:
+            self._event("commands", run_id=self.run_id, status=self.status, data={
+                "finished": commands[:done],
+                "current": current,
+                "done": self.cursor,
+                "total": self.total_commands,
+                "eta": self.progress.estimate(),
+            })
+
+    def phase(self) -> str:
+        if self.run_id is None or self.status == "idle" or self.status in FINISHED:
+            return "idle"
+        left = self.progress.transfers_to_pause()
+        if self.status == "running" and left is not None and left <= self.schedule.near_transfers:
+            return "near_pause"
+        return "active"
+
+    def delay(self) -> float:
+        """Seconds until the next poll: the phase's interval, or a jittered backoff after failures."""
+        if not self.failures:
+            return self.schedule.interval(self.phase())
+        backoff = min(self.max_backoff, self.schedule.active * 2 ** (self.failures - 1))
+        return backoff * self._rng.uniform(0.8, 1.0)
+
+    async def run(self, stop: asyncio.Event) -> None:
+        while not stop.is_set():
+            await self.poll()
+            try:
+                await asyncio.wait_for(stop.wait(), self.delay())
+            except asyncio.TimeoutError:
+                pass
+
+
+class Fleet:
+    """All watchers of a robot list, sharing one connection pool and one event queue."""
+
+    def __init__(self, robots: list[Robot], schedule: PollSchedule = PollSchedule(),
+                 pool: HttpPool | None = None, plans: dict[str, dict] | None = None,
+                 on_poll: Callable[[str, float, bool], None] | None = None):
+        check_unique(robots)
+        self.pool = pool or HttpPool()
+        self.events: asyncio.Queue[Event] = asyncio.Queue()
+        self.watchers = [RobotWatcher(r, self.pool, self.events.put_nowait, schedule, plans=plans, on_poll=on_poll)
+                         for r in robots]
+
+    async def _consume(self, on_event: Callable[[Event], Awaitable[None] | None]) -> None:
+        while True:
+            event = await self.events.get()
+            result = on_event(event)
+            if asyncio.iscoroutine(result):
+                await result
+            self.events.task_done()
+
+    async def run(self, on_event: Callable[[Event], Awaitable[None] | None],
+                  stop: asyncio.Event | None = None) -> None:
+        """Watch until `stop` is set (or forever); on_event gets every Event in order."""
+        stop = stop or asyncio.Event()
+        consumer = asyncio.create_task(self._consume(on_event))
+        try:
+            await asyncio.gather(*(w.run(stop) for w in self.watchers))
+            await self.events.join()
+        finally:
+            consumer.cancel()
+            await self.pool.close()
@@ -0,0 +1,137 @@
+"""
+KEEP-ALIVE HTTP CLIENT (STDLIB ASYNCIO)
+
+Just enough HTTP/1.1 for the OT-2 robot server: GET requests returning
+JSON, over connections kept open and reused per (host, port). A fleet
+watcher then costs one socket per robot instead of a TCP handshake per
+poll, and needs no third-party HTTP library. post_json() serves the
+notification webhooks.
+"""
+
+import asyncio
+import json
+from typing import Any
+
+# Required header for OT-2 HTTP API v2
+OT2_HEADERS = {"Opentrons-Version": "2"}
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, reason: str, url: str):
+        super().__init__(f"HTTP {status} {reason} for {url}")
+        self.status = status
+        self.reason = reason
+
+
+class _Conn:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class HttpPool:
+    """
+    JSON client with a small idle-connection pool per host.
+
+    max_per_host bounds concurrent requests (and open sockets) to one robot.
+    stats counts requests, response bytes, new connections and errors.
+    """
+
+    def __init__(self, timeout: float = 5.0, max_per_host: int = 2, headers: dict | None = None):
+        self.timeout = timeout
+        self.max_per_host = max_per_host
+        self.headers = dict(OT2_HEADERS if headers is None else headers)
+        self.stats = {"requests": 0, "bytes": 0, "connections": 0, "errors": 0}
+        self._idle: dict[tuple[str, int], list[_Conn]] = {}
+        self._limits: dict[tuple[str, int], asyncio.Semaphore] = {}
+
+    async def get_json(self, host: str, port: int, path: str) -> Any:
+        """GET http://host:port/path and decode the JSON body; raises HttpError on 4xx/5xx."""
+        return await self._call(host, port, "GET", path, None)
+
+    async def post_json(self, host: str, port: int, path: str, data: Any) -> Any:
+        """POST `data` as JSON to http://host:port/path; like get_json() otherwise."""
+        return await self._call(host, port, "POST", path, json.dumps(data).encode())
+
+    async def _call(self, host: str, port: int, method: str, path: str, payload: bytes | None) -> Any:
+        key = (host, port)
+        limit = self._limits.setdefault(key, asyncio.Semaphore(self.max_per_host))
+        async with limit:
+            try:
+                status, reason, body = await asyncio.wait_for(self._send(key, method, path, payload),
+                                                              self.timeout)
+            except Exception:
+                self.stats["errors"] += 1
+                raise
+        self.stats["requests"] += 1
+        self.stats["bytes"] += len(body)
+        if status >= 400:
+            self.stats["errors"] += 1
+            raise HttpError(status, reason, f"http://{host}:{port}{path}")
+        return json.loads(body) if body else None
+
+    async def _send(self, key: tuple[str, int], method: str, path: str,
+                    payload: bytes | None) -> tuple[int, str, bytes]:
+        idle = self._idle.setdefault(key, [])
+        while idle:  # reuse; a keep-alive socket the server closed fails before any response
+            conn = idle.pop()
+            try:
+                return await self._request(key, conn, method, path, payload)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                conn.close()
+        reader, writer = await asyncio.open_connection(*key)
+        self.stats["connections"] += 1
+        return await self._request(key, _Conn(reader, writer), method, path, payload)
+
+    async def _request(self, key: tuple[str, int], conn: _Conn, method: str, path: str,
+                       payload: bytes | None) -> tuple[int, str, bytes]:
+        host, port = key
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {host}:{port}", "Accept: application/json"]
+        lines += [f"{k}: {v}" for k, v in self.headers.items()]
+        if payload is not None:
+            lines += ["Content-Type: application/json", f"Content-Length: {len(payload)}"]
+        conn.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (payload or b""))
+        try:
+            await conn.writer.drain()
+            head = await conn.reader.readuntil(b"\r\n\r\n")
+            status_line, *header_lines = head.decode("latin-1").split("\r\n")
+            _, status, *reason = status_line.split(" ", 2)
+            headers = {}
+            for line in header_lines:
+                if ":" in line:
+                    k, v = line.split(":", 1)
+                    headers[k.strip().lower()] = v.strip()
+            body = await self._read_body(conn.reader, headers)
+        except BaseException:
+            conn.close()
+            raise
+        if headers.get("connection", "").lower() == "close" or "content-length" not in headers and \
+                headers.get("transfer-encoding", "").lower() != "chunked":
+            conn.close()
+        else:
+            self._idle[key].append(conn)
+        return int(status), reason[0] if reason else "", body
+
+    @staticmethod
+    async def _read_body(reader: asyncio.StreamReader, headers: dict) -> bytes:
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                if size == 0:
+                    await reader.readuntil(b"\r\n")  # no trailers from the robot server
+                    return b"".join(chunks)
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+        if "content-length" in headers:
+            return await reader.readexactly(int(headers["content-length"]))
+        return await reader.read()  # until the server closes
+
+    async def close(self) -> None:
+        for conns in self._idle.values():
+            for conn in conns:
+                conn.close()
+        self._idle.clear()
@@ -0,0 +1,71 @@
+"""
+FLEET METRICS
+
+Feeds a brick_core.metrics Registry from the watcher: FleetMetrics.poll is
+the fleet's on_poll hook (poll latency, polls, failed polls) and
+FleetMetrics.record an event sink (robot up, run status, transfers, pause
+durations, predicted time left). All series are labelled by robot name.
+"""
+
+from datetime import datetime
+
+from ..metrics import Registry
+from .fleet import Event
+from .plans import PAUSE_COMMANDS, TRANSFER_COMMANDS, command_type
+
+# Run statuses of the OT-2 API; the current one is 1, the others 0
+RUN_STATUSES = ("idle", "running", "paused", "finishing", "stop-requested", "stopped", "failed", "succeeded")
+POLL_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+PAUSE_BUCKETS = (30, 60, 120, 300, 600, 900, 1800, 3600, 7200)
+
+
+def _seconds(start: str | None, end: str | None) -> float | None:
+    if not start or not end:
+        return None
+    return (datetime.fromisoformat(end) - datetime.fromisoformat(start)).total_seconds()
+
+
+class FleetMetrics:
+    def __init__(self, registry: Registry | None = None):
+        self.registry = registry or Registry()
+        r = self.registry
+        self.poll_seconds = r.histogram("ot2_poll_duration_seconds", "Duration of one poll of a robot.",
+                                        POLL_BUCKETS)
+        self.polls = r.counter("ot2_polls_total", "Polls of a robot.")
+        self.poll_errors = r.counter("ot2_poll_errors_total", "Polls of a robot that failed.")
+        self.up = r.gauge("ot2_robot_up", "1 while the robot answers polls, 0 once it is offline.")
+        self.status = r.gauge("ot2_run_status", "Status of the robot's current run (1 for the current status).")
+        self.transfers = r.counter("ot2_transfers_total", "Transfers (tip pick-ups) finished.")
+        self.pause_seconds = r.histogram("ot2_pause_duration_seconds",
+                                         "Time from a pause to the operator's resume.", PAUSE_BUCKETS)
+        self.eta = r.gauge("ot2_run_remaining_seconds", "Predicted time left of the current run (with a plan).")
+
+    def poll(self, robot: str, seconds: float, ok: bool) -> None:
+        self.poll_seconds.observe(seconds, robot=robot)
+        self.polls.inc(robot=robot)
+        if not ok:
+            self.poll_errors.inc(robot=robot)
+
+    def record(self, event: Event) -> None:
+        robot = event.robot
+        if event.kind == "online":
+            self.up.set(1, robot=robot)
+        elif event.kind == "offline":
+            self.up.set(0, robot=robot)
+        elif event.kind in ("run", "status"):
+            for status in {*RUN_STATUSES, event.status} - {None}:
+                self.status.set(int(status == event.status), robot=robot, status=status)
+            if event.kind == "run":
+                self.eta.remove(robot=robot)
+        elif event.kind == "commands":
+            for command in event.data["finished"]:
+                kind = command_type(command)
+                if kind in TRANSFER_COMMANDS:
+                    self.transfers.inc(robot=robot)
+                elif kind in PAUSE_COMMANDS:
+                    seconds = _seconds(command.get("startedAt"), command.get("completedAt"))
+                    if seconds is not None:
+                        self.pause_seconds.observe(seconds, robot=robot)
+            eta = event.data.get("eta")
+            if eta:
+                self.eta.set(round(eta["remaining_s"], 1), robot=robot)
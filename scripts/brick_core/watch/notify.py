@@ -0,0 +1,284 @@
+"""
+NOTIFICATIONS
+
+The watcher's consumer only calls Notifier.submit(event), which never
+blocks: events that deserve the operator's attention (a pause, a failed
+or stopped run, a finished run, a robot going offline) are queued and
+everything else happens in background tasks.
+
+    events -> queue -> dedup -> rate limit -> one queue + task per sink
+
+- Dedup: the same alert for the same robot and run (e.g. an offline/online
+  flap, or a paused run found again by a rescan) is sent once per
+  DEDUP_SEC. A run that resumed and pauses again is a new pause.
+- Rate limit: alerts arriving within GATHER_SEC of each other are merged
+  into one notification ("3 robots paused: left, mid, right"), and at most
+  BURST notifications go out at once, then one per MIN_GAP_SEC; what is
+  held back meanwhile is merged into the next one.
+- Sinks: terminal (print + beep), desktop (notify-send / osascript), a
+  webhook (POST JSON; fake_robot.py --webhook serves a local stand-in) and
+  a JSONL file. Each sink has its own bounded queue and a timeout, so a
+  slow or dead sink delays neither the others nor the polling; if it falls
+  behind, its oldest notifications are dropped (and counted).
+"""
+
+import asyncio
+import json
+import platform
+import shutil
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable
+from urllib.parse import urlsplit
+
+from .fleet import Event
+from .http import HttpPool
+
+DEDUP_SEC = 300.0
+GATHER_SEC = 1.0
+BURST = 3
+MIN_GAP_SEC = 30.0
+SINK_QUEUE = 20
+SINK_TIMEOUT_SEC = 10.0
+
+# run status -> alert; a newly detected run only alerts when it is paused
+# (a run that finished before the watcher started is old news)
+ALERT_STATUSES = {"paused": "paused", "failed": "failed", "stopped": "stopped", "succeeded": "finished"}
+
+
+@dataclass
+class Notification:
+    title: str
+    message: str
+    alerts: list[dict]  # {"robot", "run_id", "alert", "detail"} per merged alert
+    time: float = field(default_factory=time.time)
+
+    @property
+    def urgent(self) -> bool:
+        return any(a["alert"] in ("paused", "failed", "offline") for a in self.alerts)
+
+
+def alert_for(event: Event) -> dict | None:
+    """The alert an Event raises, if any."""
+    if (event.kind == "status" and event.status in ALERT_STATUSES
+            or event.kind == "run" and event.status == "paused"):
+        alert = ALERT_STATUSES[event.status]
+    elif event.kind == "offline":
+        alert = "offline"
+    else:
+        return None
+    return {"robot": event.robot, "run_id": event.run_id, "alert": alert, "detail": event.detail}
+
+
+def merge(alerts: list[dict]) -> Notification:
+    if len(alerts) == 1:
+        a = alerts[0]
+        run = f" (run {a['run_id']})" if a["run_id"] else ""
+        return Notification(f"OT-2 {a['robot']} {a['alert']}", f"{a['robot']}: {a['alert']}{run}", alerts)
+    by_alert: dict[str, list[str]] = {}
+    for a in alerts:
+        by_alert.setdefault(a["alert"], []).append(a["robot"])
+    parts = [f"{len(robots)} {alert}: {', '.join(robots)}" for alert, robots in by_alert.items()]
+    return Notification(f"OT-2 fleet: {len(alerts)} alerts", "; ".join(parts), alerts)
+
+
+# =======================
+# SINKS
+# =======================
+
+class TerminalSink:
+    name = "terminal"
+
+    def __init__(self, beep: Callable[[], None] | None = None):
+        self.beep = beep
+
+    async def send(self, note: Notification) -> None:
+        print(f"[notify] {note.message}", flush=True)
+        if self.beep and note.urgent:
+            await asyncio.to_thread(self.beep)  # winsound blocks until the sound is done
+
+
+class DesktopSink:
+    """Desktop notification via notify-send (Linux) or osascript (macOS)."""
+
+    name = "desktop"
+
+    @staticmethod
+    def command(note: Notification) -> list[str] | None:
+        if platform.system() == "Darwin":
+            title, message = json.dumps(note.title), json.dumps(note.message)
+            return ["osascript", "-e", f"display notification {message} with title {title}"]
+        if shutil.which("notify-send"):
+            return ["notify-send", "-u", "critical" if note.urgent else "normal", note.title, note.message]
+        return None
+
+    @classmethod
+    def available(cls) -> bool:
+        return cls.command(Notification("", "", [])) is not None
+
+    async def send(self, note: Notification) -> None:
+        command = self.command(note)
+        if command is None:
+            raise OSError("no desktop notifier (notify-send/osascript) found")
+        proc = await asyncio.create_subprocess_exec(*command, stdout=asyncio.subprocess.DEVNULL,
+                                                    stderr=asyncio.subprocess.DEVNULL)
+        try:
+            if await proc.wait():
+                raise OSError(f"{command[0]} exited with {proc.returncode}")
+        except asyncio.CancelledError:
+            proc.kill()
+            raise
+
+
+class WebhookSink:
+    """POST each notification as JSON to an http:// URL."""
+
+    name = "webhook"
+
+    def __init__(self, url: str, pool: HttpPool | None = None):
+        parts = urlsplit(url)
+        if parts.scheme != "http" or not parts.hostname:
+            raise ValueError(f"Bad webhook URL: {url!r} (expected http://host[:port]/path)")
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self.pool = pool or HttpPool(timeout=SINK_TIMEOUT_SEC, max_per_host=1, headers={})
+
+    async def send(self, note: Notification) -> None:
+        await self.pool.post_json(self.host, self.port, self.path, asdict(note))
+
+
+class FileSink:
+    """Append each notification as one JSON line."""
+
+    name = "file"
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def _append(self, line: str) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as fh:
+            fh.write(line + "\n")
+
+    async def send(self, note: Notification) -> None:
+        await asyncio.to_thread(self._append, json.dumps(asdict(note), ensure_ascii=False))
+
+
+# =======================
+# PIPELINE
+# =======================
+
+class Notifier:
+    """Event sink that turns alerts into rate-limited notifications on several sinks."""
+
+    def __init__(self, sinks: list, dedup_s: float = DEDUP_SEC, gather_s: float = GATHER_SEC,
+                 burst: int = BURST, min_gap_s: float = MIN_GAP_SEC, timeout: float = SINK_TIMEOUT_SEC,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], Awaitable[None]] = asyncio.sleep):
+        self.sinks = sinks
+        self.dedup_s, self.gather_s = dedup_s, gather_s
+        self.burst, self.min_gap_s, self.timeout = burst, min_gap_s, timeout
+        self.clock, self.sleep = clock, sleep  # every wait goes through these (tests drive them)
+        self.stats = {"alerts": 0, "duplicates": 0, "notifications": 0, "sent": 0, "dropped": 0, "failed": 0}
+        self._alerts: asyncio.Queue[dict] = asyncio.Queue()
+        self._queues = {s.name: asyncio.Queue(SINK_QUEUE) for s in sinks}
+        self._seen: dict[tuple, float] = {}  # (robot, run, alert) -> when last notified
+        self._tokens = float(burst)
+        self._refilled = clock()
+        self._tasks: list[asyncio.Task] = []
+
+    def submit(self, event: Event) -> None:
+        if event.kind == "status" and event.status == "running":
+            self._seen.pop((event.robot, event.run_id, "paused"), None)
+        alert = alert_for(event)
+        if alert:
+            self.stats["alerts"] += 1
+            if self._fresh(alert):
+                self._alerts.put_nowait(alert)
+
+    def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._dispatch())]
+        self._tasks += [asyncio.create_task(self._deliver(s, self._queues[s.name])) for s in self.sinks]
+
+    async def close(self, drain_s: float = 2.0) -> None:
+        """Give queued notifications up to drain_s to go out, then stop."""
+        try:
+            await self._within(self._drained(), drain_s)
+        except asyncio.TimeoutError:
+            pass
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for sink in self.sinks:
+            if isinstance(sink, WebhookSink):
+                await sink.pool.close()
+
+    async def _drained(self) -> None:
+        await self._alerts.join()
+        for queue in self._queues.values():
+            await queue.join()
+
+    async def _within(self, awaitable: Awaitable, seconds: float):
+        """asyncio.wait_for on self.sleep's clock."""
+        task, timer = asyncio.ensure_future(awaitable), asyncio.ensure_future(self.sleep(seconds))
+        try:
+            await asyncio.wait({task, timer}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            timer.cancel()
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            raise asyncio.TimeoutError
+        return task.result()
+
+    def _fresh(self, alert: dict) -> bool:
+        key = (alert["robot"], alert["run_id"], alert["alert"])
+        now = self.clock()
+        if now - self._seen.get(key, -self.dedup_s) < self.dedup_s:
+            self.stats["duplicates"] += 1
+            return False
+        self._seen[key] = now
+        return True
+
+    def _refill(self) -> float:
+        """Top up the token bucket; returns the seconds until a token is available."""
+        now = self.clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled) / self.min_gap_s)
+        self._refilled = now
+        return 0.0 if self._tokens >= 1 else (1 - self._tokens) * self.min_gap_s
+
+    async def _dispatch(self) -> None:
+        while True:
+            held = [await self._alerts.get()]
+            # gather what arrives meanwhile, and for as long as the rate limit holds us back
+            await self.sleep(max(self.gather_s, self._refill()))
+            while not self._alerts.empty():
+                held.append(self._alerts.get_nowait())
+            self._refill()
+            self._tokens -= 1
+            self._publish(merge(held))
+            for _ in held:
+                self._alerts.task_done()
+
+    def _publish(self, note: Notification) -> None:
+        self.stats["notifications"] += 1
+        for queue in self._queues.values():
+            if queue.full():  # the sink fell behind: drop its oldest
+                queue.get_nowait()
+                queue.task_done()
+                self.stats["dropped"] += 1
+            queue.put_nowait(note)
+
+    async def _deliver(self, sink, queue: asyncio.Queue) -> None:
+        while True:
+            note = await queue.get()
+            try:
+                await self._within(sink.send(note), self.timeout)
+                self.stats["sent"] += 1
+            except Exception as e:  # a sink must never take the pipeline down
+                self.stats["failed"] += 1
+                print(f"[notify] {sink.name} failed: {e or type(e).__name__}", file=sys.stderr, flush=True)
+            finally:
+                queue.task_done()
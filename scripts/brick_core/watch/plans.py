@@ -0,0 +1,52 @@
+"""
+RUN PLANS FOR THE WATCHER
+
+The builders write <output>.plan.json (--plan, or inside a --bundle) with
+one plan per protocol file (brick_core.plan.plan_run). The watcher finds
+the plan of a run by the protocol's file name on the robot and follows it
+through the command stream: every brick-mix transfer starts with a tip
+pick-up, and every protocol.pause() is a waitForResume command, so
+counting those two tells where the run is relative to the planned pauses.
+"""
+
+import json
+from pathlib import Path
+from typing import Iterable
+
+from ..layout import BRICK_COUNT
+
+PLAN_SUFFIX = ".plan.json"
+
+# Engine command types, and the legacy names of API < 2.14 protocols.
+TRANSFER_COMMANDS = {"pickUpTip", "command.PICK_UP_TIP"}
+PAUSE_COMMANDS = {"waitForResume", "pause", "command.PAUSE"}
+
+
+def load_plans(paths: Iterable[Path]) -> dict[str, dict]:
+    """Shard plans by protocol file name, from .plan.json files or directories of them."""
+    plans = {}
+    for path in map(Path, paths):
+        files = sorted(path.rglob("*" + PLAN_SUFFIX)) if path.is_dir() else [path]
+        for file in files:
+            data = json.loads(file.read_text(encoding="utf-8"))
+            for shard in data.get("shards", []):
+                plans[shard["protocol"]] = shard
+    return plans
+
+
+def pause_points(plan: dict) -> list[int]:
+    """Transfers done when each planned pause is reached, in order."""
+    return [event["after_block"] * BRICK_COUNT for event in plan["events"] if event["kind"] == "pause"]
+
+
+def command_type(command: dict) -> str:
+    if command.get("commandType") == "custom":
+        return (command.get("params") or {}).get("legacyCommandType", "custom")
+    return command.get("commandType", "")
+
+
+def protocol_file(protocol: dict) -> str | None:
+    """Main file name of a /protocols/{id} resource."""
+    files = protocol.get("files", [])
+    main = next((f for f in files if f.get("role") == "main"), files[0] if files else None)
+    return main.get("name") if main else None
@@ -0,0 +1,156 @@
+"""
+RUN TIMELINES
+
+Append-only JSONL record of every run the watcher sees, one file per run:
+<root>/<robot>/<run id>.jsonl. Lines are written whole and flushed, so a
+crash loses at most the line being written, and a restarted watcher
+simply appends (it re-reads the run's commands from the start, so
+summarize() counts commands from the last "run" line on).
+
+    {"t": 1760000000.1, "kind": "run", "status": "running", "plan": "epic.py"}
+    {"t": ..., "kind": "status", "status": "paused", "previous": "running"}
+    {"t": ..., "kind": "commands", "done": 120, "total": 121, "transfers": 30,
+     "from": "<robot time>", "to": "<robot time>", "pauses": [...]}
+
+"t" is when the watcher saw it; durations and rates are taken from the
+robot's own command timestamps where possible (a pause lasts from the
+start of its waitForResume command until it completes on RESUME).
+"""
+
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Iterator
+
+from .fleet import FINISHED, Event
+from .plans import PAUSE_COMMANDS, TRANSFER_COMMANDS, command_type
+
+TIMELINE_SUFFIX = ".jsonl"
+
+
+def _name(text: str) -> str:
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in text)
+
+
+class TimelineRecorder:
+    """Event sink: appends the events of each run to that run's timeline file."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._open: dict[str, tuple[str, IO[str]]] = {}  # robot -> (run id, file)
+
+    def path(self, robot: str, run_id: str) -> Path:
+        return self.root / _name(robot) / (_name(run_id) + TIMELINE_SUFFIX)
+
+    def _file(self, event: Event) -> IO[str] | None:
+        run_id, fh = self._open.get(event.robot, (None, None))
+        if event.kind == "run" and event.run_id != run_id:
+            if fh:
+                fh.close()
+            path = self.path(event.robot, event.run_id)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fh = path.open("a", encoding="utf-8")
+            self._open[event.robot] = (event.run_id, fh)
+        return fh
+
+    def record(self, event: Event) -> None:
+        fh = self._file(event)
+        if fh is None:
+            return  # no run yet (connectivity before the first run)
+        line = {"t": round(event.time, 3), "kind": event.kind}
+        if event.kind == "run":
+            line.update(status=event.status, plan=event.data.get("plan"))
+        elif event.kind == "status":
+            line.update(status=event.status, previous=event.previous)
+        elif event.kind == "commands":
+            finished = event.data["finished"]
+            if not finished:
+                return
+            kinds = [command_type(c) for c in finished]
+            line.update(
+                done=event.data["done"],
+                total=event.data["total"],
+                transfers=sum(k in TRANSFER_COMMANDS for k in kinds),
+                **{"from": finished[0].get("startedAt"), "to": finished[-1].get("completedAt")},
+            )
+            pauses = [
+                {"started": c.get("startedAt"), "completed": c.get("completedAt"),
+                 "message": str((c.get("params") or {}).get("message", "")).split("\n")[0]}
+                for c, k in zip(finished, kinds) if k in PAUSE_COMMANDS
+            ]
+            if pauses:
+                line["pauses"] = pauses
+        else:
+            line["detail"] = event.detail
+        fh.write(json.dumps(line, ensure_ascii=False, separators=(",", ":")) + "\n")
+        fh.flush()
+
+    def close(self) -> None:
+        for _, fh in self._open.values():
+            fh.close()
+        self._open.clear()
+
+
+def read_timeline(path: Path) -> list[dict]:
+    with Path(path).open(encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+def timeline_files(path: Path) -> Iterator[Path]:
+    """The timeline itself, or every timeline under a directory."""
+    path = Path(path)
+    yield from sorted(path.rglob("*" + TIMELINE_SUFFIX)) if path.is_dir() else [path]
+
+
+def _seconds(start: str | None, end: str | None) -> float:
+    if not start or not end:
+        return 0.0
+    return (datetime.fromisoformat(end) - datetime.fromisoformat(start)).total_seconds()
+
+
+def summarize(records: list[dict]) -> dict:
+    """
+    Status times, pauses with operator response time, and throughput of one run.
+
+    transfers_per_hour is over the whole run so far (what the robot
+    delivers); active_transfers_per_hour leaves out the paused time, and
+    paused_fraction is the share of run time lost waiting for the operator.
+    """
+    status_s: dict[str, float] = {}
+    status, since, plan = None, None, None
+    first = last = None
+    transfers, done, pauses = 0, 0, []
+    for r in records:
+        if since is not None:
+            status_s[status] = status_s.get(status, 0.0) + r["t"] - since
+            since = r["t"]
+        if r["kind"] in ("run", "status"):
+            status = r["status"]
+            since = None if status in FINISHED else r["t"]
+        if r["kind"] == "run":  # (re)started watcher: commands are read again from the start
+            plan = r.get("plan") or plan
+            first = last = None
+            transfers, done, pauses = 0, 0, []
+        elif r["kind"] == "commands":
+            first = first or r.get("from")
+            last = r.get("to") or last
+            transfers += r["transfers"]
+            done = r["done"]
+            pauses += [dict(p, response_s=_seconds(p["started"], p["completed"])) for p in r.get("pauses", [])]
+    elapsed = _seconds(first, last)
+    paused = sum(p["response_s"] for p in pauses)
+    responses = [p["response_s"] for p in pauses]
+    return {
+        "plan": plan,
+        "status": status,
+        "status_s": {k: round(v, 1) for k, v in status_s.items()},
+        "commands": done,
+        "transfers": transfers,
+        "elapsed_s": elapsed,
+        "paused_s": paused,
+        "paused_fraction": paused / elapsed if elapsed else 0.0,
+        "pauses": pauses,
+        "response_s": {"mean": sum(responses) / len(responses), "max": max(responses)} if responses else None,
+        "transfers_per_hour": transfers * 3600 / elapsed if elapsed else 0.0,
+        "active_transfers_per_hour": transfers * 3600 / (elapsed - paused) if elapsed > paused else 0.0,
+    }
@@ -1,8 +1,38 @@
 import json
 import argparse
+import ast
+import copy
+import pickle
+import sys
+import uuid
+from dataclasses import dataclass
 from pathlib import Path
 import re
+import time
 from datetime import datetime, timezone
+from itertools import islice
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))  # scripts/ (brick_core)
+from brick_core.cache import cached_parse  # noqa: E402
+from brick_core.cli import add_metrics_arg, write_build_metrics  # noqa: E402
+from brick_core.encoding import bitstring_to_blocks, word_to_bitstring  # noqa: E402
+from brick_core.layout import dest_well_name, modified_bricks as block_modified_bricks  # noqa: E402
+from brick_core.output import atomic_write  # noqa: E402
+from brick_core.pd_json import (  # noqa: E402
+    BRICKS_PER_MIX,
+    EXTRA_TIP_SLOTS,
+    MAX_BLOCKS,
+    PD_SINGLE_DEST_WELL,
+    TIP_RACK_URI,
+    BrickMixModel,
+    tip_racks_needed,
+    write_designer_json,
+)
+
+TRIAL2_URI = "custom_beta/trial2_96_wellplate_100ul/1"
+PCR_RACK_URI = "custom_beta/opentronspcrrack_96_wellplate_100ul/1"
+LABWARE_MARKER = 'CUSTOM_LABWARE = json.loads("""'
+PD_MARKER = 'DESIGNER_APPLICATION = """'
 
 # ------------------------------------------------------------
 #                TEXT → BINARY → MODIFIED BRICKS
@@ -25,6 +55,22 @@ def word_to_modified_bricks(text: str, max_bits: int = 36):
     return sorted([b for b in bricks if 2 <= b <= 37])
 
 
+def word_to_block_bricks(text: str) -> list[list[int]]:
+    """
+    MOD bricks (2–37) for every 36-bit block of the word (7-bit ASCII,
+    last block zero-padded). The first entry equals word_to_modified_bricks.
+    """
+    blocks = bitstring_to_blocks(word_to_bitstring(text, ascii7=True))
+    return [block_modified_bricks(b) for b in blocks]
+
+
+def _per_block(modified_bricks) -> list[set[int]]:
+    """A set of MOD bricks (one block) or a list of them (one per block)."""
+    if isinstance(modified_bricks, (set, frozenset)):
+        return [modified_bricks]
+    return [set(m) for m in modified_bricks]
+
+
 # ------------------------------------------------------------
 #                      JSON HELPERS
 # ------------------------------------------------------------
@@ -94,43 +140,71 @@ def force_brick_mix_labware_to_match_bricks(pd_data):
 # ------------------------------------------------------------
 #               PYTHON SOURCE PATCHING (MOD/UNMOD)
 # ------------------------------------------------------------
-def patch_python_sources(src: str, modified_bricks: set[int]) -> str:
-    """
-    Replace well_plate_1[...] with well_plate_2[...] for MOD bricks.
-    First 38 occurrences correspond to bricks 1..38.
-    """
+SOURCE_REF = re.compile(r'source=\[well_plate_1\["([A-H][0-9]{1,2})"\]\]')
+BRICKS_PER_MIX = 38
 
-    pattern = r'source=\[well_plate_1\["([A-H][0-9]{1,2})"\]\]'
-    matches = list(re.finditer(pattern, src))
 
-    if len(matches) < 38:
-        print(f"WARNING: Only found {len(matches)} source steps (expected 38).")
+def patch_python_sources(src: str, modified_bricks) -> str:
+    """
+    Replace well_plate_1[...] with well_plate_2[...] for MOD bricks.
+    First 38 occurrences correspond to bricks 1..38; with one set of MOD
+    bricks per block, the next 38 are the second block, and so on.
 
-    new_src = src
-    for i, m in enumerate(matches[:38], start=1):
-        well = m.group(1)
-        old = f'source=[well_plate_1["{well}"]]'
-        if i in modified_bricks and i not in (1, 38):
-            new = f'source=[well_plate_2["{well}"]]'
-        else:
-            new = old
-        new_src = new_src.replace(old, new, 1)
+    Single pass: the output is joined from the text between match spans,
+    so every brick rewrites its own step even if two steps share a well.
+    Raises ValueError if the source has too few steps or the rewrite
+    count does not match the MOD bricks.
+    """
+    per_block = _per_block(modified_bricks)
+    wanted = BRICKS_PER_MIX * len(per_block)
+    matches = list(islice(SOURCE_REF.finditer(src), wanted))
+    if len(matches) < wanted:
+        raise ValueError(f"Only found {len(matches)} source steps (expected {wanted}).")
+
+    parts = []
+    pos = 0
+    for i, m in enumerate(matches):
+        block, brick = divmod(i, BRICKS_PER_MIX)
+        brick += 1
+        if brick in per_block[block] and brick not in (1, BRICKS_PER_MIX):
+            parts.append(src[pos:m.start()])
+            parts.append(f'source=[well_plate_2["{m.group(1)}"]]')
+            pos = m.end()
+    parts.append(src[pos:])
+    rewritten = len(parts) // 2
+    new_src = "".join(parts)
+
+    expected = sum(len({b for b in mod if 1 < b < BRICKS_PER_MIX}) for mod in per_block)
+    mod_refs = new_src.count("source=[well_plate_2[") - src.count("source=[well_plate_2[")
+    if not rewritten == expected == mod_refs:
+        raise ValueError(
+            f"Rewrote {rewritten} source steps ({mod_refs} new MOD references), "
+            f"expected {expected}."
+        )
 
-    print("Python source patching complete.")
+    print(f"Python source patching complete ({rewritten} MOD sources).")
     return new_src
 
 
 # ------------------------------------------------------------
 #       STRIP TRIAL2 LABWARE FROM CUSTOM_LABWARE BLOCK
 # ------------------------------------------------------------
+def drop_trial2_labware(labware_defs: dict) -> dict:
+    """CUSTOM_LABWARE definitions without the TRIAL2 plate (input is not modified)."""
+    if TRIAL2_URI in labware_defs:
+        print("Removed TRIAL2 labware definition.")
+        return {uri: d for uri, d in labware_defs.items() if uri != TRIAL2_URI}
+    print("No TRIAL2 labware definition found.")
+    return labware_defs
+
+
 def strip_trial2_from_custom_labware(py_source: str) -> str:
     """
     Remove the 'custom_beta/trial2_96_wellplate_100ul/1' entry entirely
     from the CUSTOM_LABWARE JSON so the final .py contains no TRIAL 2.
     """
-    marker = 'CUSTOM_LABWARE = json.loads("""'
     try:
-        start = py_source.index(marker) + len(marker)
+        start = py_source.index(LABWARE_MARKER) + len(LABWARE_MARKER)
     except ValueError:
         print("No CUSTOM_LABWARE block found; skipping TRIAL2 cleanup.")
         return py_source
@@ -144,13 +218,7 @@ def strip_trial2_from_custom_labware(py_source: str) -> str:
         print("WARNING: Failed to parse CUSTOM_LABWARE JSON; leaving unchanged.")
         return py_source
 
-    if "custom_beta/trial2_96_wellplate_100ul/1" in labware_defs:
-        del labware_defs["custom_beta/trial2_96_wellplate_100ul/1"]
-        print("Removed TRIAL2 labware definition.")
-    else:
-        print("No TRIAL2 labware definition found.")
-
-    new_json_text = json.dumps(labware_defs, separators=(",", ":"))
+    new_json_text = json.dumps(drop_trial2_labware(labware_defs), separators=(",", ":"))
     new_source = py_source[:start] + new_json_text + py_source[end:]
     return new_source
 
@@ -188,12 +256,16 @@ def patch_python_metadata(py_src: str, word: str) -> str:
 # ------------------------------------------------------------
 def extract_pd_json_from_py(path: Path):
     src = path.read_text()
-    marker = 'DESIGNER_APPLICATION = """'
-    start = src.index(marker) + len(marker)
+    start = src.index(PD_MARKER) + len(PD_MARKER)
     end = src.index('"""', start)
     return src, start, end, src[start:end]
 
 
+def fix_trial2_uri(json_text: str) -> str:
+    """Fix residual PD references to old TRIAL2 URI."""
+    return json_text.replace(TRIAL2_URI, PCR_RACK_URI)
+
+
 def patch_pd_json(
     json_text,
     word,
@@ -205,14 +277,37 @@ def patch_pd_json(
     asp_depth,
     brick_stock,
 ):
-    # Fix residual PD references to old TRIAL2 URI
-    json_text = json_text.replace(
-        "custom_beta/trial2_96_wellplate_100ul/1",
-        "custom_beta/opentronspcrrack_96_wellplate_100ul/1",
+    proto = json.loads(fix_trial2_uri(json_text))
+    patch_pd_data(
+        proto,
+        word,
+        modified_bricks,
+        transfer_vol,
+        mix_times,
+        mix_vol,
+        asp_flow,
+        asp_depth,
+        brick_stock,
     )
+    return json.dumps(proto, separators=(",", ":"))
 
-    proto = json.loads(json_text)
 
+def patch_pd_data(
+    proto,
+    word,
+    modified_bricks,
+    transfer_vol,
+    mix_times,
+    mix_vol,
+    asp_flow,
+    asp_depth,
+    brick_stock,
+):
+    """
+    Patch a decoded DESIGNER_APPLICATION JSON in place.
+    modified_bricks: set of MOD bricks, or one set per block (steps already
+    expanded with expand_pd_steps).
+    """
     if "designerApplication" in proto:
         pd_data = proto["designerApplication"]["data"]
     else:
@@ -240,6 +335,7 @@ def patch_pd_json(
 
     unmod_id, mod_id, mix_id = find_labware_ids(pd_data)
 
+    per_block = _per_block(modified_bricks)
     saved = pd_data["savedStepForms"]
     ordered = pd_data["orderedStepIds"]
     step_index = 0
@@ -249,13 +345,15 @@ def patch_pd_json(
         if not step or step.get("stepType") != "moveLiquid":
             continue
 
+        block, brick = divmod(step_index, BRICKS_PER_MIX)
         step_index += 1
-        if step_index > 38:
+        if block >= len(per_block):
             break
 
-        if step_index in (1, 38):
+        brick += 1
+        if brick in (1, 38):
             step["aspirate_labware"] = unmod_id
-        elif step_index in modified_bricks:
+        elif brick in per_block[block]:
             step["aspirate_labware"] = mod_id
         else:
             step["aspirate_labware"] = unmod_id
@@ -267,7 +365,7 @@ def patch_pd_json(
             if mix_times > 0:
                 step["aspirate_mix_checkbox"] = True
                 step["aspirate_mix_times"] = str(mix_times)
-                step["aspirate_mix_volume"] = str(mix_vol or transfer_vol)
+                step["aspirate_mix_volume"] = str(mix_vol or transfer_vol or step["volume"])
             else:
                 step["aspirate_mix_checkbox"] = False
                 step["aspirate_mix_times"] = ""
@@ -278,7 +376,357 @@ def patch_pd_json(
         if asp_depth is not None:
             step["aspirate_mmFromBottom"] = str(asp_depth)
 
-    return json.dumps(proto, separators=(",", ":"))
+
+# ------------------------------------------------------------
+#                 PARSED TEMPLATE (CACHED)
+# ------------------------------------------------------------
+TEMPLATE_CACHE_KIND = "pd-template.3"  # bump when parse_template's result changes
+
+# One "# Step N: transfer" block, up to and including its drop_tip().
+STEP_BLOCK = re.compile(r"    # Step \d+: transfer\n.*?    \w+\.drop_tip\(\)\n", re.DOTALL)
+# The per-step values the renderer rewrites: step number, volume,
+# destination well, tip racks and the inline liquid class definition
+# (sources are left to patch_python_sources).
+STEP_FIELDS = re.compile(
+    r"# Step (\d+): transfer\n"
+    r".*?volume=([\d.]+),\n"
+    r'.*?dest=\[well_plate_3\["([A-H]\d{1,2})"\]\]'
+    r".*?tip_racks=\[([^\]]*)\]"
+    r".*?liquid_class=(protocol\.define_liquid_class\(\n.*?\n        \))",
+    re.DOTALL,
+)
+LIQUID_CLASS_PROPERTIES = re.compile(r"properties=(\{.*\}),\n\s*\)$", re.DOTALL)
+TIP_RACK_LOAD = re.compile(
+    r'    tip_rack_1 = protocol\.load_labware\(\n.*?location="(\d+)".*?\n    \)\n', re.DOTALL
+)
+STEPS_MARKER = "    # PROTOCOL STEPS\n"
+
+
+@dataclass(frozen=True)
+class ParsedTemplate:
+    """
+    The PD template split around its two JSON blobs and its transfer steps:
+    preamble + steps + postamble + CUSTOM_LABWARE + middle + DESIGNER_APPLICATION + tail.
+
+    Each step is stored as (text, num, text, volume, text, dest, text,
+    tip_racks, text, liquid_class, text): odd positions hold the template's
+    values and are replaced when rendering. step_properties holds each
+    step's decoded liquid class properties.
+    """
+
+    preamble: str  # metadata, labware, liquids
+    steps: tuple[tuple[str, ...], ...]  # the 38 transfer steps, split on STEP_FIELDS
+    step_properties: tuple[dict, ...]
+    postamble: str
+    custom_labware: dict | None  # None if the template has no CUSTOM_LABWARE
+    middle: str
+    designer_pickle: bytes  # decoded PD JSON, TRIAL2 URI already fixed
+    tail: str
+
+    @property
+    def head(self) -> str:
+        """Python source before CUSTOM_LABWARE, as in the template."""
+        return self.preamble + "\n".join("".join(step) for step in self.steps) + self.postamble
+
+    def designer(self) -> dict:
+        """Fresh, mutable copy of the PD JSON (cheaper than json.loads)."""
+        return pickle.loads(self.designer_pickle)
+
+
+def split_steps(head: str) -> tuple[str, tuple[tuple[str, ...], ...], tuple[dict, ...], str]:
+    """Split the Python head into preamble, per-step segments, liquid classes and postamble."""
+    blocks = list(STEP_BLOCK.finditer(head))
+    if len(blocks) < BRICKS_PER_MIX:
+        raise ValueError(f"Only found {len(blocks)} transfer steps (expected {BRICKS_PER_MIX}).")
+    steps, properties = [], []
+    for prev, m in zip([None] + blocks, blocks):
+        if prev is not None and head[prev.end():m.start()] != "\n":
+            raise ValueError(f"Unexpected text between transfer steps at offset {prev.end()}.")
+        text = m.group()
+        fields = STEP_FIELDS.search(text)
+        lc = fields and LIQUID_CLASS_PROPERTIES.search(fields.group(5))
+        if not lc:
+            raise ValueError(f"Unrecognised transfer step at offset {m.start()}.")
+        segments, pos = [], 0
+        for g in range(1, 6):
+            segments += [text[pos:fields.start(g)], fields.group(g)]
+            pos = fields.end(g)
+        segments.append(text[pos:])
+        steps.append(tuple(segments))
+        properties.append(ast.literal_eval(lc.group(1)))
+    return head[:blocks[0].start()], tuple(steps), tuple(properties), head[blocks[-1].end():]
+
+
+def parse_template(path: Path) -> tuple:
+    """Split and decode a PD template; plain builtins so the result can be cached."""
+    src = path.read_text()
+    pd_start = src.index(PD_MARKER) + len(PD_MARKER)
+    pd_end = src.index('"""', pd_start)
+    designer = json.loads(fix_trial2_uri(src[pd_start:pd_end]))
+
+    lw_start = src.find(LABWARE_MARKER, 0, pd_start)
+    if lw_start == -1:
+        head, labware, middle = src[:pd_start], None, ""
+    else:
+        lw_start += len(LABWARE_MARKER)
+        lw_end = src.index('""")', lw_start)
+        head, middle = src[:lw_start], src[lw_end:pd_start]
+        labware = json.loads(src[lw_start:lw_end])
+
+    preamble, steps, properties, postamble = split_steps(head)
+    designer_pickle = pickle.dumps(designer, protocol=pickle.HIGHEST_PROTOCOL)
+    return preamble, steps, properties, postamble, labware, middle, designer_pickle, src[pd_end:]
+
+
+def load_template(template_py) -> ParsedTemplate:
+    """Parsed template, cached by path + mtime + size (see brick_core.cache)."""
+    return ParsedTemplate(
+        *cached_parse(TEMPLATE_CACHE_KIND, Path(template_py), parse_template)
+    )
+
+
+# ------------------------------------------------------------
+#             MULTI-BLOCK: CLONE STEPS PER BLOCK
+# ------------------------------------------------------------
+# Tip racks, deck slots and the 20-block limit are shared with the
+# generated PD JSON (brick_core.pd_json).
+def block_dest_wells(num_blocks: int) -> list[str] | None:
+    """Brick-mix well per block; None keeps the template's well (single block)."""
+    if num_blocks < 1 or num_blocks > MAX_BLOCKS:
+        raise ValueError(
+            f"The PD builder supports 1..{MAX_BLOCKS} blocks ({MAX_BLOCKS * 36} bits) "
+            f"with one set of tip racks, got {num_blocks}. "
+            "Use new_builder_07.py for larger inputs."
+        )
+    if num_blocks == 1:
+        return None
+    return [dest_well_name(k) for k in range(num_blocks)]
+
+
+def format_literal(value, indent: int = 0) -> str:
+    """
+    Python literal of a liquid class property tree: nested dicts one key
+    per line, flat dicts / lists / scalars inline (PD export style).
+    """
+    if isinstance(value, dict):
+        items = [(json.dumps(k), format_literal(v, indent + 4)) for k, v in value.items()]
+        if not any(isinstance(v, dict) for v in value.values()):
+            return "{" + ", ".join(f"{k}: {v}" for k, v in items) + "}"
+        pad = " " * (indent + 4)
+        return "{\n" + "".join(f"{pad}{k}: {v},\n" for k, v in items) + " " * indent + "}"
+    if isinstance(value, str):
+        return json.dumps(value)
+    return repr(value)
+
+
+def liquid_class_properties(props, volume, mix_times, mix_vol, asp_flow, asp_depth) -> dict:
+    """Copy of a step's liquid class with the run's aspirate flow, depth and mix."""
+    props = copy.deepcopy(props)
+    for by_tip in props.values():
+        for p in by_tip.values():
+            aspirate = p["aspirate"]
+            if asp_flow is not None:
+                aspirate["flow_rate_by_volume"] = [(0, asp_flow)]
+            if asp_depth is not None:
+                aspirate["aspirate_position"]["offset"]["z"] = asp_depth
+            if mix_times is not None:
+                if mix_times > 0:
+                    aspirate["mix"] = {
+                        "enabled": True,
+                        "repetitions": mix_times,
+                        "volume": mix_vol or volume,
+                    }
+                else:
+                    aspirate["mix"] = {"enabled": False}
+    return props
+
+
+def _render_preamble(
+    template: ParsedTemplate,
+    num_blocks: int,
+    transfer_vol,
+    mix_times,
+    mix_vol,
+    asp_flow,
+    asp_depth,
+) -> tuple[str, str | None, list[str]]:
+    """
+    Preamble with any extra tip racks and the shared liquid classes.
+
+    Returns (preamble, tip_racks, step_class): tip_racks is the rendered
+    tip_racks list (None keeps each step's own) and step_class the liquid
+    class variable of each of the 38 template steps.
+    """
+    num_racks = tip_racks_needed(num_blocks)
+    preamble = template.preamble
+    tip_racks = None  # keep each step's own
+    if num_racks > 1:
+        m = TIP_RACK_LOAD.search(preamble)
+        if m is None:
+            raise ValueError("Could not find the tip_rack_1 load in the template.")
+        rack = m.group()
+        loc = f'location="{m.group(1)}"'
+        extra = [
+            rack.replace("tip_rack_1", f"tip_rack_{k}").replace(loc, f'location="{slot}"')
+            for k, slot in zip(range(2, num_racks + 1), EXTRA_TIP_SLOTS)
+        ]
+        preamble = preamble[:m.end()] + "".join(extra) + preamble[m.end():]
+        tip_racks = ", ".join(f"tip_rack_{k}" for k in range(1, num_racks + 1))
+
+    # Shared liquid classes: rendered properties -> variable name
+    classes: dict[str, str] = {}
+    step_class = []
+    for seg, props in zip(template.steps, template.step_properties):
+        volume = float(seg[3]) if transfer_vol is None else transfer_vol
+        text = format_literal(
+            liquid_class_properties(props, volume, mix_times, mix_vol, asp_flow, asp_depth), 8
+        )
+        step_class.append(classes.setdefault(text, f"liquid_class_{len(classes) + 1}"))
+    definitions = ["    # Define Liquid Classes:\n"]
+    for text, var in classes.items():
+        definitions.append(
+            f"    {var} = protocol.define_liquid_class(\n"
+            f'        name="brick_transfer_{var.rsplit("_", 1)[1]}",\n'
+            f"        properties={text},\n"
+            "    )\n"
+        )
+    at = preamble.find(STEPS_MARKER)
+    at = len(preamble) if at == -1 else at
+    preamble = preamble[:at] + "".join(definitions) + "\n" + preamble[at:]
+    return preamble, tip_racks, step_class
+
+
+def render_python_head(
+    template: ParsedTemplate,
+    dest_wells: list[str] | None,
+    transfer_vol=None,
+    mix_times=None,
+    mix_vol=None,
+    asp_flow=None,
+    asp_depth=None,
+) -> str:
+    """
+    Python head with one set of 38 transfer steps per block. Steps are
+    renumbered, dispense into the block's well and share all tip racks;
+    sources stay on well_plate_1 until patch_python_sources.
+
+    Instead of PD's inline define_liquid_class per transfer, one liquid
+    class is defined per distinct parameter set (after applying volume,
+    aspirate flow/depth and mix) and referenced by every transfer.
+    """
+    preamble, tip_racks, step_class = _render_preamble(
+        template, len(dest_wells or [None]), transfer_vol, mix_times, mix_vol, asp_flow, asp_depth
+    )
+    steps = []
+    for block, dest in enumerate(dest_wells or [None]):
+        for brick, (seg, lc) in enumerate(zip(template.steps, step_class), start=1):
+            n = block * BRICKS_PER_MIX + brick
+            steps.append(
+                f"{seg[0]}{n}{seg[2]}{seg[3] if transfer_vol is None else transfer_vol}"
+                f"{seg[4]}{dest or seg[5]}{seg[6]}{tip_racks or seg[7]}{seg[8]}{lc}{seg[10]}"
+            )
+    return preamble + "\n".join(steps) + template.postamble
+
+
+LOOP_DEST = "\0dest"  # stand-in for the loop's dest_well while rendering the body
+
+
+def render_loop_head(
+    template: ParsedTemplate,
+    per_block: list[set[int]],
+    dest_wells: list[str] | None,
+    transfer_vol=None,
+    mix_times=None,
+    mix_vol=None,
+    asp_flow=None,
+    asp_depth=None,
+) -> str:
+    """
+    Compact alternative to render_python_head: a TRANSFERS table of
+    (source plate, source well, dest well), one row per transfer in run
+    order, and a single loop over it. Sources are chosen here (MOD bricks
+    read from well_plate_2), so patch_python_sources is not needed.
+
+    Every template step must share one volume, liquid class and tip rack
+    list; the command sequence is then the same as the unrolled steps.
+    """
+    preamble, tip_racks, step_class = _render_preamble(
+        template, len(per_block), transfer_vol, mix_times, mix_vol, asp_flow, asp_depth
+    )
+    volumes = {seg[3] for seg in template.steps} if transfer_vol is None else {transfer_vol}
+    racks = {seg[7] for seg in template.steps} if tip_racks is None else {tip_racks}
+    if len(volumes) > 1 or len(racks) > 1 or len(set(step_class)) > 1:
+        raise ValueError(
+            "Loop body needs one volume, liquid class and tip rack list for all steps; "
+            "use the unrolled steps body for this template."
+        )
+
+    rows = ["    TRANSFERS = [\n"]
+    for block, (dest, modified) in enumerate(zip(dest_wells or [None], per_block), start=1):
+        rows.append(f"        # Block {block}\n")
+        for brick, seg in enumerate(template.steps, start=1):
+            src = SOURCE_REF.search(seg[4])
+            if src is None:
+                raise ValueError(f"Step {brick} does not read from well_plate_1.")
+            mod = brick in modified and brick not in (1, BRICKS_PER_MIX)
+            plate = "well_plate_2" if mod else "well_plate_1"
+            rows.append(f'        ({plate}, "{src.group(1)}", "{dest or seg[5]}"),\n')
+    rows.append("    ]\n\n")
+
+    seg = template.steps[0]
+    step = (
+        f"{seg[2]}{volumes.pop()}{seg[4]}{LOOP_DEST}{seg[6]}{racks.pop()}{seg[8]}"
+        f"{step_class[0]}{seg[10]}"
+    )
+    step = step.split("\n", 1)[1]  # drop the "# Step N: transfer" comment
+    step = SOURCE_REF.sub("source=[source_plate[source_well]]", step, count=1)
+    step = step.replace(f'"{LOOP_DEST}"', "dest_well")
+    body = "".join("    " + line if line.strip() else line for line in step.splitlines(True))
+    loop = "    for source_plate, source_well, dest_well in TRANSFERS:\n" + body
+
+    print(f"Loop body: {len(per_block) * BRICKS_PER_MIX} transfers in one table.")
+    return preamble + "".join(rows) + loop + template.postamble
+
+
+def expand_pd_steps(pd_data: dict, dest_wells: list[str] | None) -> None:
+    """
+    Clone the template's 38 moveLiquid step forms once per block (in place).
+
+    Block 0 keeps the template's step ids; clones get deterministic uuid5
+    ids. Forms are shallow copies: only id and dispense_wells differ, the
+    per-brick fields are patched afterwards by patch_pd_data.
+    """
+    if dest_wells is None:
+        return
+    saved = pd_data["savedStepForms"]
+    ordered = pd_data["orderedStepIds"]
+    moves = [sid for sid in ordered if saved[sid].get("stepType") == "moveLiquid"]
+    moves = moves[:BRICKS_PER_MIX]
+    if len(moves) < BRICKS_PER_MIX:
+        raise ValueError(f"Only found {len(moves)} moveLiquid steps (expected {BRICKS_PER_MIX}).")
+
+    new_order = []
+    for block, dest in enumerate(dest_wells):
+        for sid in moves:
+            form = dict(saved[sid])
+            if block:
+                form["id"] = str(uuid.uuid5(uuid.NAMESPACE_URL, f"{sid}/{block}"))
+            form["dispense_wells"] = [dest]
+            saved[form["id"]] = form
+            new_order.append(form["id"])
+    pd_data["orderedStepIds"] = new_order + [sid for sid in ordered if sid not in set(moves)]
+
+    # Extra tip racks: same definition as the template's rack, new slots.
+    num_racks = tip_racks_needed(len(dest_wells))
+    labware = pd_data["labware"]
+    deck = saved["__INITIAL_DECK_SETUP_STEP__"]["labwareLocationUpdate"]
+    rack_key = next(
+        key for key, lw in labware.items() if lw.get("labwareDefURI") == TIP_RACK_URI
+    )
+    for k, slot in zip(range(2, num_racks + 1), EXTRA_TIP_SLOTS):
+        key = f"{uuid.uuid5(uuid.NAMESPACE_URL, f'{rack_key}/{k}')}:{TIP_RACK_URI}"
+        labware[key] = dict(labware[rack_key])
+        deck[key] = slot
 
 
 # ------------------------------------------------------------
@@ -295,38 +743,93 @@ def build_new_py(
     asp_flow,
     asp_depth,
     brick_stock,
+    pd_json="generated",
+    body="steps",
 ):
-    path = Path(template_py)
-    src, start, end, json_text = extract_pd_json_from_py(path)
-
-    modified = set(word_to_modified_bricks(word))
-    print(f"Modified bricks (2–37) for '{word}': {sorted(modified)}")
-
-    new_json = patch_pd_json(
-        json_text,
-        word,
-        modified,
-        transfer_vol,
-        mix_times,
-        mix_vol,
-        asp_flow,
-        asp_depth,
-        brick_stock,
-    )
-
-    new_src = src[:start] + new_json + src[end:]
-    new_src = patch_python_sources(new_src, modified)
-    new_src = strip_trial2_from_custom_labware(new_src)
-    new_src = patch_python_metadata(new_src, word)
+    """
+    Write a PD-style brick-mix protocol for `word`.
+
+    pd_json: "generated" builds the DESIGNER_APPLICATION JSON from a
+    compact model (brick_core.pd_json); "template" patches the export's
+    own JSON. The Python body always comes from the template.
+    body: "steps" unrolls every transfer like the PD export; "loop" emits
+    a TRANSFERS table and one loop (same commands, see brick_core.simulate).
+    Returns the number of blocks written.
+    """
+    template = load_template(template_py)
+
+    # One set of 38 transfers per 36-bit block (dispensed into A1, A2, ...
+    # of the brick-mix plate); a single block keeps the template's well.
+    per_block = [set(m) for m in word_to_block_bricks(word)]
+    dest_wells = block_dest_wells(len(per_block))
+    print(f"Blocks for '{word}': {len(per_block)}")
+    for n, modified in enumerate(per_block, start=1):
+        print(f"  Modified bricks (2–37), block {n}: {sorted(modified)}")
+
+    if pd_json == "generated":
+        model = BrickMixModel(
+            protocol_name=f"BRICK MIX - {word.upper()}",
+            blocks=tuple(frozenset(m) for m in per_block),
+            dest_wells=tuple(dest_wells or [PD_SINGLE_DEST_WELL]),
+            transfer_vol=transfer_vol,
+            mix_times=mix_times,
+            mix_vol=mix_vol,
+            asp_flow=asp_flow,
+            asp_depth=asp_depth,
+            brick_stock=20 if brick_stock is None else brick_stock,
+        )
+    elif pd_json == "template":
+        proto = template.designer()
+        pd_data = proto["designerApplication"]["data"] if "designerApplication" in proto else proto
+        expand_pd_steps(pd_data, dest_wells)
+        patch_pd_data(
+            proto,
+            word,
+            per_block,
+            transfer_vol,
+            mix_times,
+            mix_vol,
+            asp_flow,
+            asp_depth,
+            brick_stock,
+        )
+    else:
+        raise ValueError(f"Unknown pd_json mode: {pd_json}")
 
-    Path(output_py).write_text(new_src)
+    # All Python-side patches touch the head only; the labware JSON is
+    # re-serialized from the cached, decoded copy.
+    if body == "steps":
+        head = render_python_head(
+            template, dest_wells, transfer_vol, mix_times, mix_vol, asp_flow, asp_depth
+        )
+        head = patch_python_sources(head, per_block)
+    elif body == "loop":
+        head = render_loop_head(
+            template, per_block, dest_wells, transfer_vol, mix_times, mix_vol, asp_flow, asp_depth
+        )
+    else:
+        raise ValueError(f"Unknown body mode: {body}")
+    with atomic_write(Path(output_py)) as fh:
+        fh.write(patch_python_metadata(head, word))
+        if template.custom_labware is None:
+            print("No CUSTOM_LABWARE block found; skipping TRIAL2 cleanup.")
+        else:
+            labware = drop_trial2_labware(template.custom_labware)
+            fh.write(json.dumps(labware, separators=(",", ":")))
+            fh.write(template.middle)
+        if pd_json == "generated":
+            write_designer_json(fh, model)
+        else:
+            fh.write(json.dumps(proto, separators=(",", ":")))
+        fh.write(template.tail)
     print(f"Protocol written → {output_py}")
+    return len(per_block)
 
 
 # ------------------------------------------------------------
 #                          CLI
 # ------------------------------------------------------------
-def main():
+def build_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser()
     p.add_argument("--word", "-w", required=True)
     p.add_argument("--template", "-t", default="BRICK_MIX_38_TIMES.py")
@@ -338,12 +841,29 @@ def main():
     p.add_argument("--asp-flow", type=float, default=None)
     p.add_argument("--asp-depth", type=float, default=None)
     p.add_argument("--brick-stock", type=float, default=None)
+    p.add_argument(
+        "--pd-json",
+        choices=("generated", "template"),
+        default="generated",
+        help="Build the Protocol Designer JSON from scratch (default) or patch the template's.",
+    )
+    p.add_argument(
+        "--body",
+        choices=("steps", "loop"),
+        default="steps",
+        help="Unroll every transfer like the PD export (default) or emit a table and one loop.",
+    )
+    add_metrics_arg(p)
+    return p
+
 
-    args = p.parse_args()
+def main(argv: list[str] | None = None):
+    args = build_parser().parse_args(argv)
+    started = time.perf_counter()
 
     out = args.output or f"BRICK MIX PROTOCOLS/BRICK_MIX_{args.word.upper()}.py"
 
-    build_new_py(
+    num_blocks = build_new_py(
         template_py=args.template,
         output_py=out,
         word=args.word,
@@ -353,7 +873,12 @@ def main():
         asp_flow=args.asp_flow,
         asp_depth=args.asp_depth,
         brick_stock=args.brick_stock,
+        pd_json=args.pd_json,
+        body=args.body,
     )
+    if args.metrics:  # one new tip per transfer, 38 transfers per block; no run-time model
+        write_build_metrics(Path(args.metrics), "pd", Path(out), num_blocks, 1, [],
+                            time.perf_counter() - started, tips=num_blocks * BRICKS_PER_MIX)
 
 
 if __name__ == "__main__":
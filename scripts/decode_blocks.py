@@ -0,0 +1,149 @@
+"""
+Decode DNA brick-mix block readouts back into the original input file.
+
+Readouts can be given as CSV, JSON or plain bitstrings (bit i -> brick i+2).
+A manifest written by the builders (--manifest) records how the bits were
+packed so padding, 7-bit ASCII packing and compression can be undone.
+The decoding itself lives in brick_core.decode.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))  # scripts/ (brick_core)
+from brick_core.decode import decode_range, decode_to_file, load_manifest  # noqa: E402
+from brick_core.output import atomic_write  # noqa: E402
+
+
+# ---------- CLI ----------
+
+
+def byte_range(text: str) -> tuple[int, int]:
+    """argparse type of --range: START:END with 0 <= START < END."""
+    start, sep, end = text.partition(":")
+    try:
+        start, end = int(start), int(end)
+    except ValueError:
+        start = end = None
+    if not sep or start is None or not 0 <= start < end:
+        raise argparse.ArgumentTypeError(f"expected START:END with 0 <= START < END, got {text!r}")
+    return start, end
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Reconstruct the original input from brick-mix block readouts "
+            "(36 bits per block, bit i -> brick i+2)."
+        )
+    )
+    parser.add_argument(
+        "readouts",
+        nargs="*",
+        help="Readout files in block order (.csv, .json or plain bitstrings).",
+    )
+    parser.add_argument(
+        "--manifest",
+        "-m",
+        help="Manifest written by the builder (--manifest); supplies encoding, "
+        "bit count, compression and the shard readout files.",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        required=True,
+        help="Path of the reconstructed file.",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["csv", "json", "text"],
+        default=None,
+        help="Readout format (default: from file suffix, plain text otherwise).",
+    )
+    parser.add_argument(
+        "--ascii7",
+        action="store_true",
+        help="Blocks carry 7-bit ASCII characters (ignored when a manifest is given).",
+    )
+    parser.add_argument(
+        "--range",
+        type=byte_range,
+        default=None,
+        metavar="START:END",
+        help="Decode only payload bytes START..END-1 (needs --manifest and one "
+        "readout per shard); only the blocks holding those bytes are read.",
+    )
+    parser.add_argument(
+        "--num-bits",
+        type=int,
+        default=None,
+        help="Unpadded payload length in bits (ignored when a manifest is given).",
+    )
+    return parser
+
+
+def main(argv: list[str] | None = None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    readouts = [Path(p).resolve() for p in args.readouts]
+    ascii7 = args.ascii7
+    num_bits = args.num_bits
+    compression = None
+
+    if args.manifest:
+        manifest_path = Path(args.manifest).resolve()
+        manifest = load_manifest(manifest_path)
+        ascii7 = manifest["encoding"] == "ascii7"
+        num_bits = manifest["num_bits"]
+        compression = manifest.get("compression")
+        if not readouts:
+            for shard in manifest.get("shards", []):
+                if not shard.get("readout"):
+                    raise SystemExit(
+                        f"Manifest shard {shard.get('protocol')} has no readout; "
+                        "pass readout files on the command line."
+                    )
+                readouts.append((manifest_path.parent / shard["readout"]).resolve())
+
+    if not readouts:
+        raise SystemExit("Provide readout files or a manifest that lists them.")
+    for p in readouts:
+        if not p.is_file():
+            raise SystemExit(f"Readout file not found: {p}")
+
+    output = Path(args.output).resolve()
+    output.parent.mkdir(parents=True, exist_ok=True)
+
+    if args.range:
+        if not args.manifest:
+            raise SystemExit("--range needs --manifest.")
+        if len(readouts) != len(manifest["shards"]):
+            raise SystemExit(
+                f"--range needs one readout per shard ({len(manifest['shards'])}), "
+                f"got {len(readouts)}."
+            )
+        start, end = args.range
+        try:
+            data = decode_range(manifest, readouts, start, end, fmt=args.format)
+        except ValueError as e:
+            parser.error(str(e))
+        with atomic_write(output, "wb") as fh:
+            fh.write(data)
+        print(f"Decoded bytes {start}:{end} → {output} ({len(data)} bytes)")
+        return
+
+    written = decode_to_file(
+        readouts,
+        output,
+        ascii7=ascii7,
+        num_bits=num_bits,
+        compression=compression,
+        fmt=args.format,
+    )
+    print(f"Decoded {len(readouts)} readout file(s) → {output} ({written} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Serve stand-in OT-2 robots locally, replaying generated protocols or recorded runs.
+
+    python scripts/fake_robot.py output/BRICK_MIX_Epic.py --speed 60
+    python scripts/fake_robot.py run.json --robots 5 --port 32000 --write-robots robots.json
+    python scripts/watchdog.py --robots robots.json --plans output/
+    python scripts/fake_robot.py run.json --webhook 32100   # + watchdog --webhook http://127.0.0.1:32100/
+
+Each robot replays the SOURCES one run after the other (a .py protocol is
+simulated offline; a .json is a recorded /runs/{id}/commands dump). Pauses
+are resumed by a simulated operator after --resume-after robot seconds.
+--webhook also serves a stand-in webhook that prints what it receives.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from brick_core.watch.fake_robot import FakeRobot, FakeWebhook, load_script  # noqa: E402
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="Serve stand-in OT-2 robots for the watchdog.")
+    p.add_argument("sources", nargs="+", help="Generated protocol (.py) or recorded run (.json)")
+    p.add_argument("--robots", type=int, default=1, help="Number of robots (consecutive ports)")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=31950, help="Port of the first robot")
+    p.add_argument("--speed", type=float, default=1.0, help="Robot seconds per real second")
+    p.add_argument("--resume-after", type=float, default=60.0,
+                   help="Robot seconds before the simulated operator resumes a pause")
+    p.add_argument("--history", type=int, default=0, help="Old finished runs to pre-populate /runs with")
+    p.add_argument("--write-robots", metavar="FILE", help="Write a watchdog --robots file for the fakes")
+    p.add_argument("--webhook", type=int, metavar="PORT", help="Also serve a stand-in notification webhook")
+    return p
+
+
+async def serve(args: argparse.Namespace, scripts: list) -> None:
+    robots = []
+    for i in range(args.robots):
+        robot = FakeRobot(f"fake{i + 1}", args.speed, args.resume_after)
+        robot.history(args.history)
+        for steps, protocol in scripts:
+            robot.queue(steps, protocol)
+        port = await robot.serve(args.host, args.port + i if args.port else 0)
+        robots.append({"name": robot.name, "host": args.host, "port": port})
+        print(f"[fake] {robot.name} on http://{args.host}:{port} ({len(scripts)} run(s), speed x{args.speed:g})")
+    if args.write_robots:
+        Path(args.write_robots).write_text(json.dumps({"robots": robots}, indent=1), encoding="utf-8")
+        print(f"[fake] Robot list: {args.write_robots}")
+    if args.webhook:
+        webhook = FakeWebhook(on_receive=lambda note: print(f"[webhook] {note['title']}: {note['message']}",
+                                                            flush=True))
+        port = await webhook.serve(args.host, args.webhook)
+        print(f"[fake] Webhook on http://{args.host}:{port}/")
+    await asyncio.Event().wait()
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        scripts = [load_script(Path(s)) for s in args.sources]
+    except (OSError, ValueError, KeyError) as e:
+        parser.error(f"Cannot load {e}")
+    try:
+        asyncio.run(serve(args, scripts))
+    except KeyboardInterrupt:
+        print("\n[fake] Stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,52 @@
-import time
-import requests
-import sys
+"""
+Watch one or more OT-2 robots and beep when a run pauses.
+
+    python scripts/watchdog.py                              # the lab robot
+    python scripts/watchdog.py --robot left=169.254.51.252 --robot right=169.254.51.253:31950
+    python scripts/watchdog.py --robots robots.yaml --plans output/ --timeline timelines/
+    python scripts/watchdog.py --desktop --webhook http://127.0.0.1:32100/ --notify-file alerts.jsonl
+    python scripts/watchdog.py --metrics-port 9108          # Prometheus: http://127.0.0.1:9108/metrics
+    python scripts/watchdog.py --report timelines/
+
+All robots are polled concurrently from one process over keep-alive
+connections (brick_core.watch); unreachable robots back off up to a minute.
+Idle robots are polled every 30 s, running ones every 5 s, and every second
+just before a pause of the run's plan (builders' --plan / --bundle output).
+With a plan, the time left and the time to the next pause are printed every
+few minutes, scaled by how fast the robot has been compared to the plan.
+Pauses, finished runs and offline robots are notified in the background
+(brick_core.watch.notify): the terminal always, plus desktop/webhook/file;
+repeats are deduplicated and simultaneous alerts merged. Poll latency,
+errors, robot/run status and pause durations can be exported as Prometheus
+metrics (served, or as a textfile).
+"""
+import argparse
+import asyncio
 import platform
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from brick_core.watch import Event, Fleet, PollSchedule, Robot, load_plans, load_robots, parse_robot  # noqa: E402
+from brick_core.plan import format_duration  # noqa: E402
+from brick_core.watch.fleet import check_unique  # noqa: E402
+from brick_core.watch.metrics import FleetMetrics  # noqa: E402
+from brick_core.watch.notify import DesktopSink, FileSink, Notifier, TerminalSink, WebhookSink  # noqa: E402
+from brick_core.watch.timeline import TimelineRecorder, read_timeline, summarize, timeline_files  # noqa: E402
 
 # =======================
 # CONFIG
 # =======================
 
-# OT-2 address
+# OT-2 address (used when no --robot/--robots is given)
 ROBOT_HOST = "169.254.51.252"
 ROBOT_PORT = 31950
 
-# How often to poll the robot (seconds)
-POLL_INTERVAL_SEC = 5
+# Seconds between rewrites of --metrics-file
+METRICS_WRITE_SEC = 15
 
-# Required header for OT-2 HTTP API v2
-HEADERS = {
-    "Opentrons-Version": "2",
-}
+# Seconds between time-left lines of a running robot (also printed on each status change)
+ETA_EVERY_SEC = 300
 
 
 # =======================
@@ -26,7 +55,7 @@ HEADERS = {
 
 def play_sound():
     """
-    Make some noise when the OT-2 run is paused.
+    Make some noise for an urgent alert (the terminal sink prints its text).
     On Windows: use winsound. On others: terminal bell.
     """
     try:
@@ -37,82 +66,162 @@ def play_sound():
             # This may beep in many terminals
             sys.stdout.write("\a")
             sys.stdout.flush()
-        print("[watcher] BEEP! OT-2 run paused.")
     except Exception as e:
         print("[watcher] Could not play sound:", e)
 
 
 # =======================
-# OT-2 RUN POLLING
+# STATUS STREAM
 # =======================
 
-def get_latest_run():
-    """
-    Query the OT-2 HTTP API for the list of runs and return the latest one (if any).
-
-    Endpoint: GET /runs  with header Opentrons-Version: 2
-    """
-    url = f"http://{ROBOT_HOST}:{ROBOT_PORT}/runs"
-    resp = requests.get(url, headers=HEADERS, timeout=5)
-    resp.raise_for_status()
-    data = resp.json()
-    runs = data.get("data", [])
-    if not runs:
-        return None
-
-    # Most recent by createdAt
-    runs_sorted = sorted(
-        runs,
-        key=lambda r: r.get("createdAt", ""),
-        reverse=True,
-    )
-    return runs_sorted[0]
-
-
-def main():
-    print(f"[watcher] Watching OT-2 at {ROBOT_HOST}:{ROBOT_PORT}")
-    print(f"[watcher] Poll interval: {POLL_INTERVAL_SEC}s")
-
-    last_status = None
-    last_run_id = None
-
+_eta_shown: dict[str, tuple[str | None, float]] = {}  # robot -> (status, time) of its last ETA line
+_status: dict[str, str | None] = {}
+
+
+def print_eta(event: Event):
+    eta = event.data.get("eta")
+    status = _status.get(event.robot)
+    shown = _eta_shown.get(event.robot)
+    if not eta or (shown and shown[0] == status and event.time - shown[1] < ETA_EVERY_SEC):
+        return
+    _eta_shown[event.robot] = (status, event.time)
+    if eta["next_pause_s"] == 0:
+        pause = "waiting for the operator"
+    elif eta["next_pause_s"] is None:
+        pause = "no pause left"
+    else:
+        pause = f"next pause in {format_duration(eta['next_pause_s'])}"
+    print(f"[watcher] {event.robot}: {eta['transfers']}/{eta['transfers_total']} transfers, "
+          f"ETA {format_duration(eta['remaining_s'])} left, {pause} (x{eta['speed']:.2f} plan time)", flush=True)
+
+
+def print_event(event: Event):
+    if event.kind in ("run", "status"):
+        _status[event.robot] = event.status
+    if event.kind == "commands":
+        print_eta(event)  # otherwise progress only; the stream shows connectivity, runs and status changes
+        return
+    print("[watcher]", event.format(), flush=True)  # alerts themselves go through the notifier
+
+
+def print_report(path: Path):
+    """One summary per recorded run: pauses, operator response, throughput."""
+    for file in timeline_files(path):
+        s = summarize(read_timeline(file))
+        name = f"{file.parent.name}/{file.stem}" + (f" ({s['plan']})" if s["plan"] else "")
+        print(f"[timeline] {name}: {s['status']}, {s['commands']} commands, "
+              f"{s['transfers']} transfers in {format_duration(s['elapsed_s'])}")
+        if s["pauses"]:
+            print(f"           paused {format_duration(s['paused_s'])} ({s['paused_fraction']:.0%}) "
+                  f"over {len(s['pauses'])} pauses; operator response mean "
+                  f"{s['response_s']['mean'] / 60:.1f} min, max {s['response_s']['max'] / 60:.1f} min")
+        print(f"           {s['transfers_per_hour']:.0f} transfers/h "
+              f"({s['active_transfers_per_hour']:.0f}/h while not paused)")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="Watch OT-2 robots and beep when a run pauses.")
+    p.add_argument("--robot", action="append", default=[], metavar="NAME=HOST[:PORT]",
+                   help="Robot to watch (repeatable)")
+    p.add_argument("--robots", metavar="FILE",
+                   help="JSON/YAML robot list: [\"name=host:port\", {name, host, port}, ...]")
+    p.add_argument("--plans", action="append", default=[], metavar="PATH",
+                   help="Run plan (.plan.json) or a directory of them (repeatable)")
+    defaults = PollSchedule()
+    p.add_argument("--interval", type=float, default=defaults.active,
+                   help=f"Seconds between polls while a run is active (default: {defaults.active:g})")
+    p.add_argument("--idle-interval", type=float, default=defaults.idle,
+                   help=f"Seconds between polls of an idle robot (default: {defaults.idle:g})")
+    p.add_argument("--near-interval", type=float, default=defaults.near_pause,
+                   help=f"Seconds between polls just before a planned pause (default: {defaults.near_pause:g})")
+    p.add_argument("--timeline", metavar="DIR",
+                   help="Append each run's status changes, pauses and command counts to DIR/<robot>/<run>.jsonl")
+    p.add_argument("--desktop", action="store_true", help="Also send desktop notifications")
+    p.add_argument("--webhook", action="append", default=[], metavar="URL",
+                   help="Also POST notifications as JSON to http://host[:port]/path (repeatable)")
+    p.add_argument("--notify-file", metavar="FILE", help="Also append notifications to FILE (JSONL)")
+    p.add_argument("--metrics-port", type=int, metavar="PORT",
+                   help="Serve Prometheus metrics at http://HOST:PORT/metrics")
+    p.add_argument("--metrics-host", default="127.0.0.1", help="Address for --metrics-port (default: 127.0.0.1)")
+    p.add_argument("--metrics-file", metavar="FILE",
+                   help=f"Rewrite Prometheus metrics to FILE (*.prom) every {METRICS_WRITE_SEC}s")
+    p.add_argument("--report", metavar="PATH",
+                   help="Print pause and throughput summaries of recorded timelines (file or DIR), then exit")
+    return p
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.report:
+        print_report(Path(args.report))
+        return
     try:
+        robots = load_robots(Path(args.robots)) if args.robots else []
+        robots += [parse_robot(spec) for spec in args.robot]
+        robots = robots or [Robot("ot2", ROBOT_HOST, ROBOT_PORT)]
+        check_unique(robots)
+        plans = load_plans(Path(p) for p in args.plans)
+        sinks = [TerminalSink(beep=play_sound)] + [WebhookSink(url) for url in args.webhook]
+    except (OSError, ValueError, KeyError) as e:
+        parser.error(str(e))
+    if args.desktop:
+        if DesktopSink.available():
+            sinks.append(DesktopSink())
+        else:
+            print("[watcher] No desktop notifier (notify-send/osascript) found; --desktop ignored.")
+    if args.notify_file:
+        sinks.append(FileSink(Path(args.notify_file)))
+    schedule = PollSchedule(args.idle_interval, args.interval, args.near_interval)
+
+    for robot in robots:
+        print(f"[watcher] Watching {robot.name} at {robot.address}")
+    print(f"[watcher] Poll interval: {schedule.idle:g}s idle, {schedule.active:g}s running, "
+          f"{schedule.near_pause:g}s near a planned pause ({len(plans)} plans)")
+    print(f"[watcher] Notifying: {', '.join(s.name for s in sinks)}")
+    timeline = TimelineRecorder(Path(args.timeline)) if args.timeline else None
+    metrics = FleetMetrics() if args.metrics_port or args.metrics_file else None
+
+    async def write_metrics():
         while True:
-            try:
-                latest = get_latest_run()
-                if latest is None:
-                    print("[watcher] No runs found yet.")
-                    time.sleep(POLL_INTERVAL_SEC)
-                    continue
-
-                run_id = latest.get("id")
-                status = latest.get("status")
-
-                if run_id != last_run_id:
-                    print(f"[watcher] New run detected: {run_id} (status={status})")
-                    last_run_id = run_id
-                    last_status = status
-
-                if status != last_status:
-                    print(f"[watcher] Run {run_id} status changed: {last_status} -> {status}")
-                    last_status = status
-
-                    if status == "paused":
-                        msg = "OT-2 run paused – check Opentrons App for instructions."
-                        print("[watcher]", msg)
-                        play_sound()
-
-                time.sleep(POLL_INTERVAL_SEC)
-
-            except requests.HTTPError as e:
-                print("[watcher] HTTP error:", e)
-                time.sleep(POLL_INTERVAL_SEC)
-            except Exception as e:
-                print("[watcher] Error:", e)
-                time.sleep(POLL_INTERVAL_SEC)
+            metrics.registry.write_textfile(Path(args.metrics_file))
+            await asyncio.sleep(METRICS_WRITE_SEC)
+
+    async def watch():
+        notifier = Notifier(sinks)
+
+        def on_event(event: Event):
+            if timeline:
+                timeline.record(event)
+            if metrics:
+                metrics.record(event)
+            print_event(event)
+            notifier.submit(event)
+
+        notifier.start()
+        server = writer = None
+        if args.metrics_port:
+            server = await metrics.registry.serve(args.metrics_host, args.metrics_port)
+            print(f"[watcher] Metrics: http://{args.metrics_host}:{args.metrics_port}/metrics")
+        if args.metrics_file:
+            writer = asyncio.create_task(write_metrics())
+        try:
+            await Fleet(robots, schedule, plans=plans, on_poll=metrics.poll if metrics else None).run(on_event)
+        finally:
+            await notifier.close()
+            if server:
+                server.close()
+            if writer:
+                writer.cancel()
+                metrics.registry.write_textfile(Path(args.metrics_file))
 
+    try:
+        asyncio.run(watch())
     except KeyboardInterrupt:
         print("\n[watcher] Stopped by user (Ctrl+C).")
+    finally:
+        if timeline:
+            timeline.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,165 @@
+import json
+import re
+import shutil
+from pathlib import Path
+
+import pytest
+
+from scripts import build_brick_mix_py as bbm
+from scripts.brick_core.simulate import simulate
+
+TEMPLATE = Path(__file__).resolve().parents[1] / "scripts" / "BRICK_MIX_38_TIMES.py"
+ARGS = dict(transfer_vol=3.0, mix_times=2, mix_vol=None, asp_flow=2.0, asp_depth=None, brick_stock=40.0)
+
+
+def _no_timestamps(text: str) -> str:
+    return re.sub(r"\d{4}-\d\d-\d\dT\d\d:\d\d:\d\dZ", "TS", text)
+
+
+def _legacy_build(word: str) -> str:
+    src, start, end, json_text = bbm.extract_pd_json_from_py(TEMPLATE)
+    modified = set(bbm.word_to_modified_bricks(word))
+    new_src = src[:start] + bbm.patch_pd_json(json_text, word, modified, **ARGS) + src[end:]
+    new_src = bbm.patch_python_sources(new_src, modified)
+    new_src = bbm.strip_trial2_from_custom_labware(new_src)
+    return bbm.patch_python_metadata(new_src, word)
+
+
+def test_cached_template_output_matches_legacy(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("BRICK_MIX_CACHE_DIR", str(tmp_path / "cache"))
+    template = tmp_path / "BRICK_MIX_38_TIMES.py"
+    shutil.copy(TEMPLATE, template)
+    for word in ("Epic", "Hi"):  # second build is served from the cache
+        out = tmp_path / f"{word}.py"
+        bbm.build_new_py(template, out, word, **ARGS, pd_json="template")
+        built, legacy = _no_timestamps(out.read_text()), _no_timestamps(_legacy_build(word))
+        # JSON blobs are unchanged; the Python body now shares liquid classes
+        assert built[built.index(bbm.LABWARE_MARKER):] == legacy[legacy.index(bbm.LABWARE_MARKER):]
+    cached = bbm.load_template(template)
+    assert cached == bbm.ParsedTemplate(*bbm.parse_template(template))
+    assert TEMPLATE.read_text().startswith(cached.head)
+    assert len(list((tmp_path / "cache").glob("pd-template*.pickle"))) == 1
+
+
+def test_shared_liquid_class_reflects_parameters(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("BRICK_MIX_CACHE_DIR", str(tmp_path / "cache"))
+    template = bbm.load_template(TEMPLATE)
+    head = bbm.render_python_head(template, None, 3.0, 2, None, 2.0, 1.5)
+    assert head.count("protocol.define_liquid_class(") == 1
+    assert head.count("liquid_class=liquid_class_1,") == 38 and "volume=3.0," in head
+    assert '"mix": {"enabled": True, "repetitions": 2, "volume": 3.0}' in head
+    assert '"flow_rate_by_volume": [(0, 2.0)]' in head and '"z": 1.5' in head
+    compile(head + '{}""")', "head", "exec")
+
+
+def test_template_cache_invalidated_on_edit(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("BRICK_MIX_CACHE_DIR", str(tmp_path / "cache"))
+    template = tmp_path / "t.py"
+    shutil.copy(TEMPLATE, template)
+    first = bbm.load_template(template)
+    assert first.designer() == first.designer() and first.designer() is not first.designer()
+    template.write_text("# edited\n" + TEMPLATE.read_text())
+    assert bbm.load_template(template).head.startswith("# edited\n")
+
+
+def test_patch_python_sources_single_pass_shared_wells():
+    step = 'transfer(source=[well_plate_1["{}"]])\n'
+    src = step.format("A1") * 2 + "".join(step.format(f"B{i % 12 + 1}") for i in range(36))
+    out = bbm.patch_python_sources(src, {2, 38})  # brick 2 shares A1 with brick 1
+    lines = out.splitlines()
+    assert lines[0] == step.format("A1").strip()
+    assert lines[1] == 'transfer(source=[well_plate_2["A1"]])'
+    assert lines[37] == step.format("B12").strip()
+
+
+def test_patch_python_sources_rejects_short_template():
+    with pytest.raises(ValueError):
+        bbm.patch_python_sources('source=[well_plate_1["A1"]]', {2})
+
+
+def test_multi_block_steps_match_python_body(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("BRICK_MIX_CACHE_DIR", str(tmp_path / "cache"))
+    word = "Epic brick mix!"  # 105 bits -> 3 blocks
+    per_block = bbm.word_to_block_bricks(word)
+    assert len(per_block) == 3 and per_block[0] == bbm.word_to_modified_bricks(word)
+
+    out = tmp_path / "multi.py"
+    bbm.build_new_py(TEMPLATE, out, word, **ARGS)
+    src = out.read_text()
+    compile(src, "multi.py", "exec")
+    start = src.index(bbm.PD_MARKER) + len(bbm.PD_MARKER)
+    pd_data = json.loads(src[start:src.index('"""', start)])["designerApplication"]["data"]
+    forms = [pd_data["savedStepForms"][sid] for sid in pd_data["orderedStepIds"]]
+
+    assert len(forms) == len(set(pd_data["orderedStepIds"])) == 3 * 38
+    assert [f["dispense_wells"] for f in forms[::38]] == [["A1"], ["A2"], ["A3"]]
+    assert re.findall(r'dest=\[well_plate_3\["(\w+)"\]\]', src)[::38] == ["A1", "A2", "A3"]
+    mod_id, = (k for k, lw in pd_data["labware"].items() if lw["displayName"] == "mod bricks")
+    pd_plates = ["2" if f["aspirate_labware"] == mod_id else "1" for f in forms]
+    assert pd_plates == re.findall(r"source=\[well_plate_(\d)\[", src)
+    assert pd_plates.count("2") == sum(len(m) for m in per_block)
+    assert "tip_racks=[tip_rack_1, tip_rack_2]" in src  # 114 tips
+
+
+def test_too_many_blocks_rejected():
+    with pytest.raises(ValueError):
+        bbm.block_dest_wells(bbm.MAX_BLOCKS + 1)
+
+
+def test_generated_pd_json_matches_patched_template(tmp_path: Path, monkeypatch):
+    from scripts.brick_core.pd_json import BrickMixModel, designer_json
+
+    monkeypatch.setenv("BRICK_MIX_CACHE_DIR", str(tmp_path / "cache"))
+    word = "Epic brick mix!"
+    per_block = [set(m) for m in bbm.word_to_block_bricks(word)]
+    dest_wells = bbm.block_dest_wells(len(per_block))
+    proto = bbm.load_template(TEMPLATE).designer()
+    patched = proto["designerApplication"]["data"]
+    bbm.expand_pd_steps(patched, dest_wells)
+    bbm.patch_pd_data(proto, word, per_block, **ARGS)
+
+    model = BrickMixModel(f"BRICK MIX - {word.upper()}", tuple(map(frozenset, per_block)), tuple(dest_wells), **ARGS)
+    generated = json.loads(designer_json(model))["designerApplication"]["data"]
+
+    def forms(data):
+        return [{k: v for k, v in data["savedStepForms"][sid].items() if k != "id"} for sid in data["orderedStepIds"]]
+
+    assert forms(generated) == forms(patched)
+    assert generated["labware"] == patched["labware"]
+    for key in ("pipetteTiprackAssignments", "ingredients", "ingredLocations", "pipettes"):
+        assert generated[key] == patched[key]
+
+
+def test_pre_mix_alone_mixes_the_template_volume(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("BRICK_MIX_CACHE_DIR", str(tmp_path / "cache"))
+    for pd_json in ("generated", "template"):  # --pre-mix without --mix-vol / --transfer-vol
+        out = tmp_path / f"{pd_json}.py"
+        bbm.main(["--word", "Hi", "--template", str(TEMPLATE), "--output", str(out),
+                  "--pre-mix", "3", "--pd-json", pd_json])
+        data = json.loads(bbm.extract_pd_json_from_py(out)[3])["designerApplication"]["data"]
+        forms = [data["savedStepForms"][sid] for sid in data["orderedStepIds"]]
+        assert {(f["aspirate_mix_times"], f["aspirate_mix_volume"], f["volume"]) for f in forms} == {("3", "2", "2")}
+
+
+def test_loop_body_matches_unrolled_steps(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("BRICK_MIX_CACHE_DIR", str(tmp_path / "cache"))
+    for word in ("Hi", "Epic Brick Mixes"):  # one block, four blocks (two tip racks)
+        steps, loop = tmp_path / "steps.py", tmp_path / "loop.py"
+        bbm.build_new_py(TEMPLATE, steps, word, **ARGS, body="steps")
+        bbm.build_new_py(TEMPLATE, loop, word, **ARGS, body="loop")
+        log = simulate(steps)
+        assert simulate(loop) == log
+        transfers = [c for c in log if c[1] == "transfer_with_liquid_class"]
+        assert len(transfers) == 38 * len(bbm.word_to_block_bricks(word))
+        assert len(loop.read_text().splitlines()) < len(steps.read_text().splitlines()) / 2
+
+
+def test_metrics_record_blocks_and_tips(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("BRICK_MIX_CACHE_DIR", str(tmp_path / "cache"))
+    out, prom = tmp_path / "epic.py", tmp_path / "build.prom"
+    bbm.main(["--word", "Hello world", "--template", str(TEMPLATE), "--output", str(out), "--metrics", str(prom)])
+    lines = prom.read_text().splitlines()
+    labels = '{builder="pd",output="epic.py"}'
+    assert f"brick_build_blocks{labels} 3" in lines and f"brick_build_tips_planned{labels} 114" in lines
+    assert "# TYPE brick_build_generation_seconds gauge" in lines
+    assert not any(line.startswith("brick_build_estimated_runtime_seconds") for line in lines)
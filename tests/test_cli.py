@@ -1,5 +1,6 @@
 from pathlib import Path
 import scripts.winUser.brickMixAndSAOT2
+from scripts.brick_core.encoding import bitstring_to_blocks, word_to_bitstring
 
 def test_cli_word_generates_file(tmp_path, monkeypatch):
     outdir = tmp_path / "out"
@@ -28,3 +29,161 @@ def test_cli_word_generates_file(tmp_path, monkeypatch):
     text = out_file.read_text(encoding="utf-8")
     assert "from opentrons import protocol_api" in text
     assert "BLOCKS = " in text
+
+
+def test_bundle_holds_shards_plan_and_checksums(tmp_path: Path):
+    import json
+    import tarfile
+    import zipfile
+    from scripts.brick_core.bundle import BundleWriter, verify_bundle
+    from scripts.brick_core.cli import bm_sa_parser, run_bm_sa
+
+    data = tmp_path / "x.bin"
+    data.write_bytes(bytes(range(200)))
+    for fmt in ("zip", "tar.gz"):
+        outdir = tmp_path / fmt
+        args = bm_sa_parser().parse_args(
+            ["-f", str(data), "--temp-vol", "5", "--shard-blocks", "20",
+             "--outdir", str(outdir), "--bundle", fmt]
+        )
+        (archive,) = run_bm_sa(args)
+        assert [p.name for p in outdir.iterdir()] == [archive.name]
+        assert verify_bundle(archive) == []
+        names = (zipfile.ZipFile(archive).namelist() if fmt == "zip"
+                 else tarfile.open(archive).getnames())
+        assert "BRICK_MIX_x.bin_part003.py" in names and "BRICK_MIX_x.bin_part003.loading.csv" in names
+        assert {"BRICK_MIX_x.bin.manifest.json", "BRICK_MIX_x.bin.index.json"} <= set(names)
+        assert names[-1] == "bundle-index.json"
+
+    # 45 blocks -> 3 shards; the plan lists every pause the protocol makes
+    plan = json.loads(tarfile.open(archive).extractfile("BRICK_MIX_x.bin.plan.json").read())
+    assert [s["num_blocks"] for s in plan["shards"]] == [20, 20, 5]
+    assert plan["estimate_s"] == sum(s["estimate_s"]["total"] for s in plan["shards"])
+
+    # identical members are stored once (tar hard link) and still verify
+    with BundleWriter(tmp_path / "d.tar.gz", "tar.gz") as bundle:
+        bundle.add_text("a.txt", "same")
+        bundle.add_text("b.txt", "same")
+    assert bundle.members[1]["same_as"] == "a.txt"
+    assert tarfile.open(tmp_path / "d.tar.gz").getmember("b.txt").islnk()
+    assert verify_bundle(tmp_path / "d.tar.gz") == []
+
+
+def test_sharded_build_streams_the_input(tmp_path: Path, monkeypatch):
+    import tracemalloc
+    import pytest
+    from scripts.brick_core import encoding
+    from scripts.brick_core.cli import bm_sa_parser, run_bm_sa
+    from scripts.brick_core.decode import load_manifest
+
+    monkeypatch.setattr(encoding, "FILE_CHUNK_BLOCKS", 56)
+    data = tmp_path / "x.bin"
+    peaks = []
+    for size in (9_000, 36_000):  # 2000 and 8000 blocks
+        data.write_bytes(bytes(range(256)) * (size // 256) + bytes(size % 256))
+        args = bm_sa_parser().parse_args(["-f", str(data), "--temp-vol", "5", "--shard-blocks", "60",
+                                          "--outdir", str(tmp_path / str(size))])
+        tracemalloc.start()
+        written = run_bm_sa(args)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        manifest = load_manifest(tmp_path / str(size) / "BRICK_MIX_x.bin.manifest.json")
+        assert manifest["num_bits"] == size * 8 and len(written) == -(-size * 8 // 36 // 60)
+    # one shard at a time: less than the larger file's 288 K-character bitstring,
+    # and 4x the input grows only the per-shard bookkeeping (paths, manifest)
+    assert peaks[1] < 288_000 and peaks[1] - peaks[0] < (288_000 - 72_000) / 2
+
+    data.write_text("ascii, then é", encoding="utf-8")  # rejected before any shard is written
+    with pytest.raises(ValueError, match="position 12"):
+        run_bm_sa(bm_sa_parser().parse_args(["-f", str(data), "--ascii7", "--temp-vol", "5",
+                                             "--shard-blocks", "1", "--outdir", str(tmp_path / "a7")]))
+    assert not list((tmp_path / "a7").glob("*.py"))
+
+
+def test_plan_pauses_match_simulated_protocol(tmp_path: Path):
+    from scripts.brick_core.layout import BM_SA_LAYOUT
+    from scripts.brick_core.plan import plan_run
+    from scripts.brick_core.render import build_bm_sa_protocol
+    from scripts.brick_core.simulate import simulate
+
+    blocks = bitstring_to_blocks(word_to_bitstring("Epic brick mixes, planned. " * 3))  # 16 blocks
+    common = dict(transfer_vol=2.0, brick_stock=12.0, mix_times=1, mix_vol=None, asp_flow=None, asp_depth=None)
+    build_bm_sa_protocol("x", blocks, tmp_path / "x.py", temp_vol=5, **common)
+    pauses = [c for c in simulate(tmp_path / "x.py") if c[1] == "pause"]
+
+    plan = plan_run(blocks, BM_SA_LAYOUT, 2.0, 12.0, 1, temp_vol=5)
+    assert len(plan["events"]) == len(pauses) > 2
+    for event, (_, _, (message,), _) in zip(plan["events"], pauses):
+        if event.get("refill_mod"):
+            assert "Mod bricks: " + ", ".join(map(str, event["refill_mod"])) in message
+        assert ("Refill all tip racks" in message) == ("tips" in event["reasons"] or "sa_setup" in event["reasons"])
+
+
+def test_builders_write_prometheus_metrics(tmp_path: Path):
+    import json
+    from scripts.brick_core.cli import bm_parser, bm_sa_parser, run_bm, run_bm_sa
+
+    data = tmp_path / "x.bin"
+    data.write_bytes(bytes(range(200)))
+    prom = tmp_path / "build.prom"
+    run_bm_sa(bm_sa_parser().parse_args(
+        ["-f", str(data), "--temp-vol", "5", "--shard-blocks", "20", "--outdir", str(tmp_path),
+         "--plan", "--metrics", str(prom)]))
+    lines = prom.read_text().splitlines()
+    plan = json.loads((tmp_path / "BRICK_MIX_x.bin.plan.json").read_text())
+    labels = '{builder="bm_sa",output="BRICK_MIX_x.bin.py"}'
+    assert f"brick_build_blocks{labels} 45" in lines and f"brick_build_protocols{labels} 3" in lines
+    assert f"brick_build_tips_planned{labels} {sum(s['tips'] for s in plan['shards'])}" in lines
+    assert f"brick_build_estimated_runtime_seconds{labels} {plan['estimate_s']:g}" in lines
+    assert "# TYPE brick_build_generation_seconds gauge" in lines
+
+    # without --plan no plan file is written, but the metrics are still planned
+    run_bm(bm_parser().parse_args(["-f", str(data), "--outdir", str(tmp_path / "bm"), "--metrics", str(prom)]))
+    assert not list((tmp_path / "bm").glob("*.plan.json"))
+    assert 'brick_build_tips_planned{builder="bm",output="BRICK_MIX_x.bin.py"} 1710' in prom.read_text()
+
+
+def test_pcr_builder_runs_the_cycle_as_one_profile(tmp_path: Path):
+    import pytest
+    from scripts.brick_core.cli import pcr_parser, run_pcr
+    from scripts.brick_core.simulate import simulate
+
+    prom = tmp_path / "build.prom"
+    (output,) = run_pcr(pcr_parser().parse_args(["--outdir", str(tmp_path), "--metrics", str(prom)]))
+    assert output.name == "ASYM_PCR_30cycles.py" and output.stat().st_size < 3000
+    labels = '{builder="pcr",output="ASYM_PCR_30cycles.py"}'
+    lines = prom.read_text().splitlines()
+    assert f"brick_build_tips_planned{labels} 0" in lines
+    assert f"brick_build_estimated_runtime_seconds{labels} {300 + 120 * 30 + 600}" in lines
+    profiles = [dict(kwargs) for _, method, _, kwargs in simulate(output) if method == "execute_profile"]
+    assert [p["repetitions"] for p in profiles] == [1, 30, 1]
+    # the defaults unroll to the lab's original program: 94°C 5 min, 30 x (94/60/72), 75°C 10 min
+    unrolled = [(dict(s)["temperature"], dict(s)["hold_time_seconds"])
+                for p in profiles for _ in range(p["repetitions"]) for s in p["steps"]]
+    assert unrolled == [(94, 300)] + [(94, 30), (60, 30), (72, 60)] * 30 + [(75, 600)]
+    assert {p["block_max_volume"] for p in profiles} == {50}
+
+    args = pcr_parser().parse_args(["--outdir", str(tmp_path), "--cycles", "12", "--initial-time", "0",
+                                    "--final-time", "0", "--no-hold", "--anneal-temp", "55"])
+    log = simulate(run_pcr(args)[0])
+    (profile,) = [dict(kwargs) for _, method, _, kwargs in log if method == "execute_profile"]
+    assert profile["repetitions"] == 12 and dict(profile["steps"][1])["temperature"] == 55
+    assert "deactivate_block" in [method for _, method, _, _ in log]
+    with pytest.raises(SystemExit):
+        run_pcr(pcr_parser().parse_args(["--outdir", str(tmp_path), "--extend-temp", "120"]))
+
+
+def test_build_multiblock_protocol_keeps_the_baseline_signatures(tmp_path: Path):
+    from scripts import BM_SA_builder, new_builder_07
+
+    blocks = bitstring_to_blocks(word_to_bitstring("Epic"))
+    data = tmp_path / "data.txt"
+    data.write_text("Epic")
+    new_builder_07.build_multiblock_protocol(
+        data, blocks, tmp_path / "bm.py", 20, 20, 3, None, None, None,
+    )
+    BM_SA_builder.build_multiblock_protocol(
+        "Epic", blocks, tmp_path / "bm_sa.py", 20, 20, 3, None, None, None, 10,
+    )
+    assert "data.txt" in (tmp_path / "bm.py").read_text(encoding="utf-8")
+    assert "Epic" in (tmp_path / "bm_sa.py").read_text(encoding="utf-8")
@@ -0,0 +1,99 @@
+import os
+from pathlib import Path
+import pytest
+
+from scripts.brick_core.encoding import file_to_bitstring, word_to_bitstring, iter_file_blocks, bitstring_to_blocks
+from scripts.brick_core.layout import brick_source_well, dest_well_name, modified_bricks
+
+def test_fast_encoders_match_reference(tmp_path: Path):
+    data = bytes(range(256))
+    p = tmp_path / "x.bin"
+    p.write_bytes(data)
+    assert file_to_bitstring(p) == "".join(f"{b:08b}" for b in data)
+    assert word_to_bitstring("Hi~", ascii7=True) == "".join(format(ord(c), "07b") for c in "Hi~")
+
+def test_ascii7_rejects_non_ascii():
+    with pytest.raises(ValueError):
+        word_to_bitstring("café", ascii7=True)
+
+def test_iter_file_blocks_matches_whole_file(tmp_path: Path):
+    p = tmp_path / "x.txt"
+    p.write_text("brick mix " * 50)
+    for ascii7 in (False, True):
+        expected = bitstring_to_blocks(file_to_bitstring(p, ascii7=ascii7))
+        assert list(iter_file_blocks(p, ascii7=ascii7, chunk_blocks=14)) == expected
+
+def test_layout_mappings():
+    assert [brick_source_well(b) for b in (1, 12, 13, 36, 37, 38)] == ["A1", "A12", "C1", "E12", "G1", "G2"]
+    assert [dest_well_name(s) for s in (0, 12, 59)] == ["A1", "C1", "H12"]
+    assert modified_bricks("1" + "0" * 34 + "1") == [2, 37]
+
+def test_templates_render_valid_python(tmp_path: Path):
+    from scripts.brick_core.render import build_bm_protocol, build_bm_sa_protocol, build_sa_protocol
+    blocks = bitstring_to_blocks(word_to_bitstring("Epic"))
+    common = dict(transfer_vol=2.0, brick_stock=None, mix_times=0, mix_vol=None, asp_flow=None, asp_depth=None)
+    build_bm_sa_protocol("Epic", blocks, tmp_path / "a.py", temp_vol=10, **common)
+    build_bm_protocol("Epic", blocks, tmp_path / "b.py", **common)
+    build_sa_protocol("Epic", blocks, tmp_path / "c.py", temp_vol=10)
+    for name in ("a.py", "b.py", "c.py"):
+        text = (tmp_path / name).read_text(encoding="utf-8")
+        assert "${" not in text
+        compile(text, name, "exec")
+    assert f'    "{blocks[0]}",' in (tmp_path / "a.py").read_text(encoding="utf-8")
+
+def test_template_missing_param_raises():
+    from scripts.brick_core.template import render
+    with pytest.raises(KeyError):
+        render("sa", {"SOURCE": "x"})
+
+def test_compact_blocks_unpack_to_same_blocks(tmp_path: Path):
+    from scripts.brick_core.render import blocks_literal, build_bm_protocol
+    for word in ("Epic", "Epic!"):  # even and odd number of blocks
+        blocks = bitstring_to_blocks(word_to_bitstring(word * 3))
+        for fmt in ("hex", "base64"):
+            ns = {}
+            exec("".join(blocks_literal(blocks, fmt, comment=True)), ns)
+            assert ns["_unpack_blocks"]() == blocks
+    build_bm_protocol("Epic", blocks, tmp_path / "b.py", transfer_vol=2.0, brick_stock=None, mix_times=0,
+                      mix_vol=None, asp_flow=None, asp_depth=None, blocks_format="base64")
+    text = (tmp_path / "b.py").read_text(encoding="utf-8")
+    compile(text, "b.py", "exec")
+    assert "    BLOCKS = _unpack_blocks()" in text and blocks[0] not in text
+    assert "base64-encoded" in text and "36-character string" not in text
+
+def test_pd_json_stream_matches_step_forms():
+    import json
+    from scripts.brick_core.pd_json import BrickMixModel, designer_json, step_forms
+    model = BrickMixModel("X", (frozenset({2, 5}), frozenset({37})), ("A1", "A2"), 3.0, 2, None, 1.5, None, 30)
+    data = json.loads(designer_json(model))["designerApplication"]["data"]
+    assert [data["savedStepForms"][sid] for sid in data["orderedStepIds"]] == list(step_forms(model))
+    with pytest.raises(ValueError):
+        BrickMixModel("X", (frozenset(),), ("A1", "A2"))
+
+def test_failed_render_keeps_previous_protocol(tmp_path: Path):
+    from scripts.brick_core.render import build_bm_protocol
+    out = tmp_path / "bm.py"
+    out.write_text("# previous protocol\n")
+
+    class Blocks(list):  # len() for the builder, a stream that fails mid-table
+        def __iter__(self):
+            yield "0" * 36
+            raise RuntimeError("disk full")
+
+    common = dict(transfer_vol=2.0, brick_stock=None, mix_times=0, mix_vol=None, asp_flow=None, asp_depth=None)
+    with pytest.raises(RuntimeError):
+        build_bm_protocol("x", Blocks(["0" * 36]), out, **common)
+    assert out.read_text() == "# previous protocol\n"
+    assert [p.name for p in tmp_path.iterdir()] == ["bm.py"]
+
+@pytest.mark.skipif(not hasattr(os, "fchmod"), reason="POSIX file modes")
+def test_atomic_write_leaves_the_umask_to_the_kernel(tmp_path: Path):
+    from scripts.brick_core.output import atomic_write
+
+    old = os.umask(0o027)
+    try:
+        with atomic_write(tmp_path / "a.py") as fh:
+            fh.write("x")
+    finally:
+        os.umask(old)
+    assert (tmp_path / "a.py").stat().st_mode & 0o777 == 0o640
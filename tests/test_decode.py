@@ -0,0 +1,92 @@
+import json
+from pathlib import Path
+import pytest
+
+from scripts.winUser.brickMixAndSAOT2 import word_to_bitstring, file_to_bitstring, bitstring_to_blocks
+from scripts.brick_core.decode import (
+    blocks_to_bytes, decode_to_file, read_blocks,
+    build_manifest, build_index, block_address, block_at, decode_range,
+)
+
+def test_roundtrip_word_ascii7_without_manifest():
+    blocks = bitstring_to_blocks(word_to_bitstring("Epic!", ascii7=True))
+    assert b"".join(blocks_to_bytes(blocks, ascii7=True)) == b"Epic!"
+
+def test_roundtrip_bytes_with_num_bits(tmp_path: Path):
+    src = tmp_path / "x.bin"
+    src.write_bytes(b"\x00\x01\xff\x00")  # trailing NUL survives only with num_bits
+    bits = file_to_bitstring(src, ascii7=False)
+    readout = tmp_path / "readout.txt"
+    readout.write_text("\n".join(bitstring_to_blocks(bits)))
+    out = tmp_path / "out.bin"
+    decode_to_file([readout], out, num_bits=len(bits))
+    assert out.read_bytes() == src.read_bytes()
+
+def test_single_line_readout_round_trips(tmp_path: Path):
+    data = bytes(range(256)) * 1200  # 300 KB -> one 2.4M-character line (took ~6 s when sliced per block)
+    src = tmp_path / "x.bin"
+    src.write_bytes(data)
+    bits = file_to_bitstring(src, ascii7=False)
+    readout = tmp_path / "readout.txt"
+    readout.write_text("".join(bitstring_to_blocks(bits)))
+    decode_to_file([readout], tmp_path / "out.bin", num_bits=len(bits))
+    assert (tmp_path / "out.bin").read_bytes() == data
+
+def test_failed_decode_leaves_no_partial_output(tmp_path: Path):
+    readout = tmp_path / "readout.txt"
+    readout.write_text("\n".join(bitstring_to_blocks(word_to_bitstring("brick mix"))) + "\n0101")
+    out = tmp_path / "out.bin"
+    with pytest.raises(ValueError):
+        decode_to_file([readout], out)
+    assert list(tmp_path.iterdir()) == [readout]
+
+def test_csv_brick_columns_reordered_by_block(tmp_path: Path):
+    blocks = bitstring_to_blocks(word_to_bitstring("brick mix", ascii7=True))
+    header = ["block"] + [f"brick_{n}" for n in range(2, 38)]
+    rows = [",".join([str(i)] + list(b)) for i, b in enumerate(blocks)]
+    p = tmp_path / "readout.csv"
+    p.write_text("\n".join([",".join(header)] + rows[::-1]))
+    assert list(read_blocks(p)) == blocks
+
+def test_json_readout_and_bad_block(tmp_path: Path):
+    p = tmp_path / "readout.json"
+    p.write_text(json.dumps({"blocks": ["1" * 36, "01" * 18]}))
+    assert list(read_blocks(p)) == ["1" * 36, "01" * 18]
+    p.write_text(json.dumps(["1" * 35]))
+    with pytest.raises(ValueError):
+        list(read_blocks(p))
+
+def test_addressing_and_range_decode_touch_only_needed_shards(tmp_path: Path):
+    data = bytes(range(256)) * 2
+    bits = "".join(f"{b:08b}" for b in data)
+    blocks = bitstring_to_blocks(bits)
+    shards = [blocks[i:i + 60] for i in range(0, len(blocks), 60)]
+    manifest = build_manifest("x.bin", False, len(bits), [(f"p{i}.py", len(s)) for i, s in enumerate(shards)])
+    readouts = []
+    for i, shard in enumerate(shards):
+        p = tmp_path / f"r{i}.txt"
+        p.write_text("\n".join(shard))
+        readouts.append(p)
+
+    assert block_address(manifest, 73) == (1, 0, "C2")  # 13th mix of rack 2
+    assert block_at(manifest, *block_address(manifest, 73)) == 73
+    rows = build_index(manifest)["rows"]
+    assert rows[0] == [0, 0, "A1", 0, 5]
+
+    # Bytes 300..310 live in shard 1 only; shard 0's readout must not be opened.
+    readouts[0].unlink()
+    assert decode_range(manifest, readouts, 300, 310) == data[300:310]
+    readouts[0].write_text("\n".join(shards[0]))
+
+    # the same through the CLI; bad ranges are usage errors, not tracebacks
+    from scripts import decode_blocks
+    from scripts.brick_core.decode import write_manifest
+
+    write_manifest(manifest, tmp_path / "x.manifest.json")
+    cli = ["-m", str(tmp_path / "x.manifest.json"), *map(str, readouts), "-o", str(tmp_path / "part.bin")]
+    decode_blocks.main(cli + ["--range", "300:310"])
+    assert (tmp_path / "part.bin").read_bytes() == data[300:310]
+    for bad in ("5", "a:b", "10:5", "0:513"):
+        with pytest.raises(SystemExit) as exc:
+            decode_blocks.main(cli + ["--range", bad])
+        assert exc.value.code == 2
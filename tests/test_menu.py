@@ -0,0 +1,82 @@
+from pathlib import Path
+
+import ot2_Protocol_Generator as menu
+
+
+def test_builders_run_in_process(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("BRICK_MIX_CACHE_DIR", str(tmp_path / "cache"))
+    script = menu.SCRIPTS_DIR / "BM_SA_builder.py"
+    assert menu.load_entrypoint(script) is not None
+    flags = menu.get_supported_flags(str(script))
+    assert {"--word", "--temp-vol", "--outdir", "--shard-blocks"} <= flags
+
+    # the subprocess path must not be taken for importable builders
+    monkeypatch.setattr(menu, "run_subprocess", lambda *a: 99)
+    outdir = tmp_path / "out"
+    args = ["--word", "Epic", "--temp-vol", "10", "--outdir", str(outdir), "--ascii7"]
+    assert menu.run_selected(menu.MenuItem("2", "BM+SA", script), args) == 0
+    assert (outdir / "BRICK_MIX_Epic.py").exists()
+    assert menu.run_script(script, ["--temp-vol", "10"]) == 1  # run_bm_sa: no --word/--file
+
+
+def test_protocol_files_are_never_imported():
+    # OT-2 protocols (no build_parser/main) fall back to a subprocess
+    assert menu.load_entrypoint(menu.SCRIPTS_DIR / "BRICK_MIX_38_TIMES.py") is None
+    assert menu.parser_flags(menu.load_entrypoint(menu.SCRIPTS_DIR / "ASYM_PCR.py").build_parser()) >= {"--cycles", "--outdir"}
+    assert menu.parser_flags(menu.load_entrypoint(menu.SCRIPTS_DIR / "build_brick_mix_py.py").build_parser()) >= {"--word", "--body"}
+
+
+def test_flag_cache_survives_restart_and_tracks_edits(tmp_path: Path, monkeypatch):
+    from brick_core import cache  # the copy the menu imported
+
+    monkeypatch.setenv("BRICK_MIX_CACHE_DIR", str(tmp_path / "cache"))
+    script = tmp_path / "tool.py"
+    script.write_text(
+        "import argparse\n"
+        "def build_parser():\n"
+        "    p = argparse.ArgumentParser()\n"
+        "    p.add_argument('--alpha')\n"
+        "    return p\n"
+        "def main(argv=None):\n"
+        "    build_parser().parse_args(argv)\n"
+    )
+    menu.prewarm_flags([menu.MenuItem("1", "tool", script)]).join()
+    assert len(list((tmp_path / "cache").glob("menu-flags*.pickle"))) == 1
+
+    # "next session": nothing in memory, discovery must not run again
+    cache.clear_memory()
+    calls = []
+    monkeypatch.setattr(menu, "discover_flags", lambda p: calls.append(p) or [])
+    assert menu.get_supported_flags(str(script)) == {"--help", "--alpha"}
+    assert calls == []
+
+    script.write_text(script.read_text().replace("--alpha", "--beta"))
+    assert menu.get_supported_flags(str(script)) == set() and len(calls) == 1
+
+
+def test_job_file_runs_jobs_in_parallel_with_summary(tmp_path: Path, monkeypatch):
+    import json
+
+    monkeypatch.setenv("BRICK_MIX_CACHE_DIR", str(tmp_path / "cache"))
+    (tmp_path / "data.txt").write_text("brick mix")
+    jobs = tmp_path / "jobs.json"
+    jobs.write_text(json.dumps({
+        "workers": 2,
+        "defaults": {"outdir": "out", "temp-vol": 10, "transfer-vol": 2},
+        "jobs": [
+            {"name": "epic", "script": "2", "word": "Epic"},
+            {"name": "file", "script": "new_builder_07.py", "file": "data.txt", "params": {"ascii7": True}},
+            {"name": "broken", "script": "BM_SA_builder.py", "params": {"bogus-flag": 1}},
+        ],
+    }))
+    assert menu.main(["--job", str(jobs)]) == 1
+
+    report = json.loads((tmp_path / "jobs.summary.json").read_text())
+    assert [(r["name"], r["exit_code"] == 0) for r in report["jobs"]] == [
+        ("epic", True), ("file", True), ("broken", False)
+    ]
+    # defaults only reach scripts that take them (new_builder_07 has no --temp-vol)
+    assert "--temp-vol" not in report["jobs"][1]["args"]
+    assert (tmp_path / "out" / "BRICK_MIX_Epic.py").exists()
+    assert (tmp_path / "out" / "BRICK_MIX_data.txt.py").exists()
+    assert "unrecognized arguments: --bogus-flag" in (tmp_path / "jobs.logs" / "broken.log").read_text()
@@ -0,0 +1,472 @@
+import asyncio
+import heapq
+import itertools
+import json
+
+import pytest
+
+from scripts.brick_core.watch import Fleet, HttpPool, PollSchedule, Robot, RobotWatcher, parse_robot
+from scripts.brick_core.watch.fake_robot import FakeRobot, load_script
+
+
+@pytest.fixture(scope="module")
+def epic(tmp_path_factory):
+    """A planned BM + SA protocol (16 blocks, several pauses) and the plans of its directory."""
+    from scripts.brick_core.cli import bm_sa_parser, run_bm_sa
+    from scripts.brick_core.watch import load_plans
+
+    outdir = tmp_path_factory.mktemp("epic")
+    args = bm_sa_parser().parse_args(
+        ["--word", "Epic brick mixes, planned. " * 3, "--temp-vol", "5", "--transfer-vol", "2",
+         "--brick-stock", "12", "--outdir", str(outdir), "--output", "epic.py", "--plan"])
+    (protocol,) = run_bm_sa(args)
+    return protocol, load_plans([outdir])
+
+
+class _Robot(FakeRobot):
+    """FakeRobot whose current run the test sets up and advances by hand."""
+
+    def __init__(self, total_commands: int = 3, on_request=None):
+        super().__init__()
+        self.runs.append({"id": "old", "status": "succeeded", "createdAt": "2026-01-01T00:00:00Z"})
+        self.commands["old"] = []
+        self.total_commands = total_commands
+        self.on_request = on_request
+
+    def start_run(self, run_id: str, status: str = "running") -> None:
+        self.add_run(run_id, status)
+        self.commands[run_id] = [{"id": f"{run_id}-{i}", "commandType": "aspirate", "status": "queued"}
+                                 for i in range(self.total_commands)]
+
+    def advance(self, status: str, done: int) -> None:
+        commands = self.commands[self.runs[-1]["id"]]
+        if status == "running" and done < len(commands) and commands[done]["commandType"] == "waitForResume":
+            status = "paused"
+        self.runs[-1]["status"] = status
+        for i, command in enumerate(commands):
+            command["status"] = "succeeded" if i < done else "running" if i == done else "queued"
+
+    def respond(self, path: str):
+        if self.on_request:
+            self.on_request(self, path)
+        return super().respond(path)
+
+
+def test_fleet_streams_status_changes_over_one_connection_per_robot():
+    def script(steps):
+        def on_request(robot, path):  # one step per poll of the current run
+            if path == "/runs/run-1":
+                robot.advance(*steps[min(robot.paths.count(path), len(steps) - 1)])
+        return on_request
+
+    async def scenario():
+        servers, robots = [], []
+        for name, steps in (("left", [("running", 0), ("running", 1), ("paused", 2)]), ("right", [("idle", 0)])):
+            fake = _Robot(on_request=script(steps))
+            fake.start_run("run-1", steps[0][0])
+            robots.append(Robot(name, "127.0.0.1", await fake.serve()))
+            servers.append(fake.server)
+        pool = HttpPool()
+        fleet = Fleet(robots, PollSchedule.fixed(0.01), pool=pool)
+        events, stop = [], asyncio.Event()
+
+        def on_event(event):
+            events.append(event)
+            if event.kind == "status":
+                stop.set()
+
+        await asyncio.wait_for(fleet.run(on_event, stop), 5)
+        for server in servers:
+            server.close()
+        await pool.close()
+        return events, pool.stats
+
+    events, stats = asyncio.run(scenario())
+    left = [(e.kind, e.run_id, e.status) for e in events if e.robot == "left" and e.kind != "commands"]
+    assert left == [("online", None, None), ("run", "run-1", "running"), ("status", "run-1", "paused")]
+    assert ("run", "run-1", "idle") in [(e.kind, e.run_id, e.status) for e in events if e.robot == "right"]
+    status = next(e for e in events if e.kind == "status")
+    assert status.format() == "left: Run run-1 status changed: running -> paused"
+    assert stats["connections"] == 2 and stats["requests"] >= 4 and stats["errors"] == 0
+
+
+def test_watcher_reads_only_the_current_run_and_new_commands():
+    async def scenario():
+        fake = _Robot(total_commands=230)
+        for i in range(300):  # a long run history the watcher must not download
+            fake.runs.insert(0, {"id": f"hist-{i}", "status": "succeeded", "createdAt": "2025-01-01T00:00:00Z"})
+        fake.start_run("run-1")
+        port = await fake.serve()
+        events, pool = [], HttpPool()
+        watcher = RobotWatcher(Robot("ot2", "127.0.0.1", port), pool, events.append)
+        sizes = []
+        for status, done in [("running", 0), ("running", 120), ("paused", 130), ("running", 229),
+                             ("succeeded", 230), ("succeeded", 230)]:
+            fake.advance(status, done)
+            before = pool.stats["bytes"]
+            await watcher.poll()
+            sizes.append(pool.stats["bytes"] - before)
+        fake.start_run("run-2")  # a new run replaces the current one
+        await watcher.poll()
+        fake.server.close()
+        await pool.close()
+        return fake, watcher, events, sizes
+
+    fake, watcher, events, sizes = asyncio.run(scenario())
+    assert [p for p in fake.paths if p.startswith("/runs?")] == ["/runs?pageLength=1"] * 2
+    assert watcher.scans == 2 and watcher.run_id == "run-2" and watcher.cursor == 0
+    progress = [(e.data["done"], e.data["total"]) for e in events if e.kind == "commands" and e.run_id == "run-1"]
+    assert progress == [(0, 230), (120, 230), (130, 230), (229, 230), (230, 230)]
+    # the cursor moves on: command pages start where the previous poll stopped
+    cursors = [p.split("cursor=")[1].split("&")[0] for p in fake.paths if "/runs/run-1/commands" in p]
+    assert cursors == ["0", "0", "50", "100", "120", "130", "180", "229"]
+    assert sizes[-1] < 1000 and max(sizes) < 4 * 50 * 100  # finished run: only /runs/{id}
+
+
+def test_unreachable_robot_goes_offline_with_backoff():
+    async def scenario():
+        server = await asyncio.start_server(lambda r, w: None, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        server.close()
+        await server.wait_closed()  # nothing listens on `port` any more
+
+        events = []
+        watcher = RobotWatcher(Robot("gone", "127.0.0.1", port), HttpPool(timeout=1), events.append,
+                               PollSchedule.fixed(5))
+        delays = []
+        for _ in range(6):
+            await watcher.poll()
+            delays.append(watcher.delay())
+        await watcher.pool.close()
+        return watcher, events, delays
+
+    watcher, events, delays = asyncio.run(scenario())
+    assert watcher.state == "offline"
+    assert [e.kind for e in events] == ["error", "offline"]
+    assert all(a < b for a, b in zip(delays, delays[1:4])) and max(delays) <= 60
+    assert parse_robot("left=10.0.0.2") == Robot("left", "10.0.0.2", 31950)
+    assert parse_robot("10.0.0.3:8080") == Robot("10.0.0.3", "10.0.0.3", 8080)
+
+
+def test_robot_files_without_pyyaml_are_a_usage_error(tmp_path, monkeypatch, capsys):
+    import sys
+
+    from scripts import watchdog
+    from scripts.brick_core.watch import load_robots
+
+    (tmp_path / "robots.json").write_text(json.dumps(["left=10.0.0.2", {"host": "10.0.0.3", "port": 8080}]))
+    assert load_robots(tmp_path / "robots.json") == [Robot("left", "10.0.0.2", 31950),
+                                                     Robot("10.0.0.3", "10.0.0.3", 8080)]
+    (tmp_path / "robots.yaml").write_text("- left=10.0.0.2\n")
+    monkeypatch.setitem(sys.modules, "yaml", None)  # as if PyYAML were not installed
+    with pytest.raises(SystemExit) as exc:
+        watchdog.main(["--robots", str(tmp_path / "robots.yaml")])
+    assert exc.value.code == 2 and "need PyYAML" in capsys.readouterr().err
+
+
+def test_poll_interval_follows_the_run_plan(epic):
+    from scripts.brick_core.simulate import simulate
+
+    protocol, plans = epic
+    assert list(plans) == ["epic.py"] and protocol.with_name("epic.plan.json").exists()
+
+    # the run's commands, as the robot would list them
+    names = {"pick_up_tip": "pickUpTip", "pause": "waitForResume"}
+    log = [names.get(method, method) for target, method, _, _ in simulate(protocol)
+           if not method.startswith("set ") and method not in ("load_labware", "load_instrument")]
+
+    async def scenario():
+        fake = _Robot()
+        fake.protocols["p1"] = {"files": [{"name": "labware.json", "role": "labware"},
+                                          {"name": "epic.py", "role": "main"}]}
+        fake.start_run("run-1", status="idle")
+        fake.runs[-1]["protocolId"] = "p1"
+        fake.commands["run-1"] = [{"id": str(i), "commandType": t, "status": "queued"} for i, t in enumerate(log)]
+        schedule = PollSchedule(idle=30, active=5, near_pause=1)
+        watcher = RobotWatcher(Robot("ot2", "127.0.0.1", await fake.serve()), HttpPool(), lambda e: None,
+                               schedule, plans=plans)
+        seen = {}
+        for done in [None, *range(0, len(log), 7), len(log)]:
+            fake.advance("idle" if done is None else "succeeded" if done == len(log) else "running", done or 0)
+            await watcher.poll()
+            seen.setdefault(watcher.phase(), []).append((done, watcher.delay(), watcher.progress.transfers_to_pause()))
+        await fake.close()
+        await watcher.pool.close()
+        return watcher, seen
+
+    watcher, seen = asyncio.run(scenario())
+    progress = watcher.progress
+    assert progress.plan["protocol"] == "epic.py" and progress.pauses_done == len(progress.pauses) > 2
+    assert [d for _, d, _ in seen["idle"]] == [30, 30] and {d for _, d, _ in seen["active"]} == {5}
+    assert {d for _, d, _ in seen["near_pause"]} == {1} and all(left <= 2 for _, _, left in seen["near_pause"])
+    # one "near" stretch per planned pause (each is two transfers ~ 8 commands long)
+    near = [done for done, _, _ in seen["near_pause"]]
+    assert len([d for d in near if d - 7 not in near]) == len(progress.pauses)
+
+
+def test_fake_robot_replays_a_generated_protocol_with_pauses(tmp_path, epic):
+    protocol, plans = epic
+    plan = plans["epic.py"]
+    now = [0.0]
+
+    async def scenario():
+        fake = FakeRobot(resume_after=None, clock=lambda: now[0])  # the test is the operator
+        fake.history(50)
+        fake.queue(*load_script(protocol))
+        events = []
+        watcher = RobotWatcher(Robot("ot2", "127.0.0.1", await fake.serve()), HttpPool(), events.append,
+                               plans={"epic.py": plan})
+        while watcher.status != "succeeded":
+            await watcher.poll()
+            if watcher.status == "paused":
+                fake.resume()
+            now[0] += 60
+        await fake.close()
+        await watcher.pool.close()
+        return fake, watcher, events
+
+    fake, watcher, events = asyncio.run(scenario())
+    statuses = [e.status for e in events if e.kind == "status"]
+    assert statuses == ["paused", "running"] * len(plan["events"]) + ["succeeded"]
+    progress = watcher.progress
+    assert progress.plan is plan and progress.transfers == plan["tips"] and progress.pauses_done == len(plan["events"])
+    assert abs(fake.replays["run-1"].t - plan["estimate_s"]["total"]) < 0.05 * plan["estimate_s"]["total"]
+
+    # a finished run, saved as the robot lists it, replays as a recorded run
+    record = tmp_path / "recorded.json"
+    record.write_text(json.dumps({"data": fake.respond("/runs/run-1/commands?cursor=0&pageLength=5000")[1]["data"],
+                                  "protocol": fake.protocols["protocol-1"]}))
+    steps, protocol_data = load_script(record)
+    simulated, _ = load_script(protocol)
+    assert [s.command_type for s in steps] == [s.command_type for s in simulated]
+    assert sum(s.seconds for s in steps) == sum(s.seconds for s in simulated)
+    assert protocol_data["files"] == [{"name": "epic.py", "role": "main"}]
+
+
+def test_timeline_records_pauses_and_throughput(tmp_path, epic):
+    from scripts.brick_core.watch.timeline import TimelineRecorder, read_timeline, summarize
+
+    protocol, plans = epic
+    now = [0.0]
+
+    async def scenario():
+        fake = FakeRobot(resume_after=300, clock=lambda: now[0])  # operator takes 5 min
+        fake.queue(*load_script(protocol))
+        port = await fake.serve()
+        recorder = TimelineRecorder(tmp_path / "timelines")
+        for _ in range(2):  # the second watcher is a restart after the run finished
+            watcher = RobotWatcher(Robot("left bench", "127.0.0.1", port), HttpPool(), recorder.record, plans=plans)
+            await watcher.poll()
+            while watcher.status != "succeeded" or watcher.cursor < watcher.total_commands:
+                now[0] += 45
+                await watcher.poll()
+            await watcher.pool.close()
+        recorder.close()
+        await fake.close()
+        return recorder.path("left bench", "run-1")
+
+    path = asyncio.run(scenario())
+    assert path == tmp_path / "timelines" / "left_bench" / "run-1.jsonl"
+    records = read_timeline(path)
+    assert [r["kind"] for r in records].count("run") == 2
+    summary = summarize(records)
+    plan = plans["epic.py"]
+    assert summary["plan"] == "epic.py" and summary["status"] == "succeeded"
+    assert summary["transfers"] == plan["tips"] and len(summary["pauses"]) == len(plan["events"])
+    assert summary["response_s"] == {"mean": 300, "max": 300} and summary["paused_s"] == 300 * len(plan["events"])
+    assert summary["elapsed_s"] == pytest.approx(plan["estimate_s"]["total"] + summary["paused_s"], rel=0.05)
+    assert summary["active_transfers_per_hour"] > summary["transfers_per_hour"] > 0
+
+
+def test_eta_learns_the_robots_speed_and_converges(epic):
+    from dataclasses import replace
+
+    protocol, plans = epic
+    steps, resource = load_script(protocol)
+    # a robot 1.5x slower than the plan's timings at pipetting; the thermocycler runs as planned
+    slow = [s if s.command_type in ("waitForResume", "thermocycler/runProfile") else replace(s, seconds=1.5 * s.seconds)
+            for s in steps]
+    now = [0.0]
+
+    async def scenario():
+        fake = FakeRobot(resume_after=300, clock=lambda: now[0])
+        fake.queue(slow, resource)
+        seen, status = [], None  # (robot time, estimate, run status)
+
+        def on_event(event):
+            nonlocal status
+            status = event.status if event.kind in ("run", "status") else status
+            if event.kind == "commands":
+                seen.append((now[0], event.data["eta"], status))
+
+        watcher = RobotWatcher(Robot("ot2", "127.0.0.1", await fake.serve()), HttpPool(), on_event, plans=plans)
+        while watcher.status != "succeeded":
+            await watcher.poll()
+            now[0] += 20
+        await fake.close()
+        await watcher.pool.close()
+        return seen, fake.replays["run-1"].t
+
+    etas, end = asyncio.run(scenario())
+    assert any(status == "paused" for _, _, status in etas)
+    assert all(eta["next_pause_s"] == 0 for _, eta, status in etas if status == "paused")
+    assert etas[0][1]["speed"] == 1.0 and abs(etas[-1][1]["speed"] - 1.5) < 0.1
+    # once a third of the transfers are done the prediction is within 10% of the actual time left
+    late = [(t, eta) for t, eta, _ in etas if eta["transfers"] >= eta["transfers_total"] / 3]
+    assert late and all(abs(eta["remaining_s"] - (end - t)) < 0.1 * end for t, eta in late)
+
+
+class _Clock:
+    """Manual clock for Notifier(clock=, sleep=): sleeps end only when advance() passes them."""
+
+    def __init__(self):
+        self.now = 0.0
+        self._sleepers: list[tuple[float, int, asyncio.Future]] = []
+        self._order = itertools.count()
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._sleepers, (self.now + seconds, next(self._order), future))
+        await future
+
+    @staticmethod
+    async def _settle() -> None:
+        for _ in range(20):  # let every task that can run do so
+            await asyncio.sleep(0)
+
+    async def advance(self, seconds: float) -> None:
+        end = self.now + seconds
+        await self._settle()
+        while self._sleepers and self._sleepers[0][0] <= end:
+            self.now, _, future = heapq.heappop(self._sleepers)
+            if not future.done():
+                future.set_result(None)
+            await self._settle()
+        self.now = end
+
+
+class _Sink:
+    def __init__(self, name: str, clock: _Clock, delay: float = 0.0):
+        self.name, self.clock, self.delay = name, clock, delay
+        self.received: list[str] = []
+
+    async def send(self, note) -> None:
+        if self.delay:
+            await self.clock.sleep(self.delay)
+        self.received.append(note.message)
+
+
+def test_notifications_are_merged_deduplicated_and_never_block():
+    from scripts.brick_core.watch.fake_robot import FakeWebhook
+    from scripts.brick_core.watch.notify import Notification, Notifier, WebhookSink
+    from scripts.brick_core.watch.fleet import Event
+
+    def status(robot, new, old="running", run="r1"):
+        return Event(robot, "status", run, new, old)
+
+    async def scenario():
+        clock = _Clock()
+        fast, slow = _Sink("fast", clock), _Sink("slow", clock, delay=5)
+        notifier = Notifier([fast, slow], gather_s=0.1, burst=2, min_gap_s=3, timeout=0.2,
+                            clock=clock, sleep=clock.sleep)
+        notifier.start()
+        for robot in ("left", "mid", "right"):  # three robots pause at once
+            notifier.submit(status(robot, "paused"))
+        notifier.submit(Event("left", "run", "r1", "paused"))  # the same pause, found again
+        notifier.submit(Event("left", "commands", "r1"))  # not an alert
+        await clock.advance(0.2)
+        notifier.submit(status("left", "running", "paused"))
+        notifier.submit(status("left", "paused"))  # a new pause of the same run
+        notifier.submit(status("mid", "failed", "paused"))
+        await clock.advance(0.2)
+        notifier.submit(Event("right", "offline"))  # the burst is used up: waits for a token
+        await clock.advance(1)
+        held = list(fast.received)
+        notifier.submit(status("mid", "stopped", "failed"))  # merged into the held notification
+        await clock.advance(5)
+        await notifier.close(drain_s=0)
+        return notifier.stats, held, fast.received, slow.received
+
+    stats, held, received, slow = asyncio.run(scenario())
+    assert held == ["3 paused: left, mid, right", "1 paused: left; 1 failed: mid"]
+    assert received == held + ["1 offline: right; 1 stopped: mid"]
+    assert stats["alerts"] == 8 and stats["duplicates"] == 1 and stats["notifications"] == 3
+    assert slow == [] and stats["failed"] == 3 and stats["sent"] == 3  # the slow sink times out every time
+
+    async def post():  # the webhook sink POSTs the notification as JSON
+        webhook = FakeWebhook()
+        sink = WebhookSink(f"http://127.0.0.1:{await webhook.serve()}/hook")
+        await sink.send(Notification("OT-2 left paused", "left: paused (run r1)", []))
+        await sink.pool.close()
+        await webhook.close()
+        return webhook.received
+
+    (posted,) = asyncio.run(post())
+    assert posted["message"] == "left: paused (run r1)"
+
+
+def test_fleet_metrics_are_served_in_prometheus_format(epic):
+    from scripts.brick_core.watch.metrics import FleetMetrics
+
+    protocol, plans = epic
+    plan = plans["epic.py"]
+    now = [0.0]
+
+    async def scenario():
+        fake = FakeRobot(resume_after=300, clock=lambda: now[0])
+        fake.queue(*load_script(protocol))
+        metrics = FleetMetrics()
+        watcher = RobotWatcher(Robot("left", "127.0.0.1", await fake.serve()), HttpPool(), metrics.record,
+                               plans={"epic.py": plan}, on_poll=metrics.poll)
+        while not (watcher.status == "paused" and watcher.progress.pauses_done):  # the second pause
+            await watcher.poll()
+            now[0] += 60
+        await fake.close()
+        await watcher.pool.close()
+        for _ in range(2):  # the robot is gone
+            await watcher.poll()
+        server = await metrics.registry.serve()
+        reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+        writer.write(b"GET /metrics HTTP/1.1\r\nHost: x\r\n\r\n")
+        response = (await reader.read()).decode()
+        writer.close()
+        server.close()
+        return watcher, response
+
+    watcher, response = asyncio.run(scenario())
+    head, body = response.split("\r\n\r\n", 1)
+    assert head.startswith("HTTP/1.1 200") and "text/plain; version=0.0.4" in head
+    lines = body.splitlines()
+    total = next(float(line.split()[-1]) for line in lines if line.startswith('ot2_polls_total{robot="left"}'))
+    assert f'ot2_poll_duration_seconds_count{{robot="left"}} {int(total)}' in lines
+    assert 'ot2_poll_errors_total{robot="left"} 2' in lines and 'ot2_robot_up{robot="left"} 0' in lines
+    assert 'ot2_run_status{robot="left",status="paused"} 1' in lines
+    assert 'ot2_run_status{robot="left",status="running"} 0' in lines
+    assert f'ot2_transfers_total{{robot="left"}} {watcher.progress.transfers}' in lines
+    assert 'ot2_pause_duration_seconds_bucket{robot="left",le="300"} 1' in lines
+    assert 'ot2_pause_duration_seconds_bucket{robot="left",le="120"} 0' in lines
+    assert any(line.startswith('ot2_run_remaining_seconds{robot="left"} ') for line in lines)
+
+
+def test_terminal_reports_each_alert_once(capsys):
+    from scripts import watchdog
+
+    async def alert(*events):
+        notifier = watchdog.Notifier([watchdog.TerminalSink(beep=watchdog.play_sound)], gather_s=0)
+        notifier.start()
+        for event in events:
+            watchdog.print_event(event)
+            notifier.submit(event)
+        await notifier.close(drain_s=1)
+
+    asyncio.run(alert(watchdog.Event("left", "status", "r1", "paused", "running")))
+    out = capsys.readouterr().out
+    assert out.count("paused") == 2  # the status change and the one notification
+    assert "[notify] left: paused (run r1)\n\a" in out
+
+    asyncio.run(alert(watchdog.Event("mid", "status", "r2", "failed", "running"), watchdog.Event("right", "offline")))
+    out = capsys.readouterr().out
+    assert "paused" not in out and out.count("\a") == 1  # submitted together: one merged alert